@@ -0,0 +1,60 @@
+"""Compara el arranque en frío y en caliente del inventario de la Semana 10.
+
+En frío se analiza el JSON (la primera vez con caché, además, se escribe la
+copia binaria); en caliente los productos salen de '<archivo>.cache' tras
+comprobar tamaño, fecha y hash del archivo. También se mide qué parte del
+arranque en caliente es solo la comprobación del hash.
+
+Uso: python benchmark_cache.py [productos...]   (por defecto 10000 100000 1000000)
+"""
+import contextlib
+import os
+import sys
+import tempfile
+
+from comun import cargar_semana, cronometrar, formatear_bytes, generar_productos
+
+ESCALAS = (10_000, 100_000, 1_000_000)
+
+
+def arrancar(semana, archivo, cache):
+    """Crea el inventario (que carga el archivo) y devuelve los productos cargados"""
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        inventario = semana.Inventario(archivo, cache=cache)
+        inventario.cerrar()
+    return len(inventario.productos)
+
+
+def medir(semana, directorio, cantidad):
+    archivo = os.path.join(directorio, f"inventario_{cantidad}.txt")
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        inventario = semana.Inventario(archivo, compacto=True)
+        for id, nombre, unidades, precio in generar_productos(cantidad):
+            inventario._insertar(semana.Producto(str(id), nombre, unidades, precio))
+        inventario.guardar_inventario()
+
+    frio, productos = cronometrar(arrancar, semana, archivo, False)
+    primera, _ = cronometrar(arrancar, semana, archivo, True)
+    caliente, cargados = cronometrar(arrancar, semana, archivo, True)
+    if cargados != productos:
+        raise RuntimeError(f"La caché cargó {cargados} productos en lugar de {productos}")
+    comprobacion, _ = cronometrar(semana.CacheBinaria(archivo).firma)
+    return (frio, primera, caliente, comprobacion,
+            os.path.getsize(archivo), os.path.getsize(archivo + '.cache'))
+
+
+def main():
+    escalas = [int(argumento) for argumento in sys.argv[1:]] or ESCALAS
+    semana = cargar_semana(10)
+
+    print(f"{'Productos':>10}{'JSON':>10}{'Caché':>10}{'En frío':>10}{'1ª con caché':>14}"
+          f"{'En caliente':>13}{'(hash)':>9}{'Mejora':>8}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for cantidad in escalas:
+            frio, primera, caliente, comprobacion, json_bytes, cache_bytes = medir(semana, directorio, cantidad)
+            print(f"{cantidad:>10}{formatear_bytes(json_bytes):>10}{formatear_bytes(cache_bytes):>10}"
+                  f"{frio:>9.2f}s{primera:>13.2f}s{caliente:>12.2f}s{comprobacion:>8.2f}s{frio / caliente:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
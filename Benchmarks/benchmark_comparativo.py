@@ -0,0 +1,370 @@
+"""Compara las tres implementaciones de Inventario (semanas 9, 10 y 11) a varias escalas.
+
+Para cada semana y escala se llena un inventario con productos generados con
+una semilla fija y se mide: añadir, actualizar, buscar por nombre y eliminar
+(de uno en uno, hasta --operaciones o hasta agotar --presupuesto segundos por
+tipo), listar todo, guardar y cargar. Se anota el tiempo por operación del lote
+más rápido de cada tipo, que varía menos entre ejecuciones. Cada caso se
+ejecuta en un proceso aparte para que el pico de memoria (RSS máximo del
+proceso) sea solo suyo. Las operaciones que una semana no tiene (la 9 no
+elimina ni guarda) quedan a null.
+
+Los resultados se guardan en un JSON; con --comparar se contrastan con los de
+otra ejecución y el programa termina con código 1 si alguna medida empeoró más
+de --tolerancia (0.25 = un 25 %), para poder usarlo como comprobación.
+
+Uso: python benchmark_comparativo.py [--escalas 10000,100000,1000000] [--semanas 9,10,11]
+         [--semilla 42] [--operaciones 1000] [--presupuesto 5] [--salida resultados.json]
+         [--comparar anteriores.json] [--tolerancia 0.25]
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from comun import RAIZ, cargar_semana, formatear_bytes, formatear_tiempo, generar_productos
+
+try:
+    import resource
+except ImportError:  # Windows: sin pico de memoria
+    resource = None
+
+OPERACIONES = ('añadir', 'actualizar', 'buscar', 'eliminar', 'listar', 'guardar', 'cargar')
+# Cada tipo de operación se mide en estos lotes y se queda el más rápido
+LOTES = 5
+# Veces que se repiten listar, guardar y cargar (cada una es un lote)
+REPETICIONES = 3
+# Diferencias por debajo de esto se consideran ruido al comparar tiempos
+MINIMO_SIGNIFICATIVO = 5e-6
+
+
+class Adaptador:
+    """Da a cada semana la misma interfaz; None = la semana no tiene esa operación"""
+
+    eliminar = guardar = cargar = None
+
+    def __init__(self, modulo, directorio):
+        self.modulo = modulo
+        self.directorio = directorio
+        self.inventario = None
+
+
+class Semana9(Adaptador):
+    """Lista de productos: cada alta comprueba el ID recorriendo la lista"""
+
+    def poblar(self, filas):
+        # Directamente en la lista: añadir_producto haría la preparación cuadrática
+        self.inventario = self.modulo.Inventario()
+        self.inventario._productos.extend(self.modulo.Producto(*fila) for fila in filas)
+
+    def añadir(self, fila):
+        self.inventario.añadir_producto(self.modulo.Producto(*fila))
+
+    def actualizar(self, id, cantidad):
+        self.inventario.actualizar_producto(id, cantidad)
+
+    def buscar(self, texto):
+        self.inventario.buscar_productos(texto)
+
+    def listar(self):
+        self.inventario.mostrar_todos()
+
+
+class Semana10(Adaptador):
+    """Diccionario con IDs de texto que reescribe el archivo en cada operación"""
+
+    def poblar(self, filas):
+        self.archivo = os.path.join(self.directorio, "inventario.txt")
+        self.inventario = self.modulo.Inventario(self.archivo)
+        for id, nombre, cantidad, precio in filas:
+            self.inventario._insertar(self.modulo.Producto(str(id), nombre, cantidad, precio))
+        self.inventario.guardar_inventario(silencioso=True)
+
+    def añadir(self, fila):
+        id, nombre, cantidad, precio = fila
+        self.inventario.añadir_producto(str(id), nombre, cantidad, precio)
+
+    def actualizar(self, id, cantidad):
+        self.inventario.actualizar_producto(str(id), cantidad)
+
+    def buscar(self, texto):
+        self.inventario.buscar_producto(texto)
+
+    def eliminar(self, id):
+        self.inventario.eliminar_producto(str(id))
+
+    def listar(self):
+        # Como la opción 5 del menú: todas las páginas, ordenadas por ID
+        for pagina in self.inventario.paginas():
+            self.modulo.escribir_bloque(pagina)
+
+    def guardar(self):
+        self.inventario.guardar_inventario(silencioso=True)
+
+    def cargar(self):
+        self.inventario.cerrar()
+        self.inventario = None  # no tener dos inventarios grandes a la vez
+        self.inventario = self.modulo.Inventario(self.archivo)
+
+
+class Semana11(Adaptador):
+    """Diccionario con índices en memoria; solo guarda cuando se pide"""
+
+    def poblar(self, filas):
+        self.archivo = os.path.join(self.directorio, "inventario.json")
+        self.inventario = self.modulo.Inventario()
+        self.inventario._añadir_lote([self.modulo.Producto(*fila) for fila in filas])
+
+    def añadir(self, fila):
+        self.inventario.añadir_producto(self.modulo.Producto(*fila))
+
+    def actualizar(self, id, cantidad):
+        self.inventario.actualizar_producto(id, cantidad=cantidad)
+
+    def buscar(self, texto):
+        self.inventario.buscar_por_nombre(texto)
+
+    def eliminar(self, id):
+        self.inventario.eliminar_producto(id)
+
+    def listar(self):
+        productos = self.inventario.mostrar_todos()
+        for bloque in iter(lambda: list(itertools.islice(productos, 1000)), []):
+            self.modulo.escribir_bloque(bloque)
+
+    def guardar(self):
+        self.inventario.guardar_a_archivo(self.archivo)
+
+    def cargar(self):
+        self.inventario = None
+        self.inventario = self.modulo.Inventario()
+        self.inventario.cargar_desde_archivo(self.archivo)
+
+
+ADAPTADORES = {9: Semana9, 10: Semana10, 11: Semana11}
+
+
+def repetir(funcion, argumentos, presupuesto, lotes=LOTES):
+    """Ejecuta funcion con cada tupla de argumentos, en lotes, hasta acabarlas o pasar
+    el presupuesto (al menos un lote).
+
+    Devuelve las veces que se ejecutó, los segundos totales y el tiempo por
+    operación del lote más rápido: como en timeit, el mínimo es la medida menos
+    afectada por lo demás que haga la máquina, y la más estable entre ejecuciones.
+    """
+    tamaño = max(1, -(-len(argumentos) // lotes))
+    veces, total, mejor = 0, 0.0, None
+    for desde in range(0, len(argumentos), tamaño):
+        inicio = time.perf_counter()
+        hechas = 0
+        # El presupuesto se comprueba en cada operación: en la Semana 10 una
+        # sola puede tardar segundos (reescribe todo el archivo)
+        for argumento in argumentos[desde:desde + tamaño]:
+            funcion(*argumento)
+            hechas += 1
+            if total + time.perf_counter() - inicio > presupuesto:
+                break
+        segundos = time.perf_counter() - inicio
+        veces += hechas
+        total += segundos
+        mejor = min(mejor, segundos / hechas) if mejor is not None else segundos / hechas
+        if total > presupuesto:
+            break
+    return veces, total, mejor
+
+
+def medir_caso(numero, escala, opciones):
+    """Mide todas las operaciones de una semana a una escala; devuelve el resultado del caso"""
+    aleatorio = random.Random(opciones.semilla)
+    nuevas = list(itertools.islice(generar_productos(escala + opciones.operaciones, opciones.semilla + 1),
+                                   escala, None))
+    ids = list(range(1, escala + 1))
+    cantidad = min(opciones.operaciones, escala)
+    actualizados = [(id, aleatorio.randrange(500)) for id in aleatorio.sample(ids, cantidad)]
+    busquedas = [(f"modelo {aleatorio.randrange(100000)}",) for _ in range(cantidad)]
+    eliminados = [(id,) for id in aleatorio.sample(ids, cantidad)]
+
+    operaciones = {}
+    with tempfile.TemporaryDirectory() as directorio, \
+            open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        adaptador = ADAPTADORES[numero](cargar_semana(numero), directorio)
+        # Las filas se generan a medida que se insertan: el pico de memoria
+        # es el del inventario, no el de una lista con todas ellas
+        preparacion = time.perf_counter()
+        adaptador.poblar(generar_productos(escala, opciones.semilla))
+        preparacion = time.perf_counter() - preparacion
+
+        pasos = [('añadir', [(fila,) for fila in nuevas]), ('actualizar', actualizados),
+                 ('buscar', busquedas), ('eliminar', eliminados),
+                 ('listar', [()] * REPETICIONES), ('guardar', [()] * REPETICIONES),
+                 ('cargar', [()] * REPETICIONES)]
+        for nombre, argumentos in pasos:
+            funcion = getattr(adaptador, nombre)
+            if funcion is None:
+                operaciones[nombre] = None
+                continue
+            veces, segundos, mejor = repetir(funcion, argumentos, opciones.presupuesto)
+            operaciones[nombre] = {'veces': veces, 'segundos': segundos, 'por_operacion': mejor}
+
+    pico = None
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux da KiB y macOS bytes
+        pico *= 1 if sys.platform == 'darwin' else 1024
+    return {'semana': numero, 'escala': escala, 'preparacion': preparacion,
+            'pico_memoria': pico, 'operaciones': operaciones, 'error': None}
+
+
+def _ejecutar_caso(numero, escala, opciones, conexion):
+    try:
+        conexion.send(medir_caso(numero, escala, opciones))
+    except BaseException as e:
+        conexion.send({'semana': numero, 'escala': escala, 'error': f"{type(e).__name__}: {e}"})
+    finally:
+        conexion.close()
+
+
+def ejecutar_caso(numero, escala, opciones):
+    """Mide el caso en un proceso nuevo (aislado en memoria del resto)"""
+    receptor, emisor = multiprocessing.Pipe(duplex=False)
+    proceso = multiprocessing.Process(target=_ejecutar_caso, args=(numero, escala, opciones, emisor))
+    proceso.start()
+    emisor.close()
+    try:
+        resultado = receptor.recv()
+    except EOFError:
+        # El proceso murió sin responder (p. ej. sin memoria)
+        resultado = {'semana': numero, 'escala': escala, 'error': "El proceso terminó sin resultado"}
+    proceso.join()
+    return resultado
+
+
+def commit_actual():
+    try:
+        salida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                                capture_output=True, text=True, check=True)
+        return salida.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def imprimir_caso(resultado):
+    if resultado['error']:
+        print(f"{resultado['semana']:>6}{resultado['escala']:>10}  Error: {resultado['error']}")
+        return
+    columnas = []
+    for nombre in OPERACIONES:
+        medida = resultado['operaciones'][nombre]
+        columnas.append(f"{formatear_tiempo(medida['por_operacion']) if medida else '-':>11}")
+    pico = formatear_bytes(resultado['pico_memoria']) if resultado['pico_memoria'] else '-'
+    print(f"{resultado['semana']:>6}{resultado['escala']:>10}{''.join(columnas)}{pico:>13}")
+
+
+def medidas(resultados):
+    """(semana, escala, medida) -> valor, con la medida 'pico_memoria' o el nombre de una operación"""
+    valores = {}
+    for resultado in resultados:
+        if resultado.get('error'):
+            continue
+        clave = (resultado['semana'], resultado['escala'])
+        if resultado.get('pico_memoria'):
+            valores[clave + ('pico_memoria',)] = resultado['pico_memoria']
+        for nombre, medida in resultado['operaciones'].items():
+            if medida is not None:
+                valores[clave + (nombre,)] = medida['por_operacion']
+    return valores
+
+
+def comparar(anteriores, actuales, tolerancia):
+    """Muestra lo que cambió más de la tolerancia; devuelve cuántas medidas empeoraron"""
+    antes, ahora = medidas(anteriores), medidas(actuales)
+    empeoradas = 0
+    cambios = []
+    for clave in sorted(antes.keys() & ahora.keys(), key=str):
+        anterior, actual = antes[clave], ahora[clave]
+        if clave[2] != 'pico_memoria' and abs(actual - anterior) < MINIMO_SIGNIFICATIVO:
+            continue
+        razon = actual / anterior if anterior else float('inf')
+        if razon > 1 + tolerancia:
+            empeoradas += 1
+            cambios.append((clave, anterior, actual, razon, "EMPEORA"))
+        elif razon < 1 / (1 + tolerancia):
+            cambios.append((clave, anterior, actual, razon, "mejora"))
+
+    if not cambios:
+        print(f"\nSin cambios de más del {tolerancia:.0%} respecto a la ejecución anterior.")
+        return 0
+    print(f"\nCambios de más del {tolerancia:.0%} respecto a la ejecución anterior:")
+    print(f"{'Semana':>6}{'Escala':>10}{'Medida':>14}{'Antes':>13}{'Ahora':>13}{'Razón':>8}")
+    for (semana, escala, medida), anterior, actual, razon, estado in cambios:
+        formato = formatear_bytes if medida == 'pico_memoria' else formatear_tiempo
+        print(f"{semana:>6}{escala:>10}{medida:>14}{formato(anterior):>13}{formato(actual):>13}"
+              f"{razon:>7.2f}x  {estado}")
+    return empeoradas
+
+
+def leer_argumentos():
+    analizador = argparse.ArgumentParser(description="Compara los inventarios de las semanas 9, 10 y 11")
+    enteros = lambda texto: [int(valor) for valor in texto.split(',') if valor]
+    analizador.add_argument('--escalas', type=enteros, default=[10_000, 100_000, 1_000_000])
+    analizador.add_argument('--semanas', type=enteros, default=[9, 10, 11])
+    analizador.add_argument('--semilla', type=int, default=42)
+    analizador.add_argument('--operaciones', type=int, default=1000,
+                            help="operaciones de cada tipo como máximo (añadir, actualizar, ...)")
+    analizador.add_argument('--presupuesto', type=float, default=5.0,
+                            help="segundos como máximo por tipo de operación")
+    analizador.add_argument('--salida', default=None,
+                            help="archivo de resultados (por defecto resultados_<fecha>.json)")
+    analizador.add_argument('--comparar', default=None, help="resultados de una ejecución anterior")
+    analizador.add_argument('--tolerancia', type=float, default=0.25)
+    opciones = analizador.parse_args()
+    for semana in opciones.semanas:
+        if semana not in ADAPTADORES:
+            analizador.error(f"Semana no válida: {semana} (use 9, 10 u 11)")
+    return opciones
+
+
+def main():
+    opciones = leer_argumentos()
+    salida = opciones.salida or f"resultados_{datetime.now():%Y%m%d_%H%M%S}.json"
+    datos = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'nucleos': os.cpu_count(),
+        'parametros': {'escalas': opciones.escalas, 'semanas': opciones.semanas, 'semilla': opciones.semilla,
+                       'operaciones': opciones.operaciones, 'presupuesto': opciones.presupuesto},
+        'resultados': [],
+    }
+
+    print("Tiempo por operación, mejor lote (listar, guardar y cargar: el inventario completo)")
+    print(f"{'Semana':>6}{'Escala':>10}{''.join(f'{nombre:>11}' for nombre in OPERACIONES)}{'Pico RSS':>13}")
+    for escala in opciones.escalas:
+        for numero in opciones.semanas:
+            resultado = ejecutar_caso(numero, escala, opciones)
+            datos['resultados'].append(resultado)
+            imprimir_caso(resultado)
+            # Se escribe tras cada caso: una ejecución interrumpida conserva lo medido
+            with open(salida, 'w', encoding='utf-8') as archivo:
+                json.dump(datos, archivo, ensure_ascii=False, indent=2)
+    print(f"\nResultados guardados en {salida}")
+
+    if opciones.comparar:
+        with open(opciones.comparar, encoding='utf-8') as archivo:
+            anteriores = json.load(archivo)['resultados']
+        if comparar(anteriores, datos['resultados'], opciones.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Tamaño y velocidad de la copia comprimida por bloques frente al JSON del inventario (Semana 11).
+
+Se guarda el mismo inventario como el JSON de siempre (con sangría y
+compacto) y como copia gzip por bloques con varios niveles de compresión,
+comprimiendo y descomprimiendo los bloques en el propio proceso y en
+paralelo (un proceso por núcleo). La carga incluye construir los índices
+del inventario; la lectura solo recorre las filas del archivo. El paralelo
+solo mejora con varios núcleos; con uno solo mide el coste de repartir el
+trabajo.
+
+Uso: python benchmark_compresion.py [productos]   (por defecto 200000)
+"""
+import os
+import sys
+import tempfile
+
+from comun import cargar_semana, cronometrar, formatear_bytes, generar_productos
+
+NIVELES = (1, 6, 9)
+
+
+def medir_json(semana, inventario, ruta, compacto):
+    guardar, _ = cronometrar(inventario.guardar_a_archivo, ruta, compacto)
+    cargar, correcto = cronometrar(semana.Inventario().cargar_desde_archivo, ruta)
+    leer, _ = cronometrar(sum, (1 for _ in semana.leer_arreglo_json(ruta)))
+    return correcto, guardar, cargar, leer
+
+
+def medir_comprimido(semana, inventario, ruta, nivel, procesos):
+    guardar, _ = cronometrar(inventario.guardar_comprimido, ruta, nivel, procesos)
+    cargado = semana.Inventario()
+    cargar, correcto = cronometrar(cargado.cargar_comprimido, ruta, procesos)
+    correcto = correcto and len(cargado._productos) == len(inventario._productos)
+    # Se libera antes de seguir: cada inventario ocupa mucha memoria
+    del cargado
+    leer, _ = cronometrar(sum, (1 for _ in semana.leer_comprimido(ruta, procesos)))
+    return correcto, guardar, cargar, leer
+
+
+def main():
+    productos = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    semana = cargar_semana(11)
+    inventario = semana.Inventario()
+    inventario._añadir_lote([semana.Producto(*fila) for fila in generar_productos(productos)])
+
+    print(f"{productos} productos, {os.cpu_count()} núcleo(s)")
+    print(f"{'Formato':<24}{'Tamaño':>11}{'Relación':>10}{'Guardar':>10}{'Cargar':>10}{'Lectura':>10}")
+    with tempfile.TemporaryDirectory() as directorio:
+        casos = [("JSON con sangría", os.path.join(directorio, "inventario.json"),
+                  lambda ruta: medir_json(semana, inventario, ruta, False)),
+                 ("JSON compacto", os.path.join(directorio, "compacto.json"),
+                  lambda ruta: medir_json(semana, inventario, ruta, True))]
+        for nivel in NIVELES:
+            for procesos, modo in ((1, "en serie"), (None, "en paralelo")):
+                casos.append((f"gzip {nivel}, {modo}", os.path.join(directorio, f"copia_{nivel}.jsonl.gz"),
+                              lambda ruta, nivel=nivel, procesos=procesos:
+                              medir_comprimido(semana, inventario, ruta, nivel, procesos)))
+
+        referencia = None
+        for nombre, ruta, medir in casos:
+            correcto, guardar, cargar, leer = medir(ruta)
+            if not correcto:
+                raise RuntimeError(f"Carga incorrecta: {nombre}")
+            tamaño = os.path.getsize(ruta)
+            referencia = referencia or tamaño
+            print(f"{nombre:<24}{formatear_bytes(tamaño):>11}{referencia / tamaño:>9.1f}x"
+                  f"{guardar:>9.2f}s{cargar:>9.2f}s{leer:>9.2f}s")
+
+
+if __name__ == "__main__":
+    main()
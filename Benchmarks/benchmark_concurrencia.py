@@ -0,0 +1,75 @@
+"""Mide cuántos guardados por segundo admite el inventario compartido de la Semana 10
+con varios procesos escribiendo en el mismo archivo, y comprueba que no se pierde
+ningún cambio.
+
+Cada proceso añade productos propios (uno por guardado) sobre un inventario inicial.
+
+Uso: python benchmark_concurrencia.py [productos_iniciales] [operaciones_por_proceso]
+     (por defecto 2000 y 50)
+"""
+import contextlib
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from comun import cargar_semana, generar_productos
+
+PROCESOS = (1, 2, 4, 8, 16)
+
+
+def escritor(archivo, numero, operaciones, inicio):
+    semana = cargar_semana(10)
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        inventario = semana.Inventario(archivo, compartido=True)
+        inicio.wait()
+        for indice in range(operaciones):
+            inventario.añadir_producto(f"p{numero}-{indice}", f"Producto {numero}-{indice}", 10, 1.0)
+        inventario.cerrar()
+
+
+def medir(semana, directorio, iniciales, procesos, operaciones):
+    archivo = os.path.join(directorio, f"inventario_{procesos}.txt")
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        inventario = semana.Inventario(archivo, compartido=True)
+        for id, nombre, cantidad, precio in generar_productos(iniciales):
+            inventario._insertar(semana.Producto(str(id), nombre, cantidad, precio))
+        inventario.guardar_inventario()
+        inventario.cerrar()
+
+    inicio = multiprocessing.Event()
+    hijos = [multiprocessing.Process(target=escritor, args=(archivo, numero, operaciones, inicio))
+             for numero in range(procesos)]
+    for hijo in hijos:
+        hijo.start()
+    time.sleep(0.5)  # que todos terminen de cargar antes de empezar a medir
+    comienzo = time.perf_counter()
+    inicio.set()
+    for hijo in hijos:
+        hijo.join()
+    segundos = time.perf_counter() - comienzo
+
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        final = semana.Inventario(archivo)
+    esperados = iniciales + procesos * operaciones
+    return segundos, len(final.productos), esperados
+
+
+def main():
+    iniciales = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    operaciones = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    semana = cargar_semana(10)
+
+    print(f"Inventario inicial: {iniciales} productos, {operaciones} guardados por proceso")
+    print(f"{'Procesos':>8}{'Segundos':>10}{'Guardados/s':>13}{'Productos':>11}{'Esperados':>11}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for procesos in PROCESOS:
+            segundos, productos, esperados = medir(semana, directorio, iniciales, procesos, operaciones)
+            guardados = procesos * operaciones / segundos
+            aviso = "" if productos == esperados else "  <- ¡cambios perdidos!"
+            print(f"{procesos:>8}{segundos:>10.2f}{guardados:>13,.0f}{productos:>11}{esperados:>11}{aviso}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Compara el guardado anterior (lista de diccionarios + json.dump con sangría)
+con el escritor por flujo, con y sin sangría, usando el inventario de la Semana 11.
+
+Uso: python benchmark_escritura.py [cantidad ...]   (por defecto 100000 1000000)
+"""
+import json
+import os
+import sys
+import tempfile
+
+from comun import cargar_semana, cronometrar, formatear_bytes, generar_productos, pico_memoria
+
+
+def guardar_anterior(inventario, ruta):
+    """Reproduce el guardar_a_archivo original"""
+    datos = [producto.to_dict() for producto in inventario.mostrar_todos()]
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, indent=2, ensure_ascii=False)
+
+
+def main():
+    cantidades = [int(valor) for valor in sys.argv[1:]] or [100_000, 1_000_000]
+    semana = cargar_semana(11)
+
+    for cantidad in cantidades:
+        inventario = semana.Inventario()
+        for id, nombre, stock, precio in generar_productos(cantidad):
+            inventario.añadir_producto(semana.Producto(id, nombre, stock, precio))
+
+        metodos = [
+            ("json.dump (anterior)", lambda ruta: guardar_anterior(inventario, ruta)),
+            ("flujo con sangría", lambda ruta: inventario.guardar_a_archivo(ruta)),
+            ("flujo compacto", lambda ruta: inventario.guardar_a_archivo(ruta, compacto=True)),
+        ]
+
+        print(f"\n{cantidad} productos")
+        print(f"{'Método':<22}{'Tiempo':>10}{'Pico memoria':>16}{'Tamaño':>14}")
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "inventario.json")
+            for nombre, guardar in metodos:
+                segundos, _ = cronometrar(guardar, ruta)
+                tamaño = os.path.getsize(ruta)
+                pico = pico_memoria(guardar, ruta)
+                print(f"{nombre:<22}{segundos:>9.2f}s{formatear_bytes(pico):>16}{formatear_bytes(tamaño):>14}")
+
+
+if __name__ == "__main__":
+    main()
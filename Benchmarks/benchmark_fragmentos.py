@@ -0,0 +1,79 @@
+"""Tiempo de carga y de guardado del inventario de la Semana 11 según el número de fragmentos.
+
+Para cada número de fragmentos se mide la carga leyendo los fragmentos en el
+propio proceso y en paralelo (ProcessPoolExecutor, un proceso por núcleo), y
+el guardado tras modificar unos pocos productos, que solo reescribe los
+fragmentos tocados. La primera fila es el inventario.json único de siempre.
+La carga en paralelo solo mejora con varios núcleos; con uno solo mide el
+coste de repartir el trabajo.
+
+Cargar el inventario incluye construir sus índices en memoria, que es la
+mayor parte del tiempo y no se reparte; la columna de lectura mide solo leer
+y analizar los fragmentos.
+
+Uso: python benchmark_fragmentos.py [productos] [modificados]   (por defecto 200000 y 10)
+"""
+import os
+import random
+import sys
+import tempfile
+
+from comun import cargar_semana, cronometrar, generar_productos
+
+FRAGMENTOS = (1, 2, 4, 8, 16, 32)
+
+
+def medir(semana, inventario, directorio, fragmentos, modificados):
+    almacen = semana.AlmacenFragmentado(os.path.join(directorio, f"fragmentos_{fragmentos}"), fragmentos)
+    inventario._reescribir_todo = True
+    completo, _ = cronometrar(inventario.guardar_en_fragmentos, almacen)
+
+    aleatorio = random.Random(fragmentos)
+    for id in aleatorio.sample(range(1, len(inventario._productos) + 1), modificados):
+        inventario.actualizar_producto(id, cantidad=aleatorio.randrange(500))
+    tocados = len({almacen.fragmento_de(id) for id in inventario._tocados})
+    incremental, _ = cronometrar(inventario.guardar_en_fragmentos, almacen)
+
+    cargas = []
+    for procesos in (1, None):
+        almacen.procesos = procesos
+        cargado = semana.Inventario()
+        segundos, correcto = cronometrar(cargado.cargar_desde_fragmentos, almacen)
+        if not correcto or len(cargado._productos) != len(inventario._productos):
+            raise RuntimeError(f"Carga incorrecta con {fragmentos} fragmentos")
+        # Solo lectura y análisis de los fragmentos, sin construir el inventario
+        lectura, _ = cronometrar(sum, (1 for _ in almacen.filas()))
+        # Se libera antes de la siguiente carga: cada inventario ocupa mucha memoria
+        del cargado
+        cargas.append((lectura, segundos))
+    return cargas, completo, incremental, tocados
+
+
+def main():
+    productos = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    modificados = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    semana = cargar_semana(11)
+    inventario = semana.Inventario()
+    inventario._añadir_lote([semana.Producto(*fila) for fila in generar_productos(productos)])
+
+    print(f"{productos} productos, {os.cpu_count()} núcleo(s); guardado incremental tras modificar {modificados}")
+    print(f"{'':>10}{'--- En serie ---':>18}{'-- En paralelo --':>19}")
+    print(f"{'Fragmentos':>10}{'Lectura':>9}{'Carga':>9}{'Lectura':>10}{'Carga':>9}"
+          f"{'Guardar todo':>14}{'Incremental':>13}{'Reescritos':>12}")
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = os.path.join(directorio, "inventario.json")
+        guardado, _ = cronometrar(inventario.guardar_a_archivo, archivo, True)
+        carga, _ = cronometrar(semana.Inventario().cargar_desde_archivo, archivo)
+        lectura, _ = cronometrar(sum, (1 for _ in semana.leer_arreglo_json(archivo)))
+        print(f"{'JSON único':>10}{lectura:>8.2f}s{carga:>8.2f}s{'-':>10}{'-':>9}"
+              f"{guardado:>13.2f}s{guardado:>12.2f}s{1:>12}")
+
+        for fragmentos in FRAGMENTOS:
+            cargas, completo, incremental, tocados = medir(semana, inventario, directorio, fragmentos, modificados)
+            (lectura_serie, carga_serie), (lectura_paralela, carga_paralela) = cargas
+            print(f"{fragmentos:>10}{lectura_serie:>8.2f}s{carga_serie:>8.2f}s{lectura_paralela:>9.2f}s"
+                  f"{carga_paralela:>8.2f}s{completo:>13.2f}s{incremental:>12.2f}s{tocados:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Mide la importación masiva del inventario de la Semana 11 en filas por segundo.
+
+Genera un catálogo CSV y otro JSONL (con un 1% de filas inválidas o repetidas)
+y los importa en un inventario vacío.
+
+Uso: python benchmark_importacion.py [filas]   (por defecto 500000)
+"""
+import csv
+import json
+import os
+import sys
+import tempfile
+
+from comun import cargar_semana, cronometrar, formatear_bytes, generar_productos
+
+
+def escribir_catalogo(ruta, formato, filas):
+    with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+        escritor = csv.writer(archivo) if formato == 'csv' else None
+        if escritor:
+            escritor.writerow(['id', 'nombre', 'cantidad', 'precio'])
+        for id, nombre, cantidad, precio in generar_productos(filas):
+            if id % 200 == 0:
+                cantidad = -1  # fila inválida
+            elif id % 200 == 1:
+                id -= 1  # ID repetido
+            if escritor:
+                escritor.writerow([id, nombre, cantidad, precio])
+            else:
+                archivo.write(json.dumps({'id': id, 'nombre': nombre, 'cantidad': cantidad, 'precio': precio},
+                                         ensure_ascii=False) + '\n')
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    semana = cargar_semana(11)
+
+    print(f"{'Formato':<8}{'Tamaño':>12}{'Aceptadas':>12}{'Rechazadas':>12}{'Segundos':>10}{'Filas/s':>12}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for formato in ('csv', 'jsonl'):
+            ruta = os.path.join(directorio, f"catalogo.{formato}")
+            escribir_catalogo(ruta, formato, filas)
+
+            inventario = semana.Inventario()
+            destino = os.path.join(directorio, "inventario.json")
+            segundos, resultado = cronometrar(inventario.importar_masivo, ruta, guardar_en=destino)
+            print(f"{formato:<8}{formatear_bytes(os.path.getsize(ruta)):>12}{resultado.aceptadas:>12}"
+                  f"{resultado.total_rechazadas:>12}{segundos:>10.2f}{resultado.leidas / segundos:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
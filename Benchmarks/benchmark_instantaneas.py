@@ -0,0 +1,135 @@
+"""Instantáneas del inventario de la Semana 11 frente a copiarlo para recorrerlo.
+
+Compara abrir una instantánea con las dos copias que se hacían antes de
+generar un informe (copiar el diccionario, que no protege de los cambios en
+los productos, y copiar los valores de cada producto), cuánto cuesta cada
+escritura con una instantánea abierta y cuánta memoria ocupan los estados
+conservados. Por último, un hilo recorre una instantánea mientras el hilo
+principal sigue modificando, añadiendo y eliminando productos, y se comprueba
+que el recorrido ve exactamente el inventario del momento en que se abrió.
+
+Uso: python benchmark_instantaneas.py [productos] [escrituras]   (por defecto 200000 y 20000)
+"""
+import gc
+import random
+import sys
+import threading
+import tracemalloc
+
+from comun import cargar_semana, cronometrar, formatear_bytes, formatear_tiempo, generar_productos, pico_memoria
+
+
+def escribir(semana, inventario, cantidad, semilla):
+    """Modifica, elimina y añade productos al azar"""
+    aleatorio = random.Random(semilla)
+    maximo = len(inventario._productos)
+    for numero in range(cantidad):
+        id = aleatorio.randrange(1, maximo + 1)
+        azar = aleatorio.random()
+        if azar < 0.1:
+            inventario.eliminar_producto(id)
+        elif azar < 0.2:
+            inventario.añadir_producto(semana.Producto(10 * maximo + semilla * cantidad + numero,
+                                                       "Producto nuevo", 1, 1.0))
+        else:
+            inventario.actualizar_producto(id, cantidad=aleatorio.randrange(500))
+
+
+def actualizar(inventario, ids, semilla):
+    aleatorio = random.Random(semilla)
+    for id in ids:
+        inventario.actualizar_producto(id, cantidad=aleatorio.randrange(500))
+
+
+def memoria_instantanea(inventario, ids, semilla):
+    """Bytes que retiene una instantánea abierta mientras se modifican los ids.
+
+    Se mide en una sola pasada: lo que se libera al cerrarla tras las
+    modificaciones. Los valores nuevos de los productos siguen ocupados
+    después y no cuentan. Devuelve también cuántos estados conservó.
+    """
+    gc.collect()
+    tracemalloc.start()
+    instantanea = inventario.instantanea()
+    actualizar(inventario, ids, semilla)
+    abierta, _ = tracemalloc.get_traced_memory()
+    conservados = instantanea.conservados()
+    instantanea.cerrar()
+    gc.collect()
+    cerrada, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return abierta - cerrada, conservados
+
+
+def copiar_valores(inventario):
+    return [(p.get_id(), p.get_nombre(), p.get_cantidad(), p.get_precio()) for p in inventario._productos.values()]
+
+
+def abrir_y_cerrar(inventario, veces):
+    for _ in range(veces):
+        inventario.instantanea().cerrar()
+
+
+def recorrer_mientras_escribe(semana, inventario):
+    """Un hilo suma las unidades de una instantánea; el principal escribe mientras tanto"""
+    instantanea = inventario.instantanea()
+    esperado = instantanea.resumen()
+    leidos = []
+    lector = threading.Thread(target=lambda: leidos.append(
+        (sum(1 for _ in instantanea), sum(estado.cantidad for estado in instantanea))))
+    lector.start()
+    escrituras = 0
+    while lector.is_alive():
+        escribir(semana, inventario, 100, 1000 + escrituras)
+        escrituras += 100
+    lector.join()
+    (productos, unidades), = leidos
+    if (productos, unidades) != (esperado['productos'], esperado['unidades']):
+        raise RuntimeError(f"La instantánea vio {productos} productos y {unidades} unidades; "
+                           f"al abrirla había {esperado['productos']} y {esperado['unidades']}")
+    return escrituras, instantanea.conservados()
+
+
+def main():
+    productos = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    escrituras = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    semana = cargar_semana(11)
+    inventario = semana.Inventario()
+    inventario._añadir_lote([semana.Producto(*fila) for fila in generar_productos(productos)])
+    print(f"{productos} productos, {escrituras} escrituras")
+
+    print(f"\n{'Para recorrerlo':<26}{'Tiempo':>10}{'Memoria':>12}")
+    veces = 10_000
+    segundos, _ = cronometrar(abrir_y_cerrar, inventario, veces)
+    print(f"{'Abrir instantánea':<26}{formatear_tiempo(segundos / veces):>10}"
+          f"{formatear_bytes(pico_memoria(inventario.instantanea)):>12}")
+    for nombre, copia in (("Copiar el diccionario", lambda: dict(inventario._productos)),
+                          ("Copiar los valores", lambda: copiar_valores(inventario))):
+        segundos, _ = cronometrar(copia)
+        print(f"{nombre:<26}{formatear_tiempo(segundos):>10}{formatear_bytes(pico_memoria(copia)):>12}")
+    instantanea = inventario.instantanea()
+    segundos, _ = cronometrar(sum, (1 for _ in instantanea))
+    instantanea.cerrar()
+    directo, _ = cronometrar(lambda: sum(1 for _ in copiar_valores(inventario)))
+    print(f"Recorrer la instantánea: {formatear_tiempo(segundos)} "
+          f"(copiar los valores y recorrerlos: {formatear_tiempo(directo)})")
+
+    # Solo modificaciones de productos distintos: cada una conserva un estado
+    ids = random.Random(0).sample(list(inventario._productos), min(escrituras, productos))
+    sin_instantanea, _ = cronometrar(actualizar, inventario, ids, 1)
+    instantanea = inventario.instantanea()
+    con_instantanea, _ = cronometrar(actualizar, inventario, ids, 2)
+    instantanea.cerrar()
+    memoria, conservados = memoria_instantanea(inventario, ids, 3)
+    print(f"\nPor modificación: {formatear_tiempo(sin_instantanea / len(ids))} sin instantánea, "
+          f"{formatear_tiempo(con_instantanea / len(ids))} con una abierta")
+    print(f"Estados conservados: {conservados}, {formatear_bytes(memoria)} "
+          f"({memoria / max(conservados, 1):.0f} B por producto cambiado)")
+
+    realizadas, conservados = recorrer_mientras_escribe(semana, inventario)
+    print(f"\nRecorrido en otro hilo: {realizadas} escrituras mientras tanto, "
+          f"{conservados} estados conservados, resultado coherente")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Mide con tracemalloc cuántos bytes ocupa cada producto en memoria.
+
+Compara, para las semanas 9, 10 y 11, la clase Producto anterior (objeto con
+__dict__, reproducida aquí) con la actual (__slots__), a varias escalas. Los
+nombres se crean de nuevo para cada producto, como al leerlos de un archivo.
+No se internan: en un catálogo casi todos son distintos y la tabla de
+cadenas internadas ocuparía más de lo que ahorra compartir los pocos
+repetidos.
+
+Uso: python benchmark_memoria.py [escalas]   (por defecto 20000,200000,1000000)
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from comun import cargar_semana, formatear_bytes, generar_productos
+
+
+# Disposición anterior de cada semana: mismos atributos, pero con __dict__ por instancia
+class ProductoAnterior9:
+    def __init__(self, id, nombre, cantidad, precio):
+        self._id = id
+        self._nombre = nombre
+        self._cantidad = cantidad
+        self._precio = precio
+
+
+class ProductoAnterior10:
+    def __init__(self, id, nombre, cantidad, precio, umbral_reorden=None):
+        self.id = id
+        self.nombre = nombre
+        self.cantidad = cantidad
+        self.precio = precio
+        self.umbral_reorden = umbral_reorden
+
+
+class ProductoAnterior11:
+    def __init__(self, id, nombre, cantidad, precio):
+        self._id = id
+        self._nombre = nombre
+        self._cantidad = cantidad
+        self._precio = precio
+        self._observador = None
+
+
+ANTERIORES = {9: ProductoAnterior9, 10: ProductoAnterior10, 11: ProductoAnterior11}
+
+
+def medir(clase, filas, id_texto):
+    """Crea un producto por fila y devuelve los bytes que siguen ocupados por producto"""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    productos = []
+    for id, nombre, cantidad, precio in filas:
+        # Copia nueva del nombre por producto (el corte crea otra cadena)
+        nombre = (nombre + ' ')[:-1]
+        productos.append(clase(str(id) if id_texto else id, nombre, cantidad, precio))
+    segundos = time.perf_counter() - inicio
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del productos
+    return actual / len(filas), segundos
+
+
+def main():
+    escalas = [20_000, 200_000, 1_000_000]
+    if len(sys.argv) > 1:
+        escalas = [int(escala) for escala in sys.argv[1].split(',')]
+    print(f"{'Semana':>6}{'Escala':>10}{'Anterior':>14}{'Actual':>14}{'Ahorro':>9}{'Memoria actual':>17}")
+
+    for semana in (9, 10, 11):
+        modulo = cargar_semana(semana)
+        for cantidad in escalas:
+            filas = list(generar_productos(cantidad))
+            # La Semana 10 usa IDs de texto
+            anterior, _ = medir(ANTERIORES[semana], filas, semana == 10)
+            actual, _ = medir(modulo.Producto, filas, semana == 10)
+            print(f"{semana:>6}{cantidad:>10}{anterior:>12.1f} B{actual:>12.1f} B{1 - actual / anterior:>9.0%}"
+                  f"{formatear_bytes(actual * cantidad):>17}")
+
+
+if __name__ == "__main__":
+    main()
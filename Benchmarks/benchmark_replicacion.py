@@ -0,0 +1,189 @@
+"""Retraso de una réplica de solo lectura del inventario de la Semana 11.
+
+El inventario principal vive en este proceso y publica sus cambios en un
+socket Unix; la réplica (otro proceso) los aplica a su propio inventario y
+atiende consultas por TCP, entre ellas 'replicacion', que dice cuántos
+cambios le faltan y cuánto tardó en aplicar el último. Se mide:
+
+- la copia inicial del inventario completo;
+- el retraso mientras el principal escribe a varios ritmos (muestreado cada
+  50 ms) y lo que tarda la réplica en ponerse al día al terminar;
+- una desconexión breve: la réplica continúa desde su secuencia sin copia;
+- una desconexión más larga que el historial: la réplica recibe otra copia.
+
+Al final se comprueba que la réplica tiene los mismos totales y productos.
+
+Uso: python benchmark_replicacion.py [productos] [segundos_por_ritmo]   (por defecto 100000 y 3)
+"""
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+from comun import cargar_semana, formatear_tiempo, generar_productos
+
+HOST = "127.0.0.1"
+PUERTO = 8798
+# Cambios por segundo que intenta el principal (None = tan rápido como puede)
+RITMOS = (100, 1000, None)
+# Historial pequeño para que la segunda desconexión lo supere
+HISTORIAL = 20_000
+
+
+def ejecutar_replica(ruta):
+    semana = cargar_semana(11)
+    inventario = semana.Inventario()
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        semana.servir(inventario, semana.Producto, host=HOST, puerto=PUERTO,
+                      seguidor=semana.Seguidor(inventario, semana.Producto, ruta))
+
+
+class Cliente:
+    """Conexión TCP con la réplica"""
+
+    def __init__(self, proceso):
+        while True:
+            try:
+                self.conexion = socket.create_connection((HOST, PUERTO), timeout=30)
+                break
+            except OSError:
+                if not proceso.is_alive():
+                    raise RuntimeError("La réplica terminó antes de aceptar conexiones")
+                time.sleep(0.2)
+        self.archivo = self.conexion.makefile('rwb')
+
+    def pedir(self, peticion):
+        self.archivo.write((json.dumps(peticion) + '\n').encode('utf-8'))
+        self.archivo.flush()
+        respuesta = json.loads(self.archivo.readline())
+        if not respuesta['ok']:
+            raise RuntimeError(respuesta['error'])
+        return respuesta['resultado']
+
+    def esperar(self, secuencia, copias=0, limite=600.0):
+        """Espera a que la réplica aplique hasta secuencia (y haya recibido al menos
+        copias copias completas); devuelve los segundos que tardó"""
+        inicio = time.perf_counter()
+        while True:
+            estado = self.pedir({'op': 'replicacion'})
+            if estado['secuencia'] >= secuencia and estado['copias'] >= copias:
+                return time.perf_counter() - inicio
+            if time.perf_counter() - inicio > limite:
+                raise RuntimeError(f"La réplica no llegó a la secuencia {secuencia}")
+            time.sleep(0.01)
+
+    def cerrar(self):
+        self.archivo.close()
+        self.conexion.close()
+
+
+def escribir(inventario, aleatorio, maximo, cantidad):
+    for _ in range(cantidad):
+        id = aleatorio.randint(1, maximo)
+        if aleatorio.random() < 0.9:
+            inventario.actualizar_producto(id, cantidad=aleatorio.randrange(500))
+        else:
+            inventario.actualizar_producto(id, precio=round(aleatorio.uniform(1, 2000), 2))
+
+
+def medir_ritmo(inventario, cliente, aleatorio, productos, ritmo, segundos):
+    """Escribe al ritmo dado; devuelve cambios, retrasos y pendientes muestreados y la puesta al día"""
+    retrasos, pendientes = [], []
+    # El retraso es el del último cambio aplicado: hasta que llega uno de
+    # esta tanda sería el de la anterior (o el de la copia)
+    aplicados = cliente.pedir({'op': 'replicacion'})['aplicados']
+    inicio = time.perf_counter()
+    siguiente_muestra = inicio
+    escritos = 0
+    while (ahora := time.perf_counter()) - inicio < segundos:
+        objetivo = int((ahora - inicio) * ritmo) if ritmo else escritos + 100
+        escribir(inventario, aleatorio, productos, objetivo - escritos)
+        escritos = max(escritos, objetivo)
+        if ahora >= siguiente_muestra:
+            estado = cliente.pedir({'op': 'replicacion'})
+            if estado['aplicados'] > aplicados:
+                retrasos.append(estado['retraso_segundos'])
+            pendientes.append(inventario._flujo_cambios.ultima - estado['secuencia'])
+            siguiente_muestra = ahora + 0.05
+        if ritmo:
+            time.sleep(0.001)
+    puesta_al_dia = cliente.esperar(inventario._flujo_cambios.ultima)
+    return escritos, retrasos, pendientes, puesta_al_dia
+
+
+def percentil(valores, fraccion):
+    return sorted(valores)[min(len(valores) - 1, int(len(valores) * fraccion))] if valores else 0.0
+
+
+def main():
+    productos = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    semana = cargar_semana(11)
+    inventario = semana.Inventario()
+    inventario._añadir_lote([semana.Producto(*fila) for fila in generar_productos(productos)])
+    flujo = semana.FlujoCambios(HISTORIAL)
+    inventario.publicar_cambios(flujo)
+    aleatorio = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "inventario.sock")
+        publicador = semana.PublicadorCambios(inventario, flujo, ruta)
+        publicador.iniciar()
+        replica = multiprocessing.Process(target=ejecutar_replica, args=(ruta,), daemon=True)
+        inicio = time.perf_counter()
+        replica.start()
+        try:
+            cliente = Cliente(replica)
+            cliente.esperar(flujo.ultima, copias=1)
+            print(f"{productos} productos, {os.cpu_count()} núcleo(s)")
+            print(f"Copia inicial (arranque de la réplica incluido): {time.perf_counter() - inicio:.2f}s\n")
+
+            print(f"{'Ritmo':>10}{'Cambios/s':>11}{'Retraso p50':>13}{'p99':>10}{'máx':>10}"
+                  f"{'Pendientes p99':>16}{'Al día en':>11}")
+            for ritmo in RITMOS:
+                escritos, retrasos, pendientes, puesta_al_dia = medir_ritmo(
+                    inventario, cliente, aleatorio, productos, ritmo, segundos)
+                print(f"{ritmo or 'máximo':>10}{escritos / segundos:>11.0f}"
+                      f"{formatear_tiempo(statistics.median(retrasos) if retrasos else 0):>13}"
+                      f"{formatear_tiempo(percentil(retrasos, 0.99)):>10}"
+                      f"{formatear_tiempo(max(retrasos, default=0)):>10}"
+                      f"{percentil(pendientes, 0.99):>16}{formatear_tiempo(puesta_al_dia):>11}")
+
+            print()
+            for nombre, cambios in (("Desconexión breve", HISTORIAL // 4), ("Desconexión larga", HISTORIAL * 2)):
+                copias = cliente.pedir({'op': 'replicacion'})['copias']
+                publicador.detener()
+                escribir(inventario, aleatorio, productos, cambios)
+                publicador.iniciar()
+                segundos_al_dia = cliente.esperar(flujo.ultima)
+                estado = cliente.pedir({'op': 'replicacion'})
+                print(f"{nombre} ({cambios} cambios): al día en {formatear_tiempo(segundos_al_dia)}, "
+                      f"{estado['reconexiones']} reconexión(es), "
+                      f"{'con' if estado['copias'] > copias else 'sin'} copia completa")
+
+            principal = inventario.resumen()
+            en_replica = cliente.pedir({'op': 'resumen'})
+            valor_principal = principal.pop('valor_total')
+            valor_replica = en_replica.pop('valor_total')
+            muestra = random.Random(2).sample(range(1, productos + 1), 1000)
+            distintos = [id for id in muestra
+                         if cliente.pedir({'op': 'obtener', 'id': id}) != inventario.obtener_producto_por_id(id).to_dict()]
+            if principal != en_replica or not math.isclose(valor_principal, valor_replica) or distintos:
+                raise RuntimeError(f"La réplica no coincide con el principal ({len(distintos)} productos distintos)")
+            print("La réplica coincide con el principal")
+            cliente.cerrar()
+        finally:
+            publicador.detener()
+            replica.terminate()
+            replica.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Generador de carga para el servidor de inventario de la Semana 11.
+
+Arranca el servidor en otro proceso con un inventario generado y mide
+peticiones por segundo y latencia (p50/p99) con 1, 64 y 1024 conexiones
+simultáneas. La mezcla es de un 90% de lecturas (por ID, por nombre y por
+rango de precio) y un 10% de actualizaciones. Con profundidad > 1 cada
+conexión envía varias peticiones seguidas antes de leer las respuestas.
+
+Uso: python benchmark_servidor.py [productos] [segundos_por_nivel] [profundidad]
+     (por defecto 100000, 5 y 1)
+"""
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+
+from comun import cargar_semana, generar_productos
+
+CONEXIONES = (1, 64, 1024)
+HOST = "127.0.0.1"
+PUERTO = 8799
+
+
+def ejecutar_servidor(productos, archivo):
+    semana = cargar_semana(11)
+    inventario = semana.Inventario()
+    inventario._añadir_lote([semana.Producto(*fila) for fila in generar_productos(productos)])
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        semana.servir(inventario, semana.Producto,
+                      guardar=lambda: inventario.guardar_a_archivo(archivo, compacto=True),
+                      host=HOST, puerto=PUERTO, intervalo_guardado=2.0)
+
+
+def esperar_servidor(proceso):
+    """Espera a que el servidor acepte conexiones"""
+    while proceso.is_alive():
+        try:
+            socket.create_connection((HOST, PUERTO), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("El servidor terminó antes de aceptar conexiones")
+
+
+def generar_peticion(aleatorio, productos):
+    tirada = aleatorio.random()
+    id = aleatorio.randint(1, productos)
+    if tirada < 0.6:
+        return {'op': 'obtener', 'id': id}
+    if tirada < 0.8:
+        return {'op': 'buscar', 'nombre': f"modelo {aleatorio.randrange(1000)}", 'limite': 10}
+    if tirada < 0.9:
+        minimo = aleatorio.uniform(1, 1990)
+        return {'op': 'rango_precio', 'minimo': minimo, 'maximo': minimo + 5, 'limite': 10}
+    return {'op': 'actualizar', 'id': id, 'cantidad': aleatorio.randrange(500)}
+
+
+async def cliente(numero, productos, fin, profundidad, latencias, errores):
+    aleatorio = random.Random(numero)
+    lector, escritor = await asyncio.open_connection(HOST, PUERTO, limit=1024 * 1024)
+    try:
+        while time.perf_counter() < fin:
+            envios = []
+            for _ in range(profundidad):
+                escritor.write((json.dumps(generar_peticion(aleatorio, productos)) + '\n').encode())
+                envios.append(time.perf_counter())
+            await escritor.drain()
+            for enviado in envios:
+                respuesta = json.loads(await lector.readline())
+                latencias.append(time.perf_counter() - enviado)
+                if not respuesta['ok']:
+                    errores.append(respuesta['error'])
+    finally:
+        escritor.close()
+
+
+async def medir(conexiones, productos, segundos, profundidad):
+    latencias, errores = [], []
+    fin = time.perf_counter() + segundos
+    comienzo = time.perf_counter()
+    await asyncio.gather(*(cliente(numero, productos, fin, profundidad, latencias, errores)
+                           for numero in range(conexiones)))
+    duracion = time.perf_counter() - comienzo
+    latencias.sort()
+    return (len(latencias) / duracion, latencias[len(latencias) // 2] * 1000,
+            latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))] * 1000, len(errores))
+
+
+def main():
+    productos = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    profundidad = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    with tempfile.TemporaryDirectory() as directorio:
+        proceso = multiprocessing.Process(target=ejecutar_servidor,
+                                          args=(productos, os.path.join(directorio, "inventario.json")))
+        proceso.start()
+        try:
+            esperar_servidor(proceso)
+            print(f"Servidor con {productos} productos; {segundos:g}s por nivel, profundidad {profundidad}")
+            print(f"{'Conexiones':>10}{'Peticiones/s':>14}{'p50 (ms)':>10}{'p99 (ms)':>10}{'Errores':>9}")
+            for conexiones in CONEXIONES:
+                por_segundo, p50, p99, errores = asyncio.run(medir(conexiones, productos, segundos, profundidad))
+                print(f"{conexiones:>10}{por_segundo:>14,.0f}{p50:>10.2f}{p99:>10.2f}{errores:>9}")
+        finally:
+            proceso.terminate()
+            proceso.join()
+
+
+if __name__ == "__main__":
+    main()
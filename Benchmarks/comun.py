@@ -0,0 +1,94 @@
+import importlib.util
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Programa principal de cada semana que tiene un inventario
+PROGRAMAS = {
+    9: ("Semana 9", "Sistema de Gestión de Inventarios.py"),
+    10: ("Semana 10", "Sistema de Gestión de Inventarios Mejorado.py"),
+    11: ("Semana 11", "Sistema Avanzado de Gestión de Inventario.py"),
+}
+
+_cargados = {}
+
+
+def cargar_semana(numero):
+    """Importa el programa de una semana (sus nombres tienen espacios y tildes).
+
+    La carpeta se añade a sys.path para que el programa encuentre sus módulos
+    auxiliares. Antes se retiran de sys.modules los módulos del mismo nombre
+    que otra semana haya cargado, para que dos semanas no se mezclen; los de
+    esta semana se quedan registrados, porque pickle (p. ej. para enviar una
+    función a un ProcessPoolExecutor) los busca por su nombre.
+    """
+    if numero in _cargados:
+        return _cargados[numero]
+
+    carpeta, archivo = PROGRAMAS[numero]
+    ruta_carpeta = os.path.join(RAIZ, carpeta)
+    for nombre_archivo in os.listdir(ruta_carpeta):
+        nombre, extension = os.path.splitext(nombre_archivo)
+        previo = sys.modules.get(nombre) if extension == '.py' else None
+        ruta_previo = getattr(previo, '__file__', None) or ''
+        if previo is not None and os.path.dirname(os.path.abspath(ruta_previo)) != ruta_carpeta:
+            del sys.modules[nombre]
+
+    sys.path.insert(0, ruta_carpeta)
+    try:
+        spec = importlib.util.spec_from_file_location(f"semana_{numero}", os.path.join(ruta_carpeta, archivo))
+        modulo = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = modulo
+        spec.loader.exec_module(modulo)
+    finally:
+        sys.path.remove(ruta_carpeta)
+
+    _cargados[numero] = modulo
+    return modulo
+
+
+def generar_productos(cantidad, semilla=42):
+    """Genera tuplas (id, nombre, cantidad, precio) reproducibles"""
+    aleatorio = random.Random(semilla)
+    categorias = ["Cámara", "Impresora", "Teclado", "Monitor", "Silla", "Mesa", "Lámpara", "Cable"]
+    for indice in range(1, cantidad + 1):
+        nombre = f"{aleatorio.choice(categorias)} modelo {aleatorio.randrange(100000)}"
+        yield indice, nombre, aleatorio.randrange(0, 500), round(aleatorio.uniform(1, 2000), 2)
+
+
+def cronometrar(funcion, *args, **kwargs):
+    """Ejecuta la función y devuelve (segundos, resultado)"""
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return time.perf_counter() - inicio, resultado
+
+
+def pico_memoria(funcion, *args, **kwargs):
+    """Ejecuta la función bajo tracemalloc y devuelve el pico de memoria en bytes"""
+    tracemalloc.start()
+    try:
+        funcion(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def formatear_bytes(cantidad):
+    """Devuelve un tamaño legible (KiB, MiB, ...)"""
+    for unidad in ("B", "KiB", "MiB", "GiB"):
+        if cantidad < 1024 or unidad == "GiB":
+            return f"{cantidad:.1f} {unidad}"
+        cantidad /= 1024
+
+
+def formatear_tiempo(segundos):
+    """Devuelve una duración legible (µs, ms o s)"""
+    if segundos < 1e-3:
+        return f"{segundos * 1e6:.1f} µs"
+    if segundos < 1:
+        return f"{segundos * 1e3:.1f} ms"
+    return f"{segundos:.2f} s"
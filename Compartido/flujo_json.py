@@ -0,0 +1,198 @@
+import codecs
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+
+# Tamaño de cada lectura del archivo (1 MiB)
+TAM_BLOQUE = 1024 * 1024
+# Tamaño máximo de un registro; por encima se considera que el archivo está dañado
+TAM_MAXIMO_REGISTRO = 64 * 1024 * 1024
+# Tamaño del búfer de escritura (1 MiB)
+TAM_BUFFER_ESCRITURA = 1024 * 1024
+# Elementos que se serializan juntos en cada escritura
+TAM_LOTE_ESCRITURA = 1000
+# Archivos a partir de este tamaño muestran el progreso de la carga
+TAM_MINIMO_PROGRESO = 64 * 1024 * 1024
+
+_ESPACIOS = re.compile(r'[ \t\n\r]*')
+_CARACTERES_NUMERO = '0123456789.eE+-'
+
+
+class ArchivoVacioError(ValueError):
+    """El archivo no contiene nada más que espacios en blanco"""
+
+
+class _LectorIncremental:
+    """Texto de un archivo UTF-8 leído por bloques, con la posición de análisis actual"""
+
+    def __init__(self, archivo, total, tam_bloque, progreso):
+        self.archivo = archivo
+        self.total = total
+        self.tam_bloque = tam_bloque
+        self.progreso = progreso
+        self.decodificador = codecs.getincrementaldecoder('utf-8')()
+        self.texto = ''
+        self.pos = 0
+        self.leidos = 0
+        self.fin_archivo = False
+
+    def leer_mas(self):
+        """Añade otro bloque al texto pendiente; devuelve False al final del archivo"""
+        if self.fin_archivo:
+            return False
+        bloque = self.archivo.read(self.tam_bloque)
+        self.leidos += len(bloque)
+        if not bloque:
+            self.fin_archivo = True
+        # Se descarta lo ya analizado para que la memoria no crezca con el archivo
+        self.texto = self.texto[self.pos:] + self.decodificador.decode(bloque, final=not bloque)
+        self.pos = 0
+        if self.progreso is not None:
+            self.progreso(self.leidos, self.total)
+        return True
+
+    def siguiente_caracter(self):
+        """Salta los espacios y devuelve el siguiente carácter ('' al final del archivo)"""
+        while True:
+            self.pos = _ESPACIOS.match(self.texto, self.pos).end()
+            if self.pos < len(self.texto):
+                return self.texto[self.pos]
+            if not self.leer_mas():
+                return ''
+
+    def error(self, mensaje):
+        return json.JSONDecodeError(mensaje, self.texto, self.pos)
+
+
+def _resto_numerico(texto, inicio):
+    """Indica si todo el texto desde inicio podría ser la continuación de un número"""
+    for indice in range(inicio, len(texto)):
+        if texto[indice] not in _CARACTERES_NUMERO:
+            return False
+    return True
+
+
+def leer_arreglo_json(ruta, tam_bloque=TAM_BLOQUE, progreso=None):
+    """Recorre uno a uno los elementos del arreglo JSON de nivel superior de un archivo.
+
+    Solo se mantiene en memoria el bloque que se está analizando. Lanza
+    ArchivoVacioError si el archivo está vacío y json.JSONDecodeError si
+    el contenido no es un arreglo JSON válido.
+    """
+    decodificador = json.JSONDecoder()
+    total = os.path.getsize(ruta)
+
+    with open(ruta, 'rb') as archivo:
+        lector = _LectorIncremental(archivo, total, tam_bloque, progreso)
+
+        caracter = lector.siguiente_caracter()
+        if not caracter:
+            raise ArchivoVacioError("El archivo está vacío")
+        if caracter != '[':
+            raise lector.error("Se esperaba '[' al inicio del archivo")
+        lector.pos += 1
+
+        caracter = lector.siguiente_caracter()
+        if caracter == ']':
+            lector.pos += 1
+        else:
+            while True:
+                try:
+                    elemento, fin = decodificador.raw_decode(lector.texto, lector.pos)
+                except json.JSONDecodeError:
+                    # El elemento puede estar cortado al final del bloque
+                    if len(lector.texto) - lector.pos > TAM_MAXIMO_REGISTRO or not lector.leer_mas():
+                        raise
+                    continue
+
+                # Un número al final del bloque podría continuar en el siguiente
+                if (not lector.fin_archivo and _resto_numerico(lector.texto, fin)
+                        and len(lector.texto) - lector.pos <= TAM_MAXIMO_REGISTRO):
+                    lector.leer_mas()
+                    continue
+
+                lector.pos = fin
+                yield elemento
+
+                caracter = lector.siguiente_caracter()
+                if caracter == ',':
+                    lector.pos += 1
+                    lector.siguiente_caracter()
+                elif caracter == ']':
+                    lector.pos += 1
+                    break
+                else:
+                    raise lector.error("Se esperaba ',' o ']'")
+
+        if lector.siguiente_caracter():
+            raise lector.error("Datos adicionales después del arreglo")
+
+
+def escribir_arreglo_json(ruta, elementos, compacto=False, tam_buffer=TAM_BUFFER_ESCRITURA):
+    """Escribe los elementos como un arreglo JSON sin construir el texto completo.
+
+    Con compacto=False el resultado es idéntico al de json.dump(indent=2);
+    con compacto=True cada elemento ocupa una línea sin sangría. Se escribe
+    en un archivo temporal que luego reemplaza al destino de forma atómica,
+    así que un fallo a mitad de escritura nunca deja el archivo a medias.
+    """
+    if compacto:
+        codificador = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    else:
+        codificador = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+    # Nombre único por proceso e hilo para que dos escrituras no compartan temporal
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    elementos = iter(elementos)
+    try:
+        with open(temporal, 'w', encoding='utf-8', buffering=tam_buffer) as archivo:
+            archivo.write('[')
+            primero = True
+            # Se serializa por lotes pequeños: la memoria no depende del total y
+            # se evita el coste de llamar al codificador una vez por elemento
+            while True:
+                lote = list(itertools.islice(elementos, TAM_LOTE_ESCRITURA))
+                if not lote:
+                    break
+                if compacto:
+                    texto = ',\n'.join(map(codificador.encode, lote))
+                    archivo.write('\n' if primero else ',\n')
+                else:
+                    # '[\n  {...},\n  {...}\n]' sin los corchetes ni el salto final
+                    texto = codificador.encode(lote)[1:-2]
+                    if not primero:
+                        archivo.write(',')
+                archivo.write(texto)
+                primero = False
+            archivo.write(']' if primero else '\n]')
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def indicador_progreso(mensaje="Cargando", tam_minimo=TAM_MINIMO_PROGRESO, paso=5):
+    """Crea una función de progreso que muestra el porcentaje leído en la consola.
+
+    Para archivos menores que tam_minimo no muestra nada.
+    """
+    ultimo = [-paso]
+
+    def informar(leidos, total):
+        if total < tam_minimo:
+            return
+        porcentaje = int(leidos * 100 / total) if total else 100
+        if porcentaje - ultimo[0] >= paso or (porcentaje == 100 and ultimo[0] != 100):
+            ultimo[0] = porcentaje
+            sys.stdout.write(f"\r {mensaje}... {porcentaje}% ({leidos // (1024 * 1024)} MiB)")
+            if porcentaje == 100:
+                sys.stdout.write("\n")
+            sys.stdout.flush()
+
+    return informar
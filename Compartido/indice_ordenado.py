@@ -0,0 +1,171 @@
+import bisect
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+# Claves por bloque de IndiceOrdenado (un bloque se parte al llegar al doble)
+TAM_BLOQUE_ORDENADO = 1000
+
+
+class _MayorQueTodo:
+    """Valor que se ordena después de cualquier otro (para cotas superiores)"""
+
+    def __lt__(self, otro):
+        return False
+
+    def __gt__(self, otro):
+        return True
+
+
+_MAYOR_QUE_TODO = _MayorQueTodo()
+
+
+class IndiceOrdenado:
+    """Índice secundario ordenado por un valor numérico, con el ID como desempate.
+
+    Las claves (valor, id) se reparten en bloques ordenados de unos
+    TAM_BLOQUE_ORDENADO elementos, con el máximo de cada bloque aparte: una
+    inserción o un borrado busca el bloque con bisect y solo desplaza los
+    elementos de ese bloque, O(log N + TAM_BLOQUE_ORDENADO) en lugar de
+    O(N) en una única lista. Una consulta por rango cuesta
+    O(log N + N / TAM_BLOQUE_ORDENADO + k).
+    """
+
+    def __init__(self):
+        self._bloques: List[List[Tuple[float, Hashable]]] = []
+        # Última (mayor) clave de cada bloque
+        self._maximos: List[Tuple[float, Hashable]] = []
+        self._valores: Dict[Hashable, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._valores)
+
+    def añadir(self, id: Hashable, valor: float) -> None:
+        self._valores[id] = valor
+        clave = (valor, id)
+        if not self._bloques:
+            self._bloques.append([clave])
+            self._maximos.append(clave)
+            return
+        # Una clave mayor que todas va al último bloque
+        numero = min(bisect.bisect_left(self._maximos, clave), len(self._bloques) - 1)
+        bloque = self._bloques[numero]
+        bisect.insort(bloque, clave)
+        self._maximos[numero] = bloque[-1]
+        if len(bloque) >= 2 * TAM_BLOQUE_ORDENADO:
+            # El bloque se parte en dos mitades
+            mitad = bloque[TAM_BLOQUE_ORDENADO:]
+            del bloque[TAM_BLOQUE_ORDENADO:]
+            self._bloques.insert(numero + 1, mitad)
+            self._maximos[numero] = bloque[-1]
+            self._maximos.insert(numero + 1, mitad[-1])
+
+    def añadir_lote(self, pares: Iterable[Tuple[Hashable, float]]) -> None:
+        """Añade varios (id, valor) ordenando una sola vez en lugar de insertar uno a uno"""
+        pares = list(pares)
+        if len(pares) * 10 < len(self._valores):
+            # Frente a un índice mucho mayor, rehacer todos los bloques costaría más
+            # que insertar cada clave en el suyo
+            for id, valor in pares:
+                self.añadir(id, valor)
+            return
+        nuevas = []
+        for id, valor in pares:
+            self._valores[id] = valor
+            nuevas.append((valor, id))
+        nuevas.sort()
+        # Dos tramos ya ordenados: sort() los fusiona en tiempo lineal
+        claves = [clave for bloque in self._bloques for clave in bloque]
+        claves.extend(nuevas)
+        claves.sort()
+        self._bloques = [claves[inicio:inicio + TAM_BLOQUE_ORDENADO]
+                         for inicio in range(0, len(claves), TAM_BLOQUE_ORDENADO)]
+        self._maximos = [bloque[-1] for bloque in self._bloques]
+
+    def eliminar(self, id: Hashable) -> None:
+        if id in self._valores:
+            clave = (self._valores.pop(id), id)
+            numero = bisect.bisect_left(self._maximos, clave)
+            bloque = self._bloques[numero]
+            del bloque[bisect.bisect_left(bloque, clave)]
+            if bloque:
+                self._maximos[numero] = bloque[-1]
+            else:
+                del self._bloques[numero]
+                del self._maximos[numero]
+
+    def actualizar(self, id: Hashable, valor: float) -> None:
+        self.eliminar(id)
+        self.añadir(id, valor)
+
+    def _posicion_izquierda(self, clave: Tuple) -> int:
+        """Posición global de bisect_left(clave) sobre todas las claves"""
+        numero = bisect.bisect_left(self._maximos, clave)
+        anteriores = sum(len(bloque) for bloque in self._bloques[:numero])
+        if numero == len(self._bloques):
+            return anteriores
+        return anteriores + bisect.bisect_left(self._bloques[numero], clave)
+
+    def _posicion_derecha(self, clave: Tuple) -> int:
+        """Posición global de bisect_right(clave) sobre todas las claves"""
+        numero = bisect.bisect_right(self._maximos, clave)
+        anteriores = sum(len(bloque) for bloque in self._bloques[:numero])
+        if numero == len(self._bloques):
+            return anteriores
+        return anteriores + bisect.bisect_right(self._bloques[numero], clave)
+
+    def _tramo(self, inicio: int, fin: int, descendente: bool) -> Iterator[Tuple]:
+        """Recorre las claves con posición global en [inicio, fin), en orden o al revés"""
+        restantes = fin - inicio
+        if restantes <= 0:
+            return
+        # Bloque y posición dentro del bloque del primer elemento que se devuelve
+        posicion = fin - 1 if descendente else inicio
+        numero = 0
+        while posicion >= len(self._bloques[numero]):
+            posicion -= len(self._bloques[numero])
+            numero += 1
+        while restantes > 0:
+            bloque = self._bloques[numero]
+            if descendente:
+                trozo = bloque[max(0, posicion - restantes + 1):posicion + 1]
+                yield from reversed(trozo)
+                numero -= 1
+                posicion = len(self._bloques[numero]) - 1 if numero >= 0 else 0
+            else:
+                trozo = bloque[posicion:posicion + restantes]
+                yield from trozo
+                numero += 1
+                posicion = 0
+            restantes -= len(trozo)
+
+    def rango(self, minimo: Optional[float] = None, maximo: Optional[float] = None,
+              limite: Optional[int] = None, desplazamiento: int = 0,
+              descendente: bool = False) -> Iterator[Hashable]:
+        """Recorre en orden los IDs con minimo <= valor <= maximo (extremos opcionales)"""
+        inicio = 0 if minimo is None else self._posicion_izquierda((minimo,))
+        fin = len(self) if maximo is None else self._posicion_derecha((maximo, _MAYOR_QUE_TODO))
+
+        if descendente:
+            fin -= desplazamiento
+            if limite is not None:
+                inicio = max(inicio, fin - limite)
+        else:
+            inicio += desplazamiento
+            if limite is not None:
+                fin = min(fin, inicio + limite)
+
+        return (clave[1] for clave in self._tramo(inicio, fin, descendente))
+
+    def siguientes(self, cursor: Optional[Tuple] = None, limite: Optional[int] = None,
+                   descendente: bool = False) -> Iterator[Tuple]:
+        """Recorre en orden las claves (valor, id) posteriores a cursor (anteriores si descendente).
+
+        El cursor es la última clave ya recorrida, de modo que la siguiente
+        página continúa donde quedó la anterior aunque haya cambios entre medias.
+        """
+        if descendente:
+            fin = len(self) if cursor is None else self._posicion_izquierda(cursor)
+            inicio = 0 if limite is None else max(0, fin - limite)
+        else:
+            inicio = 0 if cursor is None else self._posicion_derecha(cursor)
+            fin = len(self) if limite is None else min(len(self), inicio + limite)
+        return self._tramo(inicio, fin, descendente)
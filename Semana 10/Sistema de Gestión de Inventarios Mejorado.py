@@ -1,44 +1,168 @@
+import contextlib
+import gc
 import os
+import heapq
 import json
+import math
+import random
+import sys
+import threading
+import time
 from datetime import datetime
 
+# Los módulos comunes a varias semanas (flujo_json, indice_ordenado) están en la carpeta Compartido
+_COMPARTIDO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Compartido")
+if _COMPARTIDO not in sys.path:
+    sys.path.append(_COMPARTIDO)
+
+from bloqueo import BloqueoArchivo
+from cache_binaria import CacheBinaria
+from diario import DiarioCambios
+from historial import HistorialMovimientos
+from flujo_json import ArchivoVacioError, escribir_arreglo_json, indicador_progreso, leer_arreglo_json
+from indice_ordenado import IndiceOrdenado
+
+# Si es True, cada cambio se anexa a un diario en lugar de reescribir todo el archivo
+MODO_DIARIO = False
+# Segundos entre guardados automáticos (None = guardar tras cada operación)
+INTERVALO_AUTOGUARDADO = None
+# Si es True, varias sesiones pueden usar el mismo archivo sin pisarse los cambios
+MODO_COMPARTIDO = False
+# Veces que se duplica, como mucho, la espera antes de reintentar un guardado
+# compartido que chocó con el de otro proceso
+MAX_DUPLICACIONES_ESPERA = 6
+# Si es True, cada cambio de cantidad queda registrado con su fecha en '<archivo>.movimientos'
+MODO_HISTORIAL = False
+# Si es True, el inventario se carga de una copia binaria ('<archivo>.cache') cuando el archivo no cambió
+MODO_CACHE = False
+# Productos por página al listar el inventario
+TAM_PAGINA = 50
+
+# Valor por el que se ordena cada listado; el índice ordenado desempata por ID,
+# así la clave del último producto de una página sirve de cursor para la siguiente
+CLAVES_ORDEN = {
+    'id': lambda producto: producto.id,
+    'nombre': lambda producto: producto.nombre.lower(),
+    'precio': lambda producto: producto.precio,
+    'cantidad': lambda producto: producto.cantidad,
+}
+
 
 class Producto:
     """Clase que representa un producto en el inventario"""
 
-    def __init__(self, id, nombre, cantidad, precio):
+    # Sin __dict__ por instancia: con catálogos grandes es la mayor parte de la memoria
+    __slots__ = ('id', 'nombre', 'cantidad', 'precio', 'umbral_reorden')
+
+    def __init__(self, id, nombre, cantidad, precio, umbral_reorden=None):
         self.id = id
         self.nombre = nombre
         self.cantidad = cantidad
         self.precio = precio
+        # Cantidad por debajo de la cual hay que reponer (None = umbral general del inventario)
+        self.umbral_reorden = umbral_reorden
 
     def __str__(self):
         return f"ID: {self.id}, Nombre: {self.nombre}, Cantidad: {self.cantidad}, Precio: ${self.precio:.2f}"
 
     def to_dict(self):
         """Convierte el producto a un diccionario para serialización"""
-        return {
+        datos = {
             'id': self.id,
             'nombre': self.nombre,
             'cantidad': self.cantidad,
             'precio': self.precio
         }
+        if self.umbral_reorden is not None:
+            datos['umbral_reorden'] = self.umbral_reorden
+        return datos
 
     @classmethod
     def from_dict(cls, data):
         """Crea un producto desde un diccionario"""
-        return cls(data['id'], data['nombre'], data['cantidad'], data['precio'])
+        return cls(data['id'], data['nombre'], data['cantidad'], data['precio'], data.get('umbral_reorden'))
 
 
 class Inventario:
     """Clase que gestiona el inventario de productos con persistencia en archivo"""
 
-    def __init__(self, archivo='inventario.txt'):
+    def __init__(self, archivo='inventario.txt', diario=False, umbral_compactacion=1024 * 1024,
+                 autoguardado=None, compacto=False, umbral_stock_bajo=5, al_cruzar_umbral=None,
+                 compartido=False, historial=False, cache=False):
+        if compartido and diario:
+            raise ValueError("El modo compartido no admite el diario de cambios")
         self.archivo = archivo
+        # Formato compacto: un producto por línea y sin sangría
+        self.compacto = compacto
         self.productos = {}
+        # Agregados que se mantienen con cada cambio en lugar de recorrer el inventario.
+        # umbral_stock_bajo es el umbral de reorden de los productos que no tienen uno propio
+        self.umbral_stock_bajo = umbral_stock_bajo
+        self._unidades = 0
+        self._valor_total = 0.0
+        self._bajo_stock = 0
+        # Montículo de alertas de los productos bajo su umbral, el más urgente primero.
+        # Las entradas que ya no están en _alertas quedaron obsoletas y se descartan al salir
+        self._monticulo_alertas = []
+        self._alertas = {}
+        self._contador_alertas = 0
+        # Índices ordenados de los listados, creados al pedir cada orden por primera
+        # vez y mantenidos con cada alta, baja o modificación
+        self._indices_orden = {}
+        # Función llamada como al_cruzar_umbral(producto, bajo_umbral) cuando un producto
+        # pasa a estar por debajo de su umbral o vuelve a superarlo
+        self.al_cruzar_umbral = al_cruzar_umbral
+        # False mientras se carga o recarga el archivo: esos cambios no cruzan
+        # umbrales ni son movimientos de stock
+        self._cambios_en_vivo = False
+        # En modo diario los cambios se anexan a '<archivo>.diario' y el archivo
+        # principal solo se reescribe al compactar o al guardar manualmente
+        self.diario = DiarioCambios(archivo + '.diario') if diario else None
+        self.umbral_compactacion = umbral_compactacion
+        self._cerrojo = threading.RLock()
+        self._cerrojo_instantanea = threading.Lock()
+        # Numeración de las copias del estado, para no pisar una escritura más reciente
+        self._numero_copia = 0
+        self._numero_escrito = 0
+        self._hilo_compactacion = None
+        # Autoguardado: los cambios solo marcan el inventario como modificado y un
+        # hilo en segundo plano lo guarda como mucho una vez por intervalo
+        self.autoguardado = autoguardado
+        self._sucio = False
+        self._detener_autoguardado = threading.Event()
+        self._hilo_autoguardado = None
+        # Modo compartido: cada guardado comprueba la versión del archivo y, si otro
+        # proceso guardó antes, recarga el archivo y vuelve a aplicar encima los
+        # cambios propios que aún no se han guardado (_pendientes)
+        self.bloqueo = BloqueoArchivo(archivo) if compartido else None
+        # Historial de movimientos de stock para consultar la cantidad en una fecha
+        self.historial = HistorialMovimientos(archivo + '.movimientos') if historial else None
+        # Copia binaria del archivo para arrancar sin volver a analizar el JSON
+        self.cache = CacheBinaria(archivo) if cache else None
+        self._version = 0
+        self._pendientes = []
         self.cargar_inventario()
+        self._cambios_en_vivo = True
+        if self.autoguardado is not None:
+            self._hilo_autoguardado = threading.Thread(target=self._bucle_autoguardado,
+                                                       name='autoguardado', daemon=True)
+            self._hilo_autoguardado.start()
 
     def cargar_inventario(self):
+        """Carga el inventario desde el archivo y, en modo diario, reaplica los cambios registrados"""
+        if self.diario is None:
+            if self.bloqueo is not None:
+                self._version = self.bloqueo.version()
+            self._cargar_instantanea()
+            return
+
+        # Sin instantánea todavía: todo el estado está en el diario
+        if os.path.exists(self.archivo) or not (os.path.exists(self.diario.ruta)
+                                                or os.path.exists(self.diario.ruta_compactando)):
+            self._cargar_instantanea()
+        self._reproducir_diario()
+
+    def _cargar_instantanea(self):
         """Carga el inventario desde el archivo, manejando posibles excepciones"""
         try:
             # Verificar si el archivo existe
@@ -51,28 +175,46 @@ class Inventario:
             if not os.access(self.archivo, os.R_OK):
                 raise PermissionError("No se tienen permisos de lectura para el archivo")
 
-            with open(self.archivo, 'r', encoding='utf-8') as file:
-                contenido = file.read().strip()
-
-                # Manejar archivo vacío
-                if not contenido:
-                    print("Archivo de inventario está vacío.")
-                    return
-
-                try:
-                    datos = json.loads(contenido)
-                    for producto_data in datos:
-                        producto = Producto.from_dict(producto_data)
-                        self.productos[producto.id] = producto
-
-                    print(f" Inventario cargado exitosamente desde {self.archivo}")
+            firma = None
+            if self.cache is not None:
+                columnas = self.cache.leer()
+                if columnas is not None:
+                    self._cargar_productos(map(Producto, *columnas))
+                    print(f" Inventario cargado exitosamente desde {self.archivo} (caché)")
                     print(f" Productos cargados: {len(self.productos)}")
+                    return
+                # La firma se toma antes de leer: si el archivo cambia mientras
+                # tanto, no coincidirá y la caché no se usará
+                firma = self.cache.firma()
+
+            try:
+                # Los productos se crean a medida que se lee el archivo, sin
+                # tener en memoria todo el texto ni la lista de diccionarios
+                progreso = indicador_progreso("Cargando inventario")
+                for producto_data in leer_arreglo_json(self.archivo, progreso=progreso):
+                    self._insertar(Producto.from_dict(producto_data))
+
+                print(f" Inventario cargado exitosamente desde {self.archivo}")
+                print(f" Productos cargados: {len(self.productos)}")
+                if firma is not None and self._archivo_sin_cambios(firma):
+                    self.cache.escribir(firma, self._columnas())
+
+            # Manejar archivo vacío
+            except ArchivoVacioError:
+                print("Archivo de inventario está vacío.")
+                return
 
-                except json.JSONDecodeError:
-                    print("Error: El archivo de inventario está corrupto o tiene formato incorrecto")
-                    print("Se creará un nuevo archivo de inventario")
-                    self.productos = {}
-                    self.guardar_inventario()
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                # No se guarda nada aquí: el archivo dañado se aparta para poder
+                # recuperarlo a mano y, en modo diario, los cambios del diario se
+                # reaplican sobre el inventario vacío antes de cualquier compactación
+                print("Error: El archivo de inventario está corrupto o tiene formato incorrecto")
+                self._vaciar()
+                apartado = self._apartar_corrupto()
+                if apartado is not None:
+                    print(f"Se conserva una copia en {apartado}; se empieza con el inventario vacío")
+                else:
+                    print("Se empieza con el inventario vacío")
 
         except FileNotFoundError:
             print(f"Error: El archivo {self.archivo} no fue encontrado")
@@ -87,7 +229,467 @@ class Inventario:
             print(f"Error inesperado al cargar el inventario: {e}")
             print("Continuando con inventario vacío")
 
-    def guardar_inventario(self):
+    def _apartar_corrupto(self):
+        """Renombra el archivo dañado a '<archivo>.corrupto' (o .corrupto.N si ya existe) y
+        devuelve el nuevo nombre; None si no se pudo"""
+        destino = self.archivo + '.corrupto'
+        numero = 0
+        while os.path.exists(destino):
+            numero += 1
+            destino = f"{self.archivo}.corrupto.{numero}"
+        try:
+            os.replace(self.archivo, destino)
+        except OSError as e:
+            print(f"No se pudo apartar el archivo dañado: {e}")
+            return None
+        return destino
+
+    def _archivo_sin_cambios(self, firma):
+        """Indica si el archivo sigue teniendo el tamaño y la fecha de la firma"""
+        try:
+            estado = os.stat(self.archivo)
+        except OSError:
+            return False
+        return (estado.st_size, estado.st_mtime_ns) == firma[:2]
+
+    def _columnas(self):
+        """Los productos en el formato de la caché binaria: una lista por argumento de Producto"""
+        productos = self.productos.values()
+        return ([producto.id for producto in productos], [producto.nombre for producto in productos],
+                [producto.cantidad for producto in productos], [producto.precio for producto in productos],
+                [producto.umbral_reorden for producto in productos])
+
+    def _actualizar_cache(self):
+        """Deja la caché binaria al día si el estado en memoria es el del archivo.
+
+        Con el diario el archivo no incluye los últimos cambios, y con cambios
+        sin guardar (o, en modo compartido, guardados por otro proceso después)
+        tampoco coincide: en esos casos la caché se queda como está.
+        """
+        if self.cache is None or self.diario is not None or self._sucio:
+            return
+        with self._cerrojo, (self.bloqueo.bloqueado() if self.bloqueo is not None
+                             else contextlib.nullcontext()):
+            if self.bloqueo is not None and (self._pendientes or self.bloqueo.version() != self._version):
+                return
+            firma = self.cache.firma()
+            if not self.cache.vigente(firma):
+                self.cache.escribir(firma, self._columnas())
+
+    def _reproducir_diario(self):
+        """Aplica sobre la instantánea cargada los cambios registrados en el diario"""
+        aplicados = 0
+        for registro in self.diario.leer_registros():
+            if self._aplicar_registro(registro):
+                aplicados += 1
+
+        if self.diario.lineas_invalidas:
+            print(f"Aviso: se ignoraron {self.diario.lineas_invalidas} línea(s) dañadas del diario")
+        if aplicados:
+            print(f" Cambios recuperados del diario: {aplicados}")
+
+        self.diario.abrir()
+        # Una compactación interrumpida o un diario demasiado grande se resuelven ahora
+        if os.path.exists(self.diario.ruta_compactando) or self.diario.tamaño() > self.umbral_compactacion:
+            self.guardar_inventario()
+
+    def _aplicar_registro(self, registro):
+        """Aplica un registro del diario al inventario en memoria"""
+        operacion = registro.get('op')
+        if operacion == 'añadir':
+            self._insertar(Producto.from_dict(registro['producto']))
+        elif operacion == 'eliminar':
+            self._quitar(registro['id'])
+        elif operacion == 'actualizar':
+            producto = self.productos.get(registro['id'])
+            if producto is None:
+                return False
+            self._modificar(producto, registro.get('cantidad'), registro.get('precio'))
+        elif operacion == 'lote':
+            for cambio in registro['cambios']:
+                producto = self.productos.get(cambio['id'])
+                if producto is not None:
+                    self._modificar(producto, cambio.get('cantidad'), cambio.get('precio'))
+        elif operacion == 'umbral':
+            producto = self.productos.get(registro['id'])
+            if producto is None:
+                return False
+            self._cambiar_umbral(producto, registro['umbral'])
+        else:
+            return False
+        return True
+
+    def _insertar(self, producto):
+        """Añade (o reemplaza) un producto en memoria manteniendo los agregados"""
+        self._quitar(producto.id)
+        # El alta fija la cantidad de partida del producto en el historial
+        if self.historial is not None and self._cambios_en_vivo:
+            self.historial.punto(producto.id, producto.cantidad)
+        self.productos[producto.id] = producto
+        for orden, indice in self._indices_orden.items():
+            indice.añadir(producto.id, CLAVES_ORDEN[orden](producto))
+        self._sumar_agregados(producto, 1)
+        self._actualizar_alerta(producto, False)
+
+    def _cargar_productos(self, productos):
+        """Llena el inventario vacío con productos de IDs distintos.
+
+        Equivale a _insertar uno a uno, pero acumula los agregados en variables
+        locales y forma el montículo de alertas de una vez (heapify) al final.
+        El recolector de ciclos se pausa mientras tanto: los productos no forman
+        ciclos y, con millones de objetos nuevos, sus pasadas son la mayor parte
+        del tiempo.
+        """
+        general = self.umbral_stock_bajo
+        unidades = valor = bajo = 0
+        alertas = []
+        recolector = gc.isenabled()
+        gc.disable()
+        try:
+            for producto in productos:
+                self.productos[producto.id] = producto
+                cantidad = producto.cantidad
+                unidades += cantidad
+                valor += cantidad * producto.precio
+                umbral = producto.umbral_reorden if producto.umbral_reorden is not None else general
+                if cantidad < umbral:
+                    bajo += 1
+                    alertas.append((cantidad - umbral, cantidad, len(alertas) + 1, producto.id))
+        finally:
+            if recolector:
+                gc.enable()
+        # Los índices ordenados se crean de nuevo, de una vez, al pedir un listado
+        self._indices_orden = {}
+        self._unidades += unidades
+        self._valor_total += valor
+        self._bajo_stock += bajo
+        self._alertas = {entrada[-1]: entrada for entrada in alertas}
+        self._contador_alertas = len(alertas)
+        heapq.heapify(alertas)
+        self._monticulo_alertas = alertas
+
+    def _quitar(self, id):
+        """Quita un producto de memoria manteniendo los agregados"""
+        producto = self.productos.pop(id, None)
+        if producto is not None:
+            for indice in self._indices_orden.values():
+                indice.eliminar(id)
+            self._sumar_agregados(producto, -1)
+            self._alertas.pop(id, None)
+            self._registrar_movimiento(id, producto.cantidad, 0, 'eliminar')
+        return producto
+
+    def _modificar(self, producto, cantidad=None, precio=None):
+        """Cambia la cantidad y/o el precio de un producto manteniendo los agregados"""
+        estaba_bajo = self._esta_bajo_umbral(producto)
+        self._sumar_agregados(producto, -1)
+        if cantidad is not None:
+            self._registrar_movimiento(producto.id, producto.cantidad, cantidad, 'actualizar')
+            producto.cantidad = cantidad
+            if 'cantidad' in self._indices_orden:
+                self._indices_orden['cantidad'].actualizar(producto.id, cantidad)
+        if precio is not None:
+            producto.precio = precio
+            if 'precio' in self._indices_orden:
+                self._indices_orden['precio'].actualizar(producto.id, precio)
+        self._sumar_agregados(producto, 1)
+        self._actualizar_alerta(producto, estaba_bajo)
+
+    def _registrar_movimiento(self, id, anterior, nueva, motivo):
+        """Anota en el historial un cambio de cantidad hecho en esta sesión"""
+        if self.historial is not None and self._cambios_en_vivo:
+            self.historial.registrar(id, anterior, nueva, motivo)
+
+    def cantidad_en_fecha(self, id, momento):
+        """Devuelve la cantidad que tenía un producto en un momento (datetime) del pasado.
+
+        None si no hay historial del producto hasta ese momento.
+        """
+        if self.historial is None:
+            raise ValueError("El historial de movimientos no está activado")
+        with self._cerrojo:
+            return self.historial.cantidad_en(id, momento)
+
+    def _cambiar_umbral(self, producto, umbral):
+        """Cambia el umbral de reorden de un producto manteniendo los agregados"""
+        estaba_bajo = self._esta_bajo_umbral(producto)
+        self._sumar_agregados(producto, -1)
+        producto.umbral_reorden = umbral
+        self._sumar_agregados(producto, 1)
+        self._actualizar_alerta(producto, estaba_bajo)
+
+    def _vaciar(self):
+        """Deja el inventario en memoria sin productos"""
+        self.productos = {}
+        self._indices_orden = {}
+        self._unidades = 0
+        self._valor_total = 0.0
+        self._bajo_stock = 0
+        self._monticulo_alertas = []
+        self._alertas = {}
+
+    def umbral_de(self, producto):
+        """Umbral de reorden efectivo de un producto"""
+        return producto.umbral_reorden if producto.umbral_reorden is not None else self.umbral_stock_bajo
+
+    def _esta_bajo_umbral(self, producto):
+        return producto.cantidad < self.umbral_de(producto)
+
+    def _sumar_agregados(self, producto, signo):
+        """Suma (signo=1) o resta (signo=-1) la contribución de un producto a los agregados"""
+        self._unidades += signo * producto.cantidad
+        self._valor_total += signo * producto.cantidad * producto.precio
+        if self._esta_bajo_umbral(producto):
+            self._bajo_stock += signo
+
+    def _actualizar_alerta(self, producto, estaba_bajo):
+        """Pone al día la entrada del producto en el montículo y avisa si cruzó su umbral"""
+        esta_bajo = self._esta_bajo_umbral(producto)
+        if esta_bajo:
+            # Urgencia: lo que falta hasta el umbral (más negativo = más urgente)
+            self._contador_alertas += 1
+            entrada = (producto.cantidad - self.umbral_de(producto), producto.cantidad,
+                       self._contador_alertas, producto.id)
+            self._alertas[producto.id] = entrada
+            heapq.heappush(self._monticulo_alertas, entrada)
+            # Si las entradas obsoletas dominan, se reconstruye el montículo
+            if len(self._monticulo_alertas) > 2 * len(self._alertas) + 64:
+                self._monticulo_alertas = list(self._alertas.values())
+                heapq.heapify(self._monticulo_alertas)
+        else:
+            self._alertas.pop(producto.id, None)
+
+        if esta_bajo != estaba_bajo and self._cambios_en_vivo and self.al_cruzar_umbral is not None:
+            self.al_cruzar_umbral(producto, esta_bajo)
+
+    def productos_bajo_umbral(self, limite=None):
+        """Devuelve los productos por debajo de su umbral de reorden, el más urgente primero.
+
+        Cuesta O(k log N) para k productos devueltos.
+        """
+        with self._cerrojo:
+            resultado = []
+            extraidas = []
+            while self._monticulo_alertas and (limite is None or len(resultado) < limite):
+                entrada = heapq.heappop(self._monticulo_alertas)
+                # Las entradas obsoletas se descartan definitivamente
+                if self._alertas.get(entrada[-1]) is entrada:
+                    extraidas.append(entrada)
+                    resultado.append(self.productos[entrada[-1]])
+            for entrada in extraidas:
+                heapq.heappush(self._monticulo_alertas, entrada)
+            return resultado
+
+    def resumen(self):
+        """Devuelve los totales del inventario en O(1)"""
+        return {
+            'productos': len(self.productos),
+            'unidades': self._unidades,
+            'valor_total': self._valor_total,
+            'bajo_stock': self._bajo_stock,
+            'umbral_stock_bajo': self.umbral_stock_bajo,
+        }
+
+    def recalcular_resumen(self):
+        """Calcula los mismos totales que resumen() recorriendo todo el inventario"""
+        return {
+            'productos': len(self.productos),
+            'unidades': sum(producto.cantidad for producto in self.productos.values()),
+            'valor_total': math.fsum(producto.cantidad * producto.precio for producto in self.productos.values()),
+            'bajo_stock': sum(1 for producto in self.productos.values() if self._esta_bajo_umbral(producto)),
+            'umbral_stock_bajo': self.umbral_stock_bajo,
+        }
+
+    def verificar_resumen(self):
+        """Comprueba que los agregados incrementales coinciden con un recálculo completo"""
+        incremental = self.resumen()
+        completo = self.recalcular_resumen()
+        valor_incremental = incremental.pop('valor_total')
+        valor_completo = completo.pop('valor_total')
+        return incremental == completo and math.isclose(valor_incremental, valor_completo,
+                                                        rel_tol=1e-9, abs_tol=1e-6)
+
+    def _persistir(self, registro):
+        """Persiste un cambio: en modo diario lo anexa, con autoguardado lo deja
+        pendiente y si no reescribe todo el archivo"""
+        if self.diario is None:
+            if self.bloqueo is not None:
+                self._pendientes.append(registro)
+            if self.autoguardado is not None:
+                self._sucio = True
+                return True
+            return self.guardar_inventario()
+
+        try:
+            self.diario.anexar(registro)
+        except OSError as e:
+            print(f"Error al escribir en el diario: {e}")
+            return False
+
+        if self.diario.tamaño() > self.umbral_compactacion:
+            self._iniciar_compactacion()
+        return True
+
+    def _iniciar_compactacion(self):
+        """Rota el diario y escribe una instantánea nueva en un hilo en segundo plano"""
+        if self._hilo_compactacion is not None and self._hilo_compactacion.is_alive():
+            return
+
+        with self._cerrojo:
+            self.diario.rotar()
+            numero, productos = self._copiar_estado()
+
+        self._hilo_compactacion = threading.Thread(target=self._compactar,
+                                                   args=(numero, productos),
+                                                   name='compactacion-diario')
+        self._hilo_compactacion.start()
+
+    def _compactar(self, numero, productos):
+        """Escribe la instantánea de la compactación y descarta el diario rotado"""
+        try:
+            # Si un guardado completo posterior ya escribió estos cambios, no hay nada que hacer
+            if self._escribir_si_vigente(numero, productos):
+                self.diario.descartar_rotado()
+        except Exception as e:
+            print(f"Error al compactar el diario: {e}")
+
+    def _bucle_autoguardado(self):
+        """Guarda el inventario en segundo plano si hubo cambios desde el último guardado"""
+        while not self._detener_autoguardado.wait(self.autoguardado):
+            self._guardar_si_pendiente()
+
+    def _guardar_si_pendiente(self):
+        """Guarda el inventario solo si tiene cambios sin guardar"""
+        if self._sucio and not self.guardar_inventario(silencioso=True):
+            self._sucio = True
+
+    def _copiar_estado(self):
+        """Copia el estado actual para escribirlo fuera del cerrojo principal.
+
+        Debe llamarse con el cerrojo principal tomado.
+        """
+        # Basta con copiar las referencias: cualquier cambio posterior a un producto
+        # vuelve a marcar el inventario (o queda en el diario) y se guardará después
+        self._numero_copia += 1
+        return self._numero_copia, list(self.productos.values())
+
+    def _escribir_si_vigente(self, numero, productos):
+        """Escribe una copia del estado salvo que ya se haya escrito otra más reciente"""
+        with self._cerrojo_instantanea:
+            if numero <= self._numero_escrito:
+                return False
+            self._escribir_instantanea(productos)
+            self._numero_escrito = numero
+            return True
+
+    def _escribir_instantanea(self, productos):
+        """Escribe el archivo completo producto a producto y lo reemplaza de forma atómica"""
+        escribir_arreglo_json(self.archivo, (producto.to_dict() for producto in productos),
+                              compacto=self.compacto)
+
+    def cerrar(self):
+        """Detiene los hilos en segundo plano, guarda lo pendiente y cierra el diario"""
+        if self._hilo_autoguardado is not None:
+            self._detener_autoguardado.set()
+            self._hilo_autoguardado.join()
+            self._hilo_autoguardado = None
+            self._guardar_si_pendiente()
+        if self._hilo_compactacion is not None:
+            self._hilo_compactacion.join()
+        self._actualizar_cache()
+        if self.diario is not None:
+            self.diario.cerrar()
+        if self.bloqueo is not None:
+            self.bloqueo.cerrar()
+        if self.historial is not None:
+            self.historial.cerrar()
+
+    def sincronizar(self):
+        """En modo compartido, recarga el archivo si otro proceso lo guardó.
+
+        Los cambios propios aún no guardados se vuelven a aplicar encima.
+        Devuelve True si hubo que recargar.
+        """
+        if self.bloqueo is None:
+            return False
+        with self._cerrojo:
+            version = self.bloqueo.version()
+            if version == self._version:
+                return False
+            self._recargar(version)
+            return True
+
+    def _recargar(self, version):
+        """Sustituye el estado en memoria por el del archivo más los cambios pendientes"""
+        self._cambios_en_vivo = False
+        try:
+            self._vaciar()
+            try:
+                for producto_data in leer_arreglo_json(self.archivo):
+                    self._insertar(Producto.from_dict(producto_data))
+            except (FileNotFoundError, ArchivoVacioError):
+                pass
+            for registro in self._pendientes:
+                self._aplicar_registro(registro)
+        finally:
+            self._cambios_en_vivo = True
+        self._version = version
+
+    def _guardar_compartido(self):
+        """Guarda sin perder los cambios que otros procesos guardaron mientras tanto.
+
+        La recarga de lo guardado por otros y la escritura del archivo preparado
+        se hacen sin el bloqueo; este solo se toma para comprobar que la versión
+        no cambió, reemplazar el archivo e incrementar la versión. Si otro
+        proceso guardó entretanto, la escritura se descarta y se repite tras una
+        espera aleatoria que se duplica con cada intento, para que los procesos
+        que compiten dejen de coincidir.
+        """
+        preparado = f"{self.archivo}.{os.getpid()}.{threading.get_ident()}.preparado"
+        intentos = 0
+        while True:
+            inicio = time.monotonic()
+            version, enviados = self._preparar_escritura(preparado)
+            # El cerrojo del proceso evita que otro hilo confirme a la vez (flock
+            # no distingue entre hilos del mismo proceso)
+            with self._cerrojo, self.bloqueo.bloqueado():
+                if self._confirmar_escritura(preparado, version, enviados):
+                    return
+            os.remove(preparado)
+            # La espera se mide en escrituras: lo que tardó esta es lo que tarda la de otro
+            intentos = min(intentos + 1, MAX_DUPLICACIONES_ESPERA)
+            time.sleep(random.uniform(0, (time.monotonic() - inicio) * 2 ** intentos))
+
+    def _preparar_escritura(self, preparado):
+        """Recarga si hace falta y escribe el estado en el archivo preparado.
+
+        Devuelve la versión en la que se basa y cuántos cambios pendientes incluye.
+        """
+        with self._cerrojo:
+            self.sincronizar()
+            version = self._version
+            enviados = len(self._pendientes)
+            productos = list(self.productos.values())
+            self._sucio = False
+        escribir_arreglo_json(preparado, (producto.to_dict() for producto in productos),
+                              compacto=self.compacto)
+        return version, enviados
+
+    def _confirmar_escritura(self, preparado, version, enviados):
+        """Reemplaza el archivo si nadie guardó desde la versión dada.
+
+        Debe llamarse con el cerrojo y el bloqueo del archivo tomados.
+        """
+        if self.bloqueo.version() != version:
+            return False
+        os.replace(preparado, self.archivo)
+        self._version = self.bloqueo.nueva_version()
+        # Ningún otro guardado pudo confirmarse en medio, así que los primeros
+        # 'enviados' cambios pendientes son justo los que se acaban de escribir
+        del self._pendientes[:enviados]
+        return True
+
+    def guardar_inventario(self, silencioso=False):
         """Guarda el inventario en el archivo, manejando posibles excepciones"""
         try:
             # Verificar permisos de escritura
@@ -95,22 +697,39 @@ class Inventario:
             if not os.access(directorio, os.W_OK):
                 raise PermissionError("No se tienen permisos de escritura en el directorio")
 
-            # Convertir productos a lista de diccionarios
-            productos_data = [producto.to_dict() for producto in self.productos.values()]
+            if self.bloqueo is not None:
+                self._guardar_compartido()
+                if not silencioso:
+                    print(f"Inventario guardado exitosamente en {self.archivo}")
+                return True
+
+            with self._cerrojo:
+                numero, productos = self._copiar_estado()
+                self._sucio = False
+
+                # En modo diario se escribe y se vacía el diario sin soltar el cerrojo,
+                # para que ningún cambio quede fuera de ambos
+                if self.diario is not None:
+                    self._escribir_si_vigente(numero, productos)
+                    self.diario.vaciar()
 
-            with open(self.archivo, 'w', encoding='utf-8') as file:
-                json.dump(productos_data, file, indent=2, ensure_ascii=False)
+            # Sin diario la escritura no bloquea a las operaciones interactivas
+            if self.diario is None:
+                self._escribir_si_vigente(numero, productos)
 
-            print(f"Inventario guardado exitosamente en {self.archivo}")
+            if not silencioso:
+                print(f"Inventario guardado exitosamente en {self.archivo}")
             return True
 
         except PermissionError as e:
             print(f" Error de permisos al guardar: {e}")
             print("Los cambios no se han guardado en el archivo")
+            self._sucio = True
             return False
 
         except Exception as e:
             print(f"Error inesperado al guardar el inventario: {e}")
+            self._sucio = True
             return False
 
     def añadir_producto(self, id, nombre, cantidad, precio):
@@ -126,10 +745,12 @@ class Inventario:
                 return False
 
             producto = Producto(id, nombre, cantidad, precio)
-            self.productos[id] = producto
+            with self._cerrojo:
+                self._insertar(producto)
+                # Intentar guardar en archivo
+                guardado = self._persistir({'op': 'añadir', 'producto': producto.to_dict()})
 
-            # Intentar guardar en archivo
-            if self.guardar_inventario():
+            if guardado:
                 print(f"Producto '{nombre}' añadido exitosamente")
                 return True
             else:
@@ -147,10 +768,11 @@ class Inventario:
                 print("Error: No existe un producto con ese ID")
                 return False
 
-            nombre = self.productos[id].nombre
-            del self.productos[id]
+            with self._cerrojo:
+                nombre = self._quitar(id).nombre
+                guardado = self._persistir({'op': 'eliminar', 'id': id})
 
-            if self.guardar_inventario():
+            if guardado:
                 print(f"Producto '{nombre}' eliminado exitosamente")
                 return True
             else:
@@ -170,23 +792,28 @@ class Inventario:
 
             producto = self.productos[id]
             cambios = []
+            registro = {'op': 'actualizar', 'id': id}
 
             if cantidad is not None:
                 if cantidad < 0:
                     print("Error: La cantidad debe ser un valor positivo")
                     return False
-                producto.cantidad = cantidad
                 cambios.append(f"cantidad a {cantidad}")
+                registro['cantidad'] = cantidad
 
             if precio is not None:
                 if precio < 0:
                     print("Error: El precio debe ser un valor positivo")
                     return False
-                producto.precio = precio
                 cambios.append(f"precio a ${precio:.2f}")
+                registro['precio'] = precio
 
             if cambios:
-                if self.guardar_inventario():
+                with self._cerrojo:
+                    self._modificar(producto, cantidad, precio)
+                    guardado = self._persistir(registro)
+
+                if guardado:
                     print(f" Producto '{producto.nombre}' actualizado: {', '.join(cambios)}")
                     return True
                 else:
@@ -200,6 +827,96 @@ class Inventario:
             print(f"Error al actualizar producto: {e}")
             return False
 
+    def actualizar_productos_lote(self, cambios):
+        """Actualiza varios productos a la vez: todo o nada, con un solo guardado.
+
+        cambios es una lista de diccionarios con 'id' y al menos uno de
+        'cantidad' o 'precio'. Primero se valida el lote completo; si algún
+        cambio no es válido no se aplica ninguno. Devuelve un informe con
+        'aplicado', 'guardado' y 'resultados' (uno por cambio, en el mismo
+        orden, con 'id', 'ok' y 'mensaje').
+        """
+        informe = {'aplicado': False, 'guardado': False, 'resultados': []}
+        resultados = informe['resultados']
+        validos = []
+        vistos = set()
+
+        with self._cerrojo:
+            # 1) Validar todo el lote sin tocar el inventario
+            for cambio in cambios:
+                id = cambio.get('id')
+                cantidad = cambio.get('cantidad')
+                precio = cambio.get('precio')
+                error = None
+                if id not in self.productos:
+                    error = "No existe un producto con ese ID"
+                elif id in vistos:
+                    error = "ID repetido en el lote"
+                elif cantidad is None and precio is None:
+                    error = "No se especificaron cambios"
+                elif cantidad is not None and (not isinstance(cantidad, int) or cantidad < 0):
+                    error = "La cantidad debe ser un entero positivo"
+                elif precio is not None and (not isinstance(precio, (int, float)) or not precio >= 0):
+                    error = "El precio debe ser un valor positivo"
+                vistos.add(id)
+                resultados.append({'id': id, 'ok': error is None, 'mensaje': error})
+                validos.append({'id': id, 'cantidad': cantidad, 'precio': precio})
+
+            if not validos:
+                print("No se especificaron cambios para el lote")
+                return informe
+
+            errores = sum(1 for resultado in resultados if not resultado['ok'])
+            if errores:
+                for resultado in resultados:
+                    if resultado['ok']:
+                        resultado['ok'] = False
+                        resultado['mensaje'] = "No aplicado: el lote contiene errores"
+                print(f"Error: {errores} cambio(s) no válidos; no se aplicó ningún cambio del lote")
+                return informe
+
+            # 2) Aplicar todo en memoria y 3) persistir una sola vez
+            for cambio, resultado in zip(validos, resultados):
+                producto = self.productos[cambio['id']]
+                self._modificar(producto, cambio['cantidad'], cambio['precio'])
+                resultado['mensaje'] = "Actualizado"
+            informe['aplicado'] = True
+            informe['guardado'] = self._persistir({'op': 'lote', 'cambios': [
+                {clave: valor for clave, valor in cambio.items() if valor is not None} for cambio in validos]})
+
+        if informe['guardado']:
+            print(f" Lote aplicado: {len(validos)} producto(s) actualizados")
+        else:
+            print(" Lote aplicado en memoria pero no guardado en archivo")
+        return informe
+
+    def establecer_umbral_reorden(self, id, umbral):
+        """Define el umbral de reorden de un producto (None = usar el umbral general)"""
+        try:
+            if id not in self.productos:
+                print("Error: No existe un producto con ese ID")
+                return False
+
+            if umbral is not None and umbral < 0:
+                print("Error: El umbral debe ser un valor positivo")
+                return False
+
+            with self._cerrojo:
+                producto = self.productos[id]
+                self._cambiar_umbral(producto, umbral)
+                guardado = self._persistir({'op': 'umbral', 'id': id, 'umbral': umbral})
+
+            if guardado:
+                print(f" Umbral de reorden de '{producto.nombre}' fijado en {self.umbral_de(producto)}")
+                return True
+            else:
+                print(" Umbral actualizado en memoria pero no guardado en archivo")
+                return False
+
+        except Exception as e:
+            print(f"Error al definir el umbral: {e}")
+            return False
+
     def buscar_producto(self, nombre):
         """Busca productos por nombre"""
         encontrados = []
@@ -208,19 +925,52 @@ class Inventario:
                 encontrados.append(producto)
         return encontrados
 
-    def mostrar_inventario(self):
-        """Muestra todos los productos del inventario"""
-        if not self.productos:
-            print(" El inventario está vacío")
-            return
+    def paginas(self, orden='id', tam_pagina=TAM_PAGINA, descendente=False):
+        """Recorre el inventario ordenado por 'id', 'nombre', 'precio' o 'cantidad', página a página.
+
+        Cada orden tiene un índice ordenado que se crea la primera vez que se
+        pide y luego se mantiene con cada cambio, así que una página es una
+        búsqueda del cursor (la clave del último producto mostrado) en el
+        índice y la lectura de las claves siguientes. Si hay cambios entre
+        páginas el recorrido sigue desde el cursor, sin repetir ni saltar
+        productos.
+        """
+        if orden not in CLAVES_ORDEN:
+            raise ValueError(f"Orden no válido: {orden} (use {', '.join(CLAVES_ORDEN)})")
+        cursor = None
+        while True:
+            with self._cerrojo:
+                claves = list(self._indice_orden(orden).siguientes(cursor, tam_pagina, descendente))
+                pagina = [self.productos[id] for _, id in claves]
+            if not pagina:
+                return
+            cursor = claves[-1]
+            yield pagina
+
+    def _indice_orden(self, orden):
+        """Índice ordenado del listado por orden, creándolo la primera vez"""
+        indice = self._indices_orden.get(orden)
+        if indice is None:
+            clave = CLAVES_ORDEN[orden]
+            indice = IndiceOrdenado()
+            indice.añadir_lote((producto.id, clave(producto)) for producto in self.productos.values())
+            self._indices_orden[orden] = indice
+        return indice
+
+
+def escribir_bloque(productos):
+    """Escribe un bloque de productos con una sola escritura en la consola"""
+    sys.stdout.write(''.join(f"  {producto}\n" for producto in productos))
+    sys.stdout.flush()
 
-        print("\n" + "=" * 60)
-        print("INVENTARIO ACTUAL")
-        print("=" * 60)
-        for producto in self.productos.values():
-            print(f"  {producto}")
-        print(f"\nTotal de productos: {len(self.productos)}")
-        print("=" * 60)
+
+def avisar_cruce_umbral(producto, bajo_umbral):
+    """Muestra un aviso cuando un producto cruza su umbral de reorden"""
+    if bajo_umbral:
+        print(f" ALERTA: '{producto.nombre}' quedó por debajo de su umbral de reorden "
+              f"(cantidad: {producto.cantidad})")
+    else:
+        print(f" '{producto.nombre}' ya no está por debajo de su umbral de reorden")
 
 
 def mostrar_menu():
@@ -235,6 +985,10 @@ def mostrar_menu():
     print("5.  Mostrar inventario")
     print("6.  Guardar inventario (manual)")
     print("7.  Salir")
+    print("8.  Resumen del inventario")
+    print("9.  Alertas de stock bajo")
+    print("10. Definir umbral de reorden")
+    print("11. Stock en una fecha (historial)")
     print("=" * 60)
 
 
@@ -243,12 +997,18 @@ def main():
     print("Iniciando sistema de gestión de inventarios...")
 
     # Crear instancia del inventario (automáticamente carga desde archivo)
-    inventario = Inventario()
+    inventario = Inventario(diario=MODO_DIARIO, autoguardado=INTERVALO_AUTOGUARDADO,
+                            al_cruzar_umbral=avisar_cruce_umbral,
+                            compartido=MODO_COMPARTIDO and not MODO_DIARIO,
+                            historial=MODO_HISTORIAL, cache=MODO_CACHE)
 
     while True:
         try:
+            # Incorporar lo que otras sesiones hayan guardado mientras tanto
+            if inventario.sincronizar():
+                print("\n Se cargaron cambios guardados por otra sesión")
             mostrar_menu()
-            opcion = input("\n Seleccione una opción (1-7): ").strip()
+            opcion = input("\n Seleccione una opción (1-11): ").strip()
 
             if opcion == '1':
                 print("\n➕ AÑADIR NUEVO PRODUCTO")
@@ -304,7 +1064,23 @@ def main():
                     print(" No se encontraron productos con ese nombre")
 
             elif opcion == '5':
-                inventario.mostrar_inventario()
+                orden = input("Ordenar por (id/nombre/precio/cantidad; '-precio' = descendente; en blanco = id): ").strip().lower() or 'id'
+                descendente = orden.startswith('-')
+                try:
+                    paginas = inventario.paginas(orden.lstrip('-'), descendente=descendente)
+                    mostrados = 0
+                    for pagina in paginas:
+                        escribir_bloque(pagina)
+                        mostrados += len(pagina)
+                        if mostrados >= len(inventario.productos):
+                            break
+                        if input(f" -- {mostrados} de {len(inventario.productos)}. "
+                                 "Enter = siguiente página, q = terminar: ").strip().lower() == 'q':
+                            break
+                    if not mostrados:
+                        print(" El inventario está vacío")
+                except ValueError as e:
+                    print(f" Error: {e}")
 
             elif opcion == '6':
                 print("\n GUARDADO MANUAL")
@@ -316,15 +1092,58 @@ def main():
             elif opcion == '7':
                 print("\n Guardando cambios antes de salir...")
                 inventario.guardar_inventario()
+                inventario.cerrar()
                 print(" ¡Hasta pronto!")
                 break
 
+            elif opcion == '8':
+                resumen = inventario.resumen()
+                print("\n RESUMEN DEL INVENTARIO")
+                print(f"  Productos distintos: {resumen['productos']}")
+                print(f"  Unidades en stock:   {resumen['unidades']}")
+                print(f"  Valor total:         ${resumen['valor_total']:.2f}")
+                print(f"  Bajo su umbral de reorden: {resumen['bajo_stock']}")
+
+            elif opcion == '9':
+                alertas = inventario.productos_bajo_umbral(limite=20)
+                if alertas:
+                    print("\n PRODUCTOS BAJO SU UMBRAL DE REORDEN (más urgentes primero)")
+                    for producto in alertas:
+                        print(f"  {producto} | Umbral: {inventario.umbral_de(producto)}")
+                else:
+                    print(" No hay productos por debajo de su umbral de reorden")
+
+            elif opcion == '10':
+                print("\n DEFINIR UMBRAL DE REORDEN")
+                try:
+                    id = input("ID del producto: ").strip()
+                    umbral_str = input("Nuevo umbral (en blanco = umbral general): ").strip()
+                    umbral = int(umbral_str) if umbral_str else None
+                    inventario.establecer_umbral_reorden(id, umbral)
+                except ValueError:
+                    print(" Error: El umbral debe ser un número entero")
+
+            elif opcion == '11':
+                print("\n STOCK EN UNA FECHA")
+                try:
+                    id = input("ID del producto: ").strip()
+                    texto = input("Fecha y hora (AAAA-MM-DD [HH:MM], en blanco = ahora): ").strip()
+                    momento = datetime.fromisoformat(texto) if texto else datetime.now()
+                    cantidad = inventario.cantidad_en_fecha(id, momento)
+                    if cantidad is None:
+                        print(f" No hay movimientos registrados del producto {id} hasta esa fecha")
+                    else:
+                        print(f" Stock del producto {id} el {momento:%Y-%m-%d %H:%M}: {cantidad}")
+                except ValueError as e:
+                    print(f" Error: {e}")
+
             else:
-                print("Opción no válida. Por favor, seleccione 1-7")
+                print("Opción no válida. Por favor, seleccione 1-11")
 
         except KeyboardInterrupt:
             print("\n\n Interrupción detectada. Guardando y saliendo...")
             inventario.guardar_inventario()
+            inventario.cerrar()
             print("¡Hasta pronto!")
             break
 
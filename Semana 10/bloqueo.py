@@ -0,0 +1,65 @@
+import contextlib
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos, solo la comprobación de versión
+    fcntl = None
+
+# Dígitos con los que se escribe la versión (ancho fijo: se sobrescribe sin truncar)
+_DIGITOS = 20
+
+
+class BloqueoArchivo:
+    """Bloqueo entre procesos y número de versión de un archivo compartido.
+
+    Ambos viven en '<ruta>.lock': el bloqueo es un flock consultivo sobre ese
+    archivo y la versión es un contador que aumenta con cada escritura confirmada.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta + '.lock'
+        self._descriptor = None
+
+    def _abrir(self):
+        if self._descriptor is None:
+            self._descriptor = os.open(self.ruta, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._descriptor
+
+    def cerrar(self):
+        """Cierra el archivo de bloqueo (y suelta el bloqueo si estaba tomado)"""
+        if self._descriptor is not None:
+            os.close(self._descriptor)
+            self._descriptor = None
+
+    def version(self):
+        """Lee la versión actual sin bloquear (0 si aún no hay ninguna, -1 si no se pudo leer)"""
+        try:
+            with open(self.ruta, 'rb') as archivo:
+                datos = archivo.read(_DIGITOS)
+        except FileNotFoundError:
+            return 0
+        try:
+            return int(datos) if datos else 0
+        except ValueError:
+            return -1
+
+    @contextlib.contextmanager
+    def bloqueado(self):
+        """Mantiene el bloqueo exclusivo mientras dura el bloque with"""
+        descriptor = self._abrir()
+        if fcntl is not None:
+            fcntl.flock(descriptor, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(descriptor, fcntl.LOCK_UN)
+
+    def nueva_version(self):
+        """Incrementa la versión y la devuelve; debe llamarse con el bloqueo tomado"""
+        version = max(self.version(), 0) + 1
+        descriptor = self._abrir()
+        os.lseek(descriptor, 0, os.SEEK_SET)
+        os.write(descriptor, b'%0*d' % (_DIGITOS, version))
+        return version
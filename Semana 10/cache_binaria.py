@@ -0,0 +1,104 @@
+import hashlib
+import marshal
+import os
+import sys
+import threading
+
+# Cambia si cambia el contenido de las columnas guardadas
+_FORMATO = 2
+# Tamaño de cada lectura al calcular el hash del archivo (1 MiB)
+_TAM_BLOQUE = 1024 * 1024
+
+
+class CacheBinaria:
+    """Copia binaria (marshal) de los productos de un archivo JSON, en '<ruta>.cache'.
+
+    Los productos se guardan por columnas (una lista por atributo), que marshal
+    decodifica bastante más rápido que una tupla por producto.
+
+    El JSON sigue siendo la fuente de verdad: la caché solo se usa si el
+    tamaño, la fecha de modificación y el hash del contenido del archivo
+    coinciden con los anotados al crearla. Si falta, está dañada o no
+    coincide, se ignora y el archivo se vuelve a leer como JSON.
+    """
+
+    def __init__(self, ruta):
+        self.ruta_fuente = ruta
+        self.ruta = ruta + '.cache'
+
+    def firma(self):
+        """Tamaño, fecha de modificación (ns) y hash del archivo, o None si no existe
+        o cambió mientras se leía"""
+        try:
+            antes = os.stat(self.ruta_fuente)
+            resumen = hashlib.blake2b(digest_size=16)
+            with open(self.ruta_fuente, 'rb') as archivo:
+                for bloque in iter(lambda: archivo.read(_TAM_BLOQUE), b''):
+                    resumen.update(bloque)
+            despues = os.stat(self.ruta_fuente)
+        except OSError:
+            return None
+        if (antes.st_size, antes.st_mtime_ns) != (despues.st_size, despues.st_mtime_ns):
+            return None
+        return despues.st_size, despues.st_mtime_ns, resumen.digest()
+
+    def _cabecera(self, firma):
+        # marshal no garantiza el mismo formato entre versiones de Python
+        return (_FORMATO, sys.version_info[:2]) + tuple(firma)
+
+    def _corresponde(self, cabecera):
+        """Comprueba una cabecera contra el archivo actual: primero lo barato
+        (versión, tamaño y fecha) y el hash del contenido solo si coincide"""
+        try:
+            estado = os.stat(self.ruta_fuente)
+        except OSError:
+            return False
+        if (not isinstance(cabecera, tuple) or
+                cabecera[:4] != self._cabecera((estado.st_size, estado.st_mtime_ns))):
+            return False
+        firma = self.firma()
+        return firma is not None and cabecera == self._cabecera(firma)
+
+    def leer(self):
+        """Devuelve las columnas guardadas si la caché corresponde al archivo actual, o None"""
+        try:
+            with open(self.ruta, 'rb') as archivo:
+                if not self._corresponde(marshal.load(archivo)):
+                    return None
+                # marshal.load sobre un archivo lee a trozos muy pequeños: es
+                # mucho más rápido leer el resto de una vez y decodificarlo
+                columnas = marshal.loads(archivo.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if (not isinstance(columnas, tuple) or not all(isinstance(columna, list) for columna in columnas)
+                or len({len(columna) for columna in columnas}) > 1):
+            return None
+        return columnas
+
+    def vigente(self, firma):
+        """Indica si la caché ya corresponde al archivo descrito por firma"""
+        try:
+            with open(self.ruta, 'rb') as archivo:
+                return firma is not None and marshal.load(archivo) == self._cabecera(firma)
+        except (OSError, EOFError, ValueError, TypeError):
+            return False
+
+    def escribir(self, firma, columnas):
+        """Guarda las columnas (tupla de listas de igual longitud) para el contenido del archivo descrito por firma.
+
+        Se escribe en un temporal que reemplaza a la caché de forma atómica;
+        un fallo solo significa que la próxima carga leerá el JSON.
+        """
+        if firma is None:
+            return False
+        temporal = f"{self.ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, 'wb') as archivo:
+                marshal.dump(self._cabecera(firma), archivo)
+                marshal.dump(columnas, archivo)
+            os.replace(temporal, self.ruta)
+            return True
+        except (OSError, ValueError):
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            return False
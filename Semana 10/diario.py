@@ -0,0 +1,84 @@
+import json
+import os
+
+
+class DiarioCambios:
+    """Registro de cambios de solo-anexado: una línea JSON por cada operación"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        # Diario que se está compactando en segundo plano (si existe)
+        self.ruta_compactando = ruta + '.compactando'
+        self._archivo = None
+        self._tamaño = 0
+        self.lineas_invalidas = 0
+
+    def abrir(self):
+        """Abre el diario en modo anexado (lo crea si no existe)"""
+        if self._archivo is None:
+            self._archivo = open(self.ruta, 'ab')
+            self._tamaño = self._archivo.tell()
+
+    def cerrar(self):
+        """Cierra el archivo del diario"""
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+    def tamaño(self):
+        """Devuelve el tamaño en bytes del diario activo"""
+        return self._tamaño
+
+    def anexar(self, registro, sincronizar=False):
+        """Escribe un registro al final del diario"""
+        self.abrir()
+        linea = json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + '\n'
+        datos = linea.encode('utf-8')
+        self._archivo.write(datos)
+        self._archivo.flush()
+        if sincronizar:
+            os.fsync(self._archivo.fileno())
+        self._tamaño += len(datos)
+
+    def leer_registros(self):
+        """Recorre los registros del diario rotado (si existe) y luego los del diario activo"""
+        self.lineas_invalidas = 0
+        for ruta in (self.ruta_compactando, self.ruta):
+            if not os.path.exists(ruta):
+                continue
+            with open(ruta, 'rb') as archivo:
+                for linea in archivo:
+                    linea = linea.strip()
+                    if not linea:
+                        continue
+                    try:
+                        yield json.loads(linea.decode('utf-8'))
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        # Normalmente una última línea cortada por un cierre inesperado
+                        self.lineas_invalidas += 1
+
+    def rotar(self):
+        """Aparta el diario activo para compactarlo y empieza uno nuevo.
+
+        Devuelve False si ya hay una compactación pendiente.
+        """
+        if os.path.exists(self.ruta_compactando):
+            return False
+        self.cerrar()
+        if os.path.exists(self.ruta):
+            os.replace(self.ruta, self.ruta_compactando)
+        self.abrir()
+        return True
+
+    def descartar_rotado(self):
+        """Elimina el diario rotado una vez que su contenido está en la instantánea"""
+        if os.path.exists(self.ruta_compactando):
+            os.remove(self.ruta_compactando)
+
+    def vaciar(self):
+        """Deja el diario vacío (tras escribir una instantánea completa)"""
+        self.cerrar()
+        with open(self.ruta, 'wb'):
+            pass
+        self.descartar_rotado()
+        self.abrir()
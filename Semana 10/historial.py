@@ -0,0 +1,210 @@
+import bisect
+import itertools
+import json
+import os
+import time
+from array import array
+
+# Movimientos de un producto entre dos puntos de control
+INTERVALO_PUNTOS = 50
+
+
+class _PuntosProducto:
+    """Puntos de control y movimientos de un producto, en orden de registro"""
+
+    __slots__ = ('fechas', 'posiciones', 'cantidades', 'movimientos')
+
+    def __init__(self):
+        self.fechas = array('d')       # marca de tiempo de cada punto
+        self.posiciones = array('q')   # posición del historial justo después de la línea del punto
+        self.cantidades = []
+        self.movimientos = array('q')  # posición del historial donde empieza cada movimiento
+
+
+class HistorialMovimientos:
+    """Historial de solo-anexado de los cambios de cantidad, una línea JSON por registro.
+
+    Cada movimiento guarda la variación de cantidad de un producto. Cada
+    INTERVALO_PUNTOS movimientos de un producto se anexa un punto de control
+    con su cantidad absoluta. En '<ruta>.puntos' se anota, para cada punto,
+    la posición del historial donde termina y, para cada movimiento, la
+    posición donde empieza, así que la cantidad en un momento dado se obtiene
+    saltando al punto anterior y leyendo solo las líneas de los movimientos
+    del producto desde ahí, sin recorrer las de los demás. Las fechas se
+    guardan como segundos desde la época (UTC), sin ambigüedad en los cambios
+    de horario.
+    """
+
+    def __init__(self, ruta, intervalo_puntos=INTERVALO_PUNTOS):
+        self.ruta = ruta
+        self.ruta_puntos = ruta + '.puntos'
+        self.intervalo_puntos = intervalo_puntos
+        self._archivo = None
+        self._archivo_puntos = None
+        # Movimientos de cada producto desde su último punto de control en esta sesión
+        self._desde_punto = {}
+        # Puntos de control y movimientos por producto, y posición de '<ruta>.puntos' hasta
+        # la que están al día; cada consulta lee solo los anotados desde entonces (aquí o en otro proceso)
+        self._puntos = {}
+        self._leido = 0
+        self._comprobado = False
+        self.lineas_invalidas = 0
+
+    def abrir(self):
+        """Abre el historial en modo anexado (lo crea si no existe)"""
+        if self._archivo is None:
+            self._comprobar_puntos()
+            self._archivo = open(self.ruta, 'ab')
+            self._archivo_puntos = open(self.ruta_puntos, 'ab')
+
+    def cerrar(self):
+        """Cierra el archivo del historial"""
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo_puntos.close()
+            self._archivo = None
+            self._archivo_puntos = None
+
+    def punto(self, id, cantidad, momento=None):
+        """Anota la cantidad absoluta de un producto (p. ej. al darlo de alta)"""
+        fecha = momento.timestamp() if momento else time.time()
+        self._anexar_punto(fecha, id, cantidad)
+        self._desde_punto[id] = 0
+
+    def registrar(self, id, anterior, nueva, motivo, momento=None):
+        """Anota que la cantidad del producto pasó de anterior a nueva"""
+        if anterior == nueva:
+            return
+        fecha = momento.timestamp() if momento else time.time()
+        # La primera vez que cambia en esta sesión se fija su cantidad de partida,
+        # también para productos que ya existían antes de llevar el historial
+        if id not in self._desde_punto:
+            self._anexar_punto(fecha, id, anterior)
+            self._desde_punto[id] = 0
+
+        inicio, _ = self._anexar({'fecha': fecha, 'id': id, 'delta': nueva - anterior, 'motivo': motivo})
+        self._anotar(self._linea_movimiento(id, fecha, inicio))
+        self._desde_punto[id] += 1
+        if self._desde_punto[id] >= self.intervalo_puntos:
+            self._anexar_punto(fecha, id, nueva)
+            self._desde_punto[id] = 0
+
+    def _anexar(self, registro):
+        """Anexa un registro al historial y devuelve las posiciones donde empieza y termina"""
+        self.abrir()
+        linea = (json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        self._archivo.write(linea)
+        self._archivo.flush()
+        # En modo anexado la posición tras escribir es el final de esta línea,
+        # aunque otro proceso haya anexado antes
+        fin = self._archivo.tell()
+        return fin - len(linea), fin
+
+    def _anexar_punto(self, fecha, id, cantidad):
+        _, fin = self._anexar({'fecha': fecha, 'id': id, 'punto': cantidad})
+        # Si el programa se corta antes de anotarlo, las consultas parten del punto
+        # anterior y le suman los movimientos anotados desde entonces
+        self._anotar(self._linea_punto(id, fecha, fin, cantidad))
+
+    def _anotar(self, linea):
+        self._archivo_puntos.write(linea)
+        self._archivo_puntos.flush()
+
+    @staticmethod
+    def _linea_punto(id, fecha, posicion, cantidad):
+        return (json.dumps([id, fecha, posicion, cantidad], ensure_ascii=False, separators=(',', ':'))
+                + '\n').encode('utf-8')
+
+    @staticmethod
+    def _linea_movimiento(id, fecha, posicion):
+        return (json.dumps([id, fecha, posicion], ensure_ascii=False, separators=(',', ':'))
+                + '\n').encode('utf-8')
+
+    def _comprobar_puntos(self):
+        """Reconstruye '<ruta>.puntos' recorriendo el historial una vez si falta (archivo borrado)"""
+        if self._comprobado:
+            return
+        self._comprobado = True
+        if os.path.exists(self.ruta_puntos) or not os.path.exists(self.ruta) or not os.path.getsize(self.ruta):
+            return
+        temporal = f"{self.ruta_puntos}.{os.getpid()}.tmp"
+        with open(self.ruta, 'rb') as archivo, open(temporal, 'wb') as puntos:
+            posicion = 0
+            for linea in archivo:
+                if not linea.endswith(b'\n'):
+                    break
+                inicio = posicion
+                posicion += len(linea)
+                try:
+                    registro = json.loads(linea)
+                    if 'punto' in registro:
+                        puntos.write(self._linea_punto(registro['id'], registro['fecha'],
+                                                       posicion, registro['punto']))
+                    else:
+                        puntos.write(self._linea_movimiento(registro['id'], registro['fecha'], inicio))
+                except (ValueError, KeyError, TypeError):
+                    self.lineas_invalidas += 1
+        os.replace(temporal, self.ruta_puntos)
+
+    def _leer_puntos(self):
+        """Añade al índice los puntos de control y movimientos anotados desde la última lectura"""
+        self._comprobar_puntos()
+        if not os.path.exists(self.ruta_puntos):
+            return
+        with open(self.ruta_puntos, 'rb') as archivo:
+            archivo.seek(self._leido)
+            for linea in archivo:
+                if not linea.endswith(b'\n'):
+                    break  # otro proceso la está escribiendo: se leerá la próxima vez
+                self._leido += len(linea)
+                try:
+                    id, fecha, posicion, *cantidad = json.loads(linea)
+                except (ValueError, TypeError):
+                    self.lineas_invalidas += 1
+                    continue
+                puntos = self._puntos.get(id)
+                if puntos is None:
+                    puntos = self._puntos[id] = _PuntosProducto()
+                if not cantidad:
+                    # Dos procesos pueden anotar sus movimientos en otro orden que el del historial
+                    if puntos.movimientos and posicion < puntos.movimientos[-1]:
+                        bisect.insort(puntos.movimientos, posicion)
+                    else:
+                        puntos.movimientos.append(posicion)
+                else:
+                    puntos.fechas.append(fecha)
+                    puntos.posiciones.append(posicion)
+                    puntos.cantidades.append(cantidad[0])
+
+    def cantidad_en(self, id, momento):
+        """Cantidad del producto en el momento dado (None si no hay datos hasta entonces)"""
+        self._leer_puntos()
+        puntos = self._puntos.get(id)
+        if puntos is None:
+            return None
+
+        marca = momento.timestamp()
+        posicion = bisect.bisect_right(puntos.fechas, marca) - 1
+        if posicion < 0:
+            return None
+        cantidad = puntos.cantidades[posicion]
+        # Solo se leen las líneas de los movimientos del producto entre ese punto
+        # de control y el siguiente: como mucho intervalo_puntos por consulta
+        desde = bisect.bisect_left(puntos.movimientos, puntos.posiciones[posicion])
+        fin = puntos.posiciones[posicion + 1] if posicion + 1 < len(puntos.posiciones) else None
+        with open(self.ruta, 'rb') as archivo:
+            for inicio in itertools.islice(puntos.movimientos, desde, None):
+                if fin is not None and inicio >= fin:
+                    break
+                archivo.seek(inicio)
+                linea = archivo.readline()
+                try:
+                    registro = json.loads(linea)
+                    if registro['id'] != id:
+                        raise ValueError(f"La posición {inicio} no es un movimiento de {id}")
+                    if registro['fecha'] > marca:
+                        break
+                    cantidad += registro['delta']
+                except (ValueError, KeyError, TypeError):
+                    self.lineas_invalidas += 1
+        return cantidad
@@ -1,16 +1,42 @@
-import json
+import math
 import os
-from typing import Dict, List, Optional
+import sys
+from typing import Callable, Dict, Iterator, List, Optional, Set, Union
+
+# Los módulos comunes a varias semanas (flujo_json, indice_ordenado) están en la carpeta Compartido
+_COMPARTIDO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Compartido")
+if _COMPARTIDO not in sys.path:
+    sys.path.append(_COMPARTIDO)
+
+from almacen_fragmentado import AlmacenFragmentado
+from almacen_sqlite import AlmacenSQLite, migrar_json
+from copia_comprimida import NIVEL, escribir_comprimido, leer_comprimido
+from flujo_json import escribir_arreglo_json, indicador_progreso, leer_arreglo_json
+from importacion import ResultadoImportacion, exportar, importar
+from indices import CacheLRU, IndiceAproximado, IndiceOrdenado, IndiceTrigramas
+from instantaneas import Instantanea, RegistroVersiones
+from replicacion import RUTA_SOCKET, FlujoCambios, PublicadorCambios, Seguidor
+from servidor import PUERTO, servir
+
+# Productos por página al listar el inventario
+TAM_PAGINA = 50
 
 
 class Producto:
     """Clase que representa un producto en el inventario"""
 
+    # Sin __dict__ por instancia: con catálogos grandes es la mayor parte de la memoria
+    __slots__ = ('_id', '_nombre', '_cantidad', '_precio', '_observador', '_posicion')
+
     def __init__(self, id: int, nombre: str, cantidad: int, precio: float):
         self._id = id
         self._nombre = nombre
         self._cantidad = cantidad
         self._precio = precio
+        # Inventario al que se avisa cuando cambia un atributo (lo asigna el inventario)
+        self._observador = None
+        # Posición de alta en ese inventario, para sus instantáneas
+        self._posicion = -1
 
     # Métodos getter
     def get_id(self) -> int:
@@ -27,13 +53,32 @@ class Producto:
 
     # Métodos setter
     def set_nombre(self, nombre: str) -> None:
+        self._antes_de_cambiar()
+        anterior = self._nombre
         self._nombre = nombre
+        self._notificar('nombre', anterior)
 
     def set_cantidad(self, cantidad: int) -> None:
+        self._antes_de_cambiar()
+        anterior = self._cantidad
         self._cantidad = cantidad
+        self._notificar('cantidad', anterior)
 
     def set_precio(self, precio: float) -> None:
+        self._antes_de_cambiar()
+        anterior = self._precio
         self._precio = precio
+        self._notificar('precio', anterior)
+
+    def _antes_de_cambiar(self) -> None:
+        """Avisa al inventario que contiene el producto de que va a cambiar un atributo"""
+        if self._observador is not None:
+            self._observador._antes_de_cambiar_producto(self)
+
+    def _notificar(self, campo: str, anterior) -> None:
+        """Avisa al inventario que contiene el producto de que cambió un atributo"""
+        if self._observador is not None:
+            self._observador._al_cambiar_producto(self, campo, anterior)
 
     def to_dict(self) -> Dict:
         """Convierte el producto a diccionario para serialización"""
@@ -53,32 +98,170 @@ class Producto:
         return f"ID: {self._id}, Nombre: {self._nombre}, Cantidad: {self._cantidad}, Precio: ${self._precio:.2f}"
 
 
+# Valor por el que se ordena cada listado que no tiene ya su índice (precio y cantidad lo tienen)
+CLAVES_LISTADO: Dict[str, Callable[[Producto], Union[int, str]]] = {
+    'id': lambda producto: producto.get_id(),
+    'nombre': lambda producto: producto.get_nombre().lower(),
+}
+
+
 class Inventario:
     """Clase que gestiona el inventario de productos utilizando un diccionario"""
 
-    def __init__(self):
+    def __init__(self, tam_cache_busquedas: int = 256, umbral_stock_bajo: int = 5):
         # Usamos un diccionario para almacenamiento eficiente por ID
         self._productos: Dict[int, Producto] = {}
         # Usamos un conjunto para búsquedas rápidas de nombres (opcional)
         self._nombres_productos = set()
+        # Índice de trigramas para la búsqueda parcial por nombre
+        self._indice_nombres = IndiceTrigramas()
+        # Claves normalizadas (sin tildes) para la búsqueda tolerante a errores
+        self._indice_aproximado = IndiceAproximado()
+        # Índices ordenados para consultas por rango de precio y de cantidad
+        self._indice_precios = IndiceOrdenado()
+        self._indice_cantidades = IndiceOrdenado()
+        # Índices por ID y por nombre para listar por páginas; se crean la primera
+        # vez que se piden y a partir de ahí se mantienen como los demás
+        self._indices_listado: Dict[str, IndiceOrdenado] = {}
+        # Caché de búsquedas por nombre; cualquier cambio incrementa la generación
+        # y deja obsoletas las entradas anteriores
+        self._cache_busquedas = CacheLRU(tam_cache_busquedas)
+        self._generacion = 0
+        # Agregados que se actualizan con cada cambio (valor total, unidades, stock bajo)
+        self.umbral_stock_bajo = umbral_stock_bajo
+        self._unidades = 0
+        self._valor_total = 0.0
+        self._bajo_stock = 0
+        # IDs añadidos, modificados o eliminados desde la última vez que se
+        # sincronizó con SQLite; tras vaciar el inventario hay que reescribirlo todo
+        self._tocados: Set[int] = set()
+        self._reescribir_todo = True
+        # Posiciones de alta y estados anteriores para las instantáneas abiertas
+        self._versiones = RegistroVersiones()
+        # Flujo en el que se publica cada cambio para las réplicas (None si no hay)
+        self._flujo_cambios: Optional[FlujoCambios] = None
 
     def añadir_producto(self, producto: Producto) -> bool:
         """Añade un nuevo producto al inventario"""
         if producto.get_id() in self._productos:
             return False  # ID ya existe
 
+        self._registrar(producto)
+        self._indice_precios.añadir(producto.get_id(), producto.get_precio())
+        self._indice_cantidades.añadir(producto.get_id(), producto.get_cantidad())
+        for orden, indice in self._indices_listado.items():
+            indice.añadir(producto.get_id(), CLAVES_LISTADO[orden](producto))
+        return True
+
+    def _añadir_lote(self, productos: List[Producto]) -> None:
+        """Añade productos con IDs nuevos y distintos entre sí (ya comprobados).
+
+        Los índices ordenados se actualizan una vez por lote: insertar uno a
+        uno cuesta O(N) por producto y domina las importaciones grandes.
+        """
+        for producto in productos:
+            self._registrar(producto)
+        self._indice_precios.añadir_lote((p.get_id(), p.get_precio()) for p in productos)
+        self._indice_cantidades.añadir_lote((p.get_id(), p.get_cantidad()) for p in productos)
+        for orden, indice in self._indices_listado.items():
+            indice.añadir_lote((p.get_id(), CLAVES_LISTADO[orden](p)) for p in productos)
+
+    def _registrar(self, producto: Producto) -> None:
+        """Registra el producto en todo salvo en los índices ordenados"""
         self._productos[producto.get_id()] = producto
         self._nombres_productos.add(producto.get_nombre().lower())
-        return True
+        self._indice_nombres.añadir(producto.get_id(), producto.get_nombre())
+        self._indice_aproximado.añadir(producto.get_id(), producto.get_nombre())
+        self._sumar_agregados(producto.get_cantidad(), producto.get_precio(), 1)
+        self._versiones.alta(producto)
+        producto._observador = self
+        self._tocados.add(producto.get_id())
+        self._generacion += 1
+        if self._flujo_cambios is not None:
+            self._flujo_cambios.publicar({'op': 'añadir', **producto.to_dict()})
 
     def eliminar_producto(self, id: int) -> bool:
         """Elimina un producto por ID"""
         if id in self._productos:
+            self._antes_de_cambiar_producto(self._productos[id])
             producto_eliminado = self._productos.pop(id)
+            producto_eliminado._observador = None
             self._nombres_productos.discard(producto_eliminado.get_nombre().lower())
+            self._indice_nombres.eliminar(id)
+            self._indice_aproximado.eliminar(id)
+            self._indice_precios.eliminar(id)
+            self._indice_cantidades.eliminar(id)
+            for indice in self._indices_listado.values():
+                indice.eliminar(id)
+            self._sumar_agregados(producto_eliminado.get_cantidad(), producto_eliminado.get_precio(), -1)
+            self._tocados.add(id)
+            self._generacion += 1
+            self._versiones.compactar(self._productos)
+            if self._flujo_cambios is not None:
+                self._flujo_cambios.publicar({'op': 'eliminar', 'id': id})
             return True
         return False
 
+    def _antes_de_cambiar_producto(self, producto: Producto) -> None:
+        """Guarda el estado actual del producto para las instantáneas abiertas"""
+        self._versiones.conservar(producto)
+
+    def _al_cambiar_producto(self, producto: Producto, campo: str, anterior) -> None:
+        """Mantiene los índices al día cuando se modifica un producto del inventario"""
+        self._tocados.add(producto.get_id())
+        self._generacion += 1
+        if self._flujo_cambios is not None:
+            self._flujo_cambios.publicar({'op': 'actualizar', 'id': producto.get_id(),
+                                          campo: producto.to_dict()[campo]})
+        if campo == 'nombre':
+            self._nombres_productos.discard(anterior.lower())
+            self._nombres_productos.add(producto.get_nombre().lower())
+            self._indice_nombres.renombrar(producto.get_id(), producto.get_nombre())
+            self._indice_aproximado.renombrar(producto.get_id(), producto.get_nombre())
+            if 'nombre' in self._indices_listado:
+                self._indices_listado['nombre'].actualizar(producto.get_id(), producto.get_nombre().lower())
+        elif campo == 'precio':
+            self._indice_precios.actualizar(producto.get_id(), producto.get_precio())
+            self._sumar_agregados(producto.get_cantidad(), anterior, -1)
+            self._sumar_agregados(producto.get_cantidad(), producto.get_precio(), 1)
+        elif campo == 'cantidad':
+            self._indice_cantidades.actualizar(producto.get_id(), producto.get_cantidad())
+            self._sumar_agregados(anterior, producto.get_precio(), -1)
+            self._sumar_agregados(producto.get_cantidad(), producto.get_precio(), 1)
+
+    def _sumar_agregados(self, cantidad: int, precio: float, signo: int) -> None:
+        """Suma (signo=1) o resta (signo=-1) la contribución de un producto a los agregados"""
+        self._unidades += signo * cantidad
+        self._valor_total += signo * cantidad * precio
+        if cantidad < self.umbral_stock_bajo:
+            self._bajo_stock += signo
+
+    def _vaciar(self) -> None:
+        """Deja el inventario sin productos"""
+        for producto in self._productos.values():
+            self._antes_de_cambiar_producto(producto)
+            producto._observador = None
+        self._productos.clear()
+        self._versiones.compactar(self._productos)
+        self._nombres_productos.clear()
+        self._indice_nombres = IndiceTrigramas()
+        self._indice_aproximado = IndiceAproximado()
+        self._indice_precios = IndiceOrdenado()
+        self._indice_cantidades = IndiceOrdenado()
+        self._indices_listado = {}
+        self._unidades = 0
+        self._valor_total = 0.0
+        self._bajo_stock = 0
+        self._tocados.clear()
+        self._reescribir_todo = True
+        self._generacion += 1
+        if self._flujo_cambios is not None:
+            self._flujo_cambios.publicar({'op': 'vaciar'})
+
+    def publicar_cambios(self, flujo: Optional[FlujoCambios]) -> None:
+        """Publica en flujo cada cambio del inventario a partir de ahora (None para dejar de hacerlo)"""
+        self._flujo_cambios = flujo
+
     def actualizar_producto(self, id: int, cantidad: Optional[int] = None,
                             precio: Optional[float] = None) -> bool:
         """Actualiza la cantidad y/o precio de un producto"""
@@ -95,79 +278,349 @@ class Inventario:
 
     def buscar_por_nombre(self, nombre: str) -> List[Producto]:
         """Busca productos por nombre (búsqueda parcial case-insensitive)"""
-        nombre_lower = nombre.lower()
-        resultados = []
-
-        for producto in self._productos.values():
-            if nombre_lower in producto.get_nombre().lower():
-                resultados.append(producto)
+        clave = nombre.lower()
+        ids = self._cache_busquedas.obtener(clave, self._generacion)
+        if ids is None:
+            # Solo se comprueban los productos que comparten los trigramas de la consulta
+            ids = tuple(self._indice_nombres.buscar(nombre))
+            self._cache_busquedas.guardar(clave, self._generacion, ids)
+        return [self._productos[id] for id in ids]
+
+    def estadisticas_cache(self) -> Dict[str, int]:
+        """Devuelve los contadores de la caché de búsquedas (aciertos, fallos, desalojos)"""
+        return self._cache_busquedas.estadisticas()
+
+    def buscar_aproximado(self, nombre: str, distancia_maxima: int = 2) -> List[Producto]:
+        """Busca productos sin distinguir tildes y tolerando hasta distancia_maxima
+        errores de escritura en el nombre completo o en alguna de sus palabras"""
+        return [self._productos[id] for id in self._indice_aproximado.buscar(nombre, distancia_maxima)]
+
+    def buscar_por_rango_precio(self, minimo: Optional[float] = None, maximo: Optional[float] = None,
+                                limite: Optional[int] = None, desplazamiento: int = 0,
+                                descendente: bool = False) -> List[Producto]:
+        """Productos con minimo <= precio <= maximo, ordenados por precio"""
+        ids = self._indice_precios.rango(minimo, maximo, limite, desplazamiento, descendente)
+        return [self._productos[id] for id in ids]
+
+    def buscar_por_rango_cantidad(self, minimo: Optional[int] = None, maximo: Optional[int] = None,
+                                  limite: Optional[int] = None, desplazamiento: int = 0,
+                                  descendente: bool = False) -> List[Producto]:
+        """Productos con minimo <= cantidad <= maximo, ordenados por cantidad"""
+        ids = self._indice_cantidades.rango(minimo, maximo, limite, desplazamiento, descendente)
+        return [self._productos[id] for id in ids]
+
+    def instantanea(self) -> Instantanea:
+        """Abre en O(1) una vista inmutable del inventario tal como está ahora.
+
+        Se puede recorrer (también desde otro hilo) mientras el inventario
+        sigue cambiando: solo se guarda aparte el estado anterior de cada
+        producto que se modifica o elimina mientras la vista está abierta.
+        Debe abrirse desde el hilo que hace las escrituras, entre dos de
+        ellas; cerrarla (o dejar de usarla) libera esos estados.
+        """
+        return self._versiones.abrir(self._productos, self.resumen(), self._generacion)
+
+    def mostrar_todos(self) -> Iterator[Producto]:
+        """Recorre todos los productos del inventario sin copiarlos a una lista"""
+        return iter(self._productos.values())
+
+    def paginas(self, orden: str = 'id', tam_pagina: int = TAM_PAGINA,
+                descendente: bool = False) -> Iterator[List[Producto]]:
+        """Genera el inventario por páginas de tam_pagina productos, ordenado por
+        'id', 'nombre', 'precio' o 'cantidad'.
+
+        Cada página continúa tras la última clave (valor, id) de la anterior
+        en el índice ordenado, así que pedir una página cuesta O(log N + página)
+        y nunca se construye la lista completa.
+        """
+        indice = self._indice_para(orden)
+        cursor = None
+        while True:
+            claves = list(indice.siguientes(cursor, tam_pagina, descendente))
+            if not claves:
+                return
+            cursor = claves[-1]
+            # Un producto eliminado mientras se pagina ya no está en el índice
+            yield [self._productos[id] for _, id in claves if id in self._productos]
+
+    def _indice_para(self, orden: str) -> IndiceOrdenado:
+        if orden == 'precio':
+            return self._indice_precios
+        if orden == 'cantidad':
+            return self._indice_cantidades
+        if orden not in CLAVES_LISTADO:
+            raise ValueError(f"Orden desconocido: {orden} (use id, nombre, precio o cantidad)")
+        if orden not in self._indices_listado:
+            indice = IndiceOrdenado()
+            indice.añadir_lote((p.get_id(), CLAVES_LISTADO[orden](p)) for p in self._productos.values())
+            self._indices_listado[orden] = indice
+        return self._indices_listado[orden]
+
+    def resumen(self) -> Dict[str, Union[int, float]]:
+        """Devuelve los totales del inventario en O(1)"""
+        return {
+            'productos': len(self._productos),
+            'unidades': self._unidades,
+            'valor_total': self._valor_total,
+            'bajo_stock': self._bajo_stock,
+            'umbral_stock_bajo': self.umbral_stock_bajo,
+        }
 
-        return resultados
+    def recalcular_resumen(self) -> Dict[str, Union[int, float]]:
+        """Calcula los mismos totales que resumen() recorriendo todo el inventario"""
+        productos = self._productos.values()
+        return {
+            'productos': len(self._productos),
+            'unidades': sum(producto.get_cantidad() for producto in productos),
+            'valor_total': math.fsum(producto.get_cantidad() * producto.get_precio() for producto in productos),
+            'bajo_stock': sum(1 for producto in productos if producto.get_cantidad() < self.umbral_stock_bajo),
+            'umbral_stock_bajo': self.umbral_stock_bajo,
+        }
 
-    def mostrar_todos(self) -> List[Producto]:
-        """Devuelve todos los productos del inventario"""
-        return list(self._productos.values())
+    def verificar_resumen(self) -> bool:
+        """Comprueba que los agregados incrementales coinciden con un recálculo completo"""
+        incremental = self.resumen()
+        completo = self.recalcular_resumen()
+        valor_incremental = incremental.pop('valor_total')
+        valor_completo = completo.pop('valor_total')
+        return incremental == completo and math.isclose(valor_incremental, valor_completo,
+                                                        rel_tol=1e-9, abs_tol=1e-6)
 
     def obtener_producto_por_id(self, id: int) -> Optional[Producto]:
         """Obtiene un producto por su ID"""
         return self._productos.get(id)
 
-    def guardar_a_archivo(self, nombre_archivo: str = "inventario.json") -> bool:
-        """Guarda el inventario en un archivo JSON"""
+    def guardar_a_archivo(self, nombre_archivo: str = "inventario.json", compacto: bool = False) -> bool:
+        """Guarda el inventario en un archivo JSON (con compacto=True, un producto por línea)"""
         try:
-            datos = [producto.to_dict() for producto in self._productos.values()]
-            with open(nombre_archivo, 'w', encoding='utf-8') as archivo:
-                json.dump(datos, archivo, indent=2, ensure_ascii=False)
+            # Los productos se serializan de uno en uno sobre un archivo temporal
+            escribir_arreglo_json(nombre_archivo,
+                                  (producto.to_dict() for producto in self._productos.values()),
+                                  compacto=compacto)
             return True
         except Exception as e:
             print(f"Error al guardar el archivo: {e}")
             return False
 
+    def importar_masivo(self, ruta: str, formato: Optional[str] = None,
+                        guardar_en: Optional[str] = "inventario.json") -> ResultadoImportacion:
+        """Importa productos desde un archivo CSV o JSONL.
+
+        Las filas se validan y deduplican en una sola pasada; las aceptadas se
+        añaden al inventario lote a lote (si la lectura falla se quitan las ya
+        añadidas) y al final se guarda una única vez en guardar_en (None para
+        no guardar).
+        """
+        resultado = importar(ruta, self._productos.__contains__,
+                             lambda filas: self._añadir_lote([Producto(*fila) for fila in filas]),
+                             self.eliminar_producto, formato)
+        if guardar_en is not None and resultado.aceptadas:
+            resultado.guardado = self.guardar_a_archivo(guardar_en)
+        return resultado
+
+    def exportar(self, ruta: str, formato: Optional[str] = None) -> int:
+        """Exporta los productos a CSV o JSONL, de uno en uno; devuelve cuántos escribió"""
+        return exportar(ruta, (producto.to_dict() for producto in self._productos.values()), formato)
+
+    def guardar_en_sqlite(self, almacen: AlmacenSQLite) -> bool:
+        """Guarda en SQLite solo los productos añadidos, modificados o eliminados
+        desde la última carga o guardado en la base"""
+        try:
+            if self._reescribir_todo:
+                almacen.reemplazar_todo(self._filas(self._productos.values()))
+            else:
+                modificados = [self._productos[id] for id in self._tocados if id in self._productos]
+                eliminados = [id for id in self._tocados if id not in self._productos]
+                almacen.guardar_cambios(self._filas(modificados), eliminados)
+            self._tocados.clear()
+            self._reescribir_todo = False
+            return True
+        except Exception as e:
+            print(f"Error al guardar en la base de datos: {e}")
+            return False
+
+    def cargar_desde_sqlite(self, almacen: AlmacenSQLite) -> bool:
+        """Carga el inventario desde una base SQLite"""
+        try:
+            productos = [Producto(*fila) for fila in almacen.filas()]
+            self._vaciar()
+            # Los IDs de la base son únicos (clave primaria)
+            self._añadir_lote(productos)
+            self._tocados.clear()
+            self._reescribir_todo = False
+            return True
+        except Exception as e:
+            print(f"Error al cargar la base de datos: {e}")
+            return False
+
+    def guardar_en_fragmentos(self, almacen: AlmacenFragmentado) -> bool:
+        """Reescribe solo los fragmentos que contienen productos añadidos,
+        modificados o eliminados desde la última carga o guardado"""
+        try:
+            # Con otro número de fragmentos en disco cambia el fragmento de cada ID: se reescribe todo
+            if self._reescribir_todo or almacen.redistribuido():
+                almacen.reemplazar_todo(self._filas(self._productos.values()))
+            else:
+                sucios = {almacen.fragmento_de(id) for id in self._tocados}
+                # Solo se convierten en filas los productos de los fragmentos que se reescriben
+                afectados = (producto for id, producto in self._productos.items()
+                             if almacen.fragmento_de(id) in sucios)
+                almacen.guardar_fragmentos(sucios, self._filas(afectados))
+            self._tocados.clear()
+            self._reescribir_todo = False
+            return True
+        except Exception as e:
+            print(f"Error al guardar los fragmentos: {e}")
+            return False
+
+    def cargar_desde_fragmentos(self, almacen: AlmacenFragmentado) -> bool:
+        """Carga el inventario desde un almacén fragmentado (fragmentos leídos en paralelo)"""
+        try:
+            productos = [Producto(*fila) for fila in almacen.filas()]
+            self._vaciar()
+            # Cada ID está en un único fragmento y es único dentro de él
+            self._añadir_lote(productos)
+            self._tocados.clear()
+            self._reescribir_todo = False
+            return True
+        except Exception as e:
+            print(f"Error al cargar los fragmentos: {e}")
+            return False
+
+    @staticmethod
+    def _filas(productos):
+        return ((p.get_id(), p.get_nombre(), p.get_cantidad(), p.get_precio()) for p in productos)
+
     def cargar_desde_archivo(self, nombre_archivo: str = "inventario.json") -> bool:
         """Carga el inventario desde un archivo JSON"""
         try:
             if not os.path.exists(nombre_archivo):
                 return False
 
-            with open(nombre_archivo, 'r', encoding='utf-8') as archivo:
-                datos = json.load(archivo)
+            # Se construyen los productos a medida que se lee el archivo; el
+            # inventario actual no se toca hasta que la lectura termina bien.
+            # Si un ID se repite vale el primero, como al añadirlos de uno en uno
+            progreso = indicador_progreso("Cargando inventario")
+            productos: Dict[int, Producto] = {}
+            for producto_data in leer_arreglo_json(nombre_archivo, progreso=progreso):
+                producto = Producto.from_dict(producto_data)
+                productos.setdefault(producto.get_id(), producto)
 
             # Limpiar el inventario actual
-            self._productos.clear()
-            self._nombres_productos.clear()
+            self._vaciar()
 
-            # Cargar nuevos productos
-            for producto_data in datos:
-                producto = Producto.from_dict(producto_data)
-                self.añadir_producto(producto)
+            # Cargar nuevos productos (los índices ordenados, de una vez)
+            self._añadir_lote(list(productos.values()))
 
             return True
         except Exception as e:
             print(f"Error al cargar el archivo: {e}")
             return False
 
+    def guardar_comprimido(self, nombre_archivo: str = "inventario.jsonl.gz", nivel: int = NIVEL,
+                           procesos: Optional[int] = None) -> bool:
+        """Guarda una copia del inventario en gzip por bloques (un producto por línea),
+        comprimiendo los bloques en paralelo"""
+        try:
+            escribir_comprimido(nombre_archivo, self._filas(self._productos.values()), nivel, procesos=procesos)
+            return True
+        except Exception as e:
+            print(f"Error al guardar la copia comprimida: {e}")
+            return False
+
+    def cargar_comprimido(self, nombre_archivo: str = "inventario.jsonl.gz", procesos: Optional[int] = None) -> bool:
+        """Carga el inventario desde una copia comprimida, descomprimiendo los bloques en paralelo"""
+        try:
+            if not os.path.exists(nombre_archivo):
+                return False
+            # Si un ID se repite vale el primero, como en cargar_desde_archivo
+            productos: Dict[int, Producto] = {}
+            for fila in leer_comprimido(nombre_archivo, procesos):
+                productos.setdefault(fila[0], Producto(*fila))
+            self._vaciar()
+            self._añadir_lote(list(productos.values()))
+            return True
+        except Exception as e:
+            print(f"Error al cargar la copia comprimida: {e}")
+            return False
+
+
+def escribir_bloque(productos: List[Producto]) -> None:
+    """Escribe un bloque de productos con una sola escritura en la salida"""
+    sys.stdout.write(''.join(f"{producto}\n" for producto in productos))
+    sys.stdout.flush()
+
+
+class MigracionFallida(Exception):
+    """No se pudo pasar inventario.json al almacenamiento elegido; no se creó nada"""
+
 
 class SistemaInventario:
     """Clase principal que maneja la interfaz de usuario y la lógica del sistema"""
 
-    def __init__(self):
+    def __init__(self, almacenamiento: str = "json", fragmentos: Optional[int] = None):
+        """almacenamiento: 'json' (inventario.json), 'sqlite' (inventario.db) o
+        'fragmentos' (directorio inventario_fragmentos, con el número de fragmentos dado)"""
+        if almacenamiento not in ("json", "sqlite", "fragmentos"):
+            raise ValueError(f"Almacenamiento no válido: {almacenamiento}")
         self.inventario = Inventario()
+        self.almacen: Union[AlmacenSQLite, AlmacenFragmentado, None] = None
+        if almacenamiento == "sqlite":
+            self.almacen = AlmacenSQLite("inventario.db")
+        elif almacenamiento == "fragmentos":
+            self.almacen = AlmacenFragmentado("inventario_fragmentos", fragmentos)
+        # Envía los cambios a las réplicas, si se pidió con publicar_cambios()
+        self.publicador: Optional[PublicadorCambios] = None
         self.cargar_inventario()
 
     def cargar_inventario(self) -> None:
         """Carga el inventario al iniciar el programa"""
-        if self.inventario.cargar_desde_archivo():
-            print("Inventario cargado exitosamente.")
-        else:
-            print("No se encontró archivo de inventario. Se creará uno nuevo.")
+        if self.almacen is None:
+            if self.inventario.cargar_desde_archivo():
+                print("Inventario cargado exitosamente.")
+            else:
+                print("No se encontró archivo de inventario. Se creará uno nuevo.")
+            return
+
+        # Si la primera migración falla no se sigue: guardar crearía un almacén
+        # vacío y el próximo inicio ya no volvería a migrar inventario.json
+        if isinstance(self.almacen, AlmacenFragmentado):
+            # La primera vez se reparte el inventario.json existente en fragmentos
+            if not self.almacen.existe() and os.path.exists("inventario.json"):
+                if not self.inventario.cargar_desde_archivo():
+                    raise MigracionFallida("No se pudo leer inventario.json")
+                if not self.inventario.guardar_en_fragmentos(self.almacen):
+                    raise MigracionFallida(f"No se pudo escribir {self.almacen.ruta}")
+                print(f"Se repartió inventario.json en {self.almacen.fragmentos} fragmento(s) "
+                      f"en {self.almacen.ruta}.")
+            elif self.inventario.cargar_desde_fragmentos(self.almacen):
+                print(f"Inventario cargado exitosamente desde {self.almacen.ruta}.")
+            return
+
+        # La primera vez que se usa SQLite se migra el inventario.json existente
+        if not os.path.exists(self.almacen.ruta) and os.path.exists("inventario.json"):
+            try:
+                migrados = migrar_json("inventario.json", self.almacen.ruta)
+            except Exception as e:
+                raise MigracionFallida(f"Error al migrar inventario.json: {e}") from e
+            print(f"Se migraron {migrados} producto(s) de inventario.json a {self.almacen.ruta}.")
+        if self.inventario.cargar_desde_sqlite(self.almacen):
+            print(f"Inventario cargado exitosamente desde {self.almacen.ruta}.")
 
     def guardar_inventario(self) -> None:
         """Guarda el inventario antes de salir"""
-        if self.inventario.guardar_a_archivo():
+        if self._guardar():
             print("Inventario guardado exitosamente.")
         else:
             print("Error al guardar el inventario.")
 
+    def _guardar(self) -> bool:
+        if self.almacen is None:
+            return self.inventario.guardar_a_archivo()
+        if isinstance(self.almacen, AlmacenFragmentado):
+            return self.inventario.guardar_en_fragmentos(self.almacen)
+        return self.inventario.guardar_en_sqlite(self.almacen)
+
     def mostrar_menu(self) -> None:
         """Muestra el menú principal"""
         print("\n" + "=" * 50)
@@ -179,6 +632,9 @@ class SistemaInventario:
         print("4. Buscar producto por nombre")
         print("5. Mostrar todos los productos")
         print("6. Guardar y salir")
+        print("7. Resumen del inventario")
+        print("8. Importar productos (CSV/JSONL)")
+        print("9. Exportar productos (CSV/JSONL)")
         print("=" * 50)
 
     def añadir_producto(self) -> None:
@@ -270,6 +726,14 @@ class SistemaInventario:
             print(f"\n {len(resultados)} producto(s) encontrado(s):")
             for producto in resultados:
                 print(f"   - {producto}")
+            return
+
+        # Sin coincidencias exactas: se prueba sin tildes y con errores de escritura
+        resultados = self.inventario.buscar_aproximado(nombre)
+        if resultados:
+            print(f"\n No hubo coincidencias exactas. {len(resultados)} producto(s) parecido(s):")
+            for producto in resultados:
+                print(f"   - {producto}")
         else:
             print("No se encontraron productos con ese nombre.")
 
@@ -277,21 +741,103 @@ class SistemaInventario:
         """Muestra todos los productos del inventario"""
         print("\n--- Todos los Productos ---")
 
-        productos = self.inventario.mostrar_todos()
-
-        if productos:
-            for producto in productos:
-                print(producto)
-            print(f"\nTotal de productos: {len(productos)}")
-        else:
+        total = self.inventario.resumen()['productos']
+        if not total:
             print("El inventario está vacío.")
+            return
+
+        orden = input("Ordenar por (id/nombre/precio/cantidad; '-precio' = descendente; "
+                      "en blanco = id): ").strip().lower() or 'id'
+        descendente = orden.startswith('-')
+        try:
+            paginas = self.inventario.paginas(orden.lstrip('-'), TAM_PAGINA, descendente)
+            mostrados = 0
+            for pagina in paginas:
+                escribir_bloque(pagina)
+                mostrados += len(pagina)
+                if mostrados >= total:
+                    break
+                if input(f"-- {mostrados} de {total}. Enter = siguiente página, q = terminar: ").strip().lower() == 'q':
+                    break
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        print(f"\nTotal de productos: {total}")
+
+    def mostrar_resumen(self) -> None:
+        """Muestra los totales del inventario"""
+        print("\n--- Resumen del Inventario ---")
+
+        resumen = self.inventario.resumen()
+        print(f"Productos distintos: {resumen['productos']}")
+        print(f"Unidades en stock: {resumen['unidades']}")
+        print(f"Valor total: ${resumen['valor_total']:.2f}")
+        print(f"Productos con stock bajo (< {resumen['umbral_stock_bajo']}): {resumen['bajo_stock']}")
+
+    def importar_productos(self) -> None:
+        """Interfaz para importar productos desde un archivo CSV o JSONL"""
+        print("\n--- Importar Productos ---")
+
+        ruta = input("Archivo a importar (.csv o .jsonl): ").strip()
+        try:
+            resultado = self.inventario.importar_masivo(ruta, guardar_en=None)
+        except (OSError, ValueError) as e:
+            print(f"Error al importar: {e}. No se añadió ningún producto.")
+            return
+        if resultado.aceptadas:
+            resultado.guardado = self._guardar()
+
+        print(resultado)
+        for linea, motivo in resultado.rechazadas[:20]:
+            print(f"   - Línea {linea}: {motivo}")
+        if resultado.total_rechazadas > 20:
+            print(f"   ... y {resultado.total_rechazadas - 20} rechazo(s) más")
+        if resultado.guardado is False:
+            print("Error al guardar el inventario.")
+
+    def exportar_productos(self) -> None:
+        """Interfaz para exportar el inventario a CSV o JSONL"""
+        print("\n--- Exportar Productos ---")
+
+        ruta = input("Archivo de destino (.csv o .jsonl): ").strip()
+        try:
+            escritos = self.inventario.exportar(ruta)
+        except (OSError, ValueError) as e:
+            print(f"Error al exportar: {e}")
+            return
+        print(f"{escritos} producto(s) exportado(s) a {ruta}.")
+
+    def publicar_cambios(self, ruta: str = RUTA_SOCKET) -> None:
+        """Publica cada cambio del inventario en un socket Unix para las réplicas de solo lectura"""
+        flujo = FlujoCambios()
+        publicador = PublicadorCambios(self.inventario, flujo, ruta)
+        try:
+            publicador.iniciar()
+        except OSError as e:
+            print(f"No se pueden publicar los cambios: {e}")
+            return
+        self.inventario.publicar_cambios(flujo)
+        self.publicador = publicador
+        print(f"Publicando los cambios del inventario en {ruta}.")
+
+    def dejar_de_publicar(self) -> None:
+        if self.publicador is not None:
+            self.publicador.detener()
+            self.inventario.publicar_cambios(None)
+            self.publicador = None
+
+    def ejecutar_servidor(self, puerto: int = PUERTO) -> None:
+        """Atiende peticiones por red en lugar del menú interactivo"""
+        servir(self.inventario, Producto, guardar=self._guardar, puerto=puerto)
+        if self.almacen is not None:
+            self.almacen.cerrar()
 
     def ejecutar(self) -> None:
         """Método principal que ejecuta el sistema"""
         while True:
             self.mostrar_menu()
 
-            opcion = input("Seleccione una opción (1-6): ").strip()
+            opcion = input("Seleccione una opción (1-9): ").strip()
 
             if opcion == '1':
                 self.añadir_producto()
@@ -305,8 +851,16 @@ class SistemaInventario:
                 self.mostrar_todos_productos()
             elif opcion == '6':
                 self.guardar_inventario()
+                if self.almacen is not None:
+                    self.almacen.cerrar()
                 print(" ¡Hasta luego!")
                 break
+            elif opcion == '7':
+                self.mostrar_resumen()
+            elif opcion == '8':
+                self.importar_productos()
+            elif opcion == '9':
+                self.exportar_productos()
             else:
                 print(" Opción no válida. Intente nuevamente.")
 
@@ -314,6 +868,65 @@ class SistemaInventario:
 
 
 # Punto de entrada del programa
+# Uso: python "Sistema Avanzado de Gestión de Inventario.py" [--sqlite | --fragmentos [N]] [--servidor [puerto]]
+#      python "Sistema Avanzado de Gestión de Inventario.py" [...] --publicar [inventario.sock]
+#      python "Sistema Avanzado de Gestión de Inventario.py" --seguidor [inventario.sock] [--servidor [puerto]]
+#      python "Sistema Avanzado de Gestión de Inventario.py" --migrar [inventario.json] [inventario.db]
+#      python "Sistema Avanzado de Gestión de Inventario.py" --respaldar [inventario.json] [inventario.jsonl.gz]
+#      python "Sistema Avanzado de Gestión de Inventario.py" --restaurar [inventario.jsonl.gz] [inventario.json]
 if __name__ == "__main__":
-    sistema = SistemaInventario()
-    sistema.ejecutar()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "--migrar":
+        origen = sys.argv[2] if len(sys.argv) > 2 else "inventario.json"
+        destino = sys.argv[3] if len(sys.argv) > 3 else "inventario.db"
+        try:
+            print(f"{migrar_json(origen, destino)} producto(s) migrados de {origen} a {destino}.")
+        except Exception as e:
+            print(f"Error al migrar {origen}: {e}")
+    elif len(sys.argv) > 1 and sys.argv[1] in ("--respaldar", "--restaurar"):
+        archivos = ["inventario.json", "inventario.jsonl.gz"]
+        if sys.argv[1] == "--restaurar":
+            archivos.reverse()
+        origen, destino = (sys.argv[2:4] + archivos[len(sys.argv[2:4]):])
+        inventario = Inventario()
+        if sys.argv[1] == "--respaldar":
+            hecho = inventario.cargar_desde_archivo(origen) and inventario.guardar_comprimido(destino)
+        else:
+            hecho = inventario.cargar_comprimido(origen) and inventario.guardar_a_archivo(destino)
+        if hecho:
+            print(f"{inventario.resumen()['productos']} producto(s) copiados de {origen} a {destino}.")
+        else:
+            print(f"No se pudo copiar {origen} a {destino}.")
+    elif len(sys.argv) > 1 and sys.argv[1] == "--seguidor":
+        # Réplica en memoria que sigue al inventario principal y solo atiende consultas
+        argumentos = sys.argv[2:]
+        ruta = argumentos[0] if argumentos and not argumentos[0].startswith("--") else RUTA_SOCKET
+        siguiente = argumentos[argumentos.index("--servidor") + 1:] if "--servidor" in argumentos else []
+        inventario = Inventario()
+        try:
+            seguidor = Seguidor(inventario, Producto, ruta)
+        except OSError as e:
+            sys.exit(f"No se puede seguir al inventario principal: {e}")
+        servir(inventario, Producto, puerto=int(siguiente[0]) if siguiente and siguiente[0].isdigit() else PUERTO + 1,
+               seguidor=seguidor)
+    else:
+        argumentos = sys.argv[1:]
+        try:
+            if "--fragmentos" in argumentos:
+                siguiente = argumentos[argumentos.index("--fragmentos") + 1:]
+                sistema = SistemaInventario("fragmentos",
+                                            int(siguiente[0]) if siguiente and siguiente[0].isdigit() else None)
+            else:
+                sistema = SistemaInventario("sqlite" if "--sqlite" in argumentos else "json")
+        except MigracionFallida as e:
+            sys.exit(f"{e}\ninventario.json se conserva sin cambios; corríjalo y vuelva a iniciar el programa.")
+        if "--publicar" in argumentos:
+            siguiente = argumentos[argumentos.index("--publicar") + 1:]
+            sistema.publicar_cambios(siguiente[0] if siguiente and not siguiente[0].startswith("--") else RUTA_SOCKET)
+        try:
+            if "--servidor" in argumentos:
+                siguiente = argumentos[argumentos.index("--servidor") + 1:]
+                sistema.ejecutar_servidor(int(siguiente[0]) if siguiente and siguiente[0].isdigit() else PUERTO)
+            else:
+                sistema.ejecutar()
+        finally:
+            sistema.dejar_de_publicar()
\ No newline at end of file
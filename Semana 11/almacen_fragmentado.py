@@ -0,0 +1,141 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from flujo_json import escribir_arreglo_json, leer_arreglo_json
+
+# (id, nombre, cantidad, precio)
+Fila = Tuple[int, str, int, float]
+
+# Fragmentos de un almacén nuevo si no se indica otra cantidad
+FRAGMENTOS = 16
+# Por debajo de este tamaño total los fragmentos se leen en el propio proceso:
+# arrancar los procesos cuesta más que lo que se ahorra
+TAM_MINIMO_PARALELO = 8 * 1024 * 1024
+_MANIFIESTO = "manifiesto.json"
+
+
+def _leer_fragmento(ruta: str) -> List[Fila]:
+    """Lee un fragmento (se ejecuta en un proceso del pool)"""
+    if not os.path.exists(ruta):
+        return []
+    return [(datos['id'], datos['nombre'], datos['cantidad'], datos['precio'])
+            for datos in leer_arreglo_json(ruta)]
+
+
+class AlmacenFragmentado:
+    """Almacenamiento del inventario repartido en N archivos JSON por hash del ID.
+
+    Cada producto vive siempre en el fragmento hash(id) % N, así que guardar
+    los cambios solo reescribe los fragmentos que contienen algún ID tocado,
+    y al cargar los fragmentos se analizan en paralelo en varios procesos.
+    Cada fragmento se reemplaza de forma atómica; el manifiesto indica cuántos
+    fragmentos hay y se escribe el último, de modo que cambiar N nunca deja una
+    mezcla de la distribución vieja y la nueva.
+    """
+
+    def __init__(self, directorio: str = "inventario_fragmentos", fragmentos: Optional[int] = None,
+                 procesos: Optional[int] = None):
+        self.ruta = directorio
+        self.procesos = procesos
+        # La distribución que hay en disco; None si el almacén aún no existe
+        self._en_disco = self._leer_manifiesto()
+        self.fragmentos = fragmentos or self._en_disco or FRAGMENTOS
+        if self.fragmentos < 1:
+            raise ValueError("Debe haber al menos un fragmento")
+
+    def _leer_manifiesto(self) -> Optional[int]:
+        try:
+            with open(os.path.join(self.ruta, _MANIFIESTO), encoding='utf-8') as archivo:
+                return int(json.load(archivo)['fragmentos'])
+        except FileNotFoundError:
+            return None
+
+    def _escribir_manifiesto(self) -> None:
+        ruta = os.path.join(self.ruta, _MANIFIESTO)
+        temporal = ruta + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump({'fragmentos': self.fragmentos}, archivo)
+        os.replace(temporal, ruta)
+        self._en_disco = self.fragmentos
+
+    def existe(self) -> bool:
+        return self._en_disco is not None
+
+    def redistribuido(self) -> bool:
+        """True si el disco tiene otra distribución (o nada): hay que reemplazarlo todo"""
+        return self._en_disco != self.fragmentos
+
+    def cerrar(self) -> None:
+        """No mantiene archivos abiertos; existe para usarse igual que AlmacenSQLite"""
+
+    def fragmento_de(self, id: int) -> int:
+        # hash() de un entero no depende de PYTHONHASHSEED: la distribución es estable
+        return hash(id) % self.fragmentos
+
+    def _ruta_fragmento(self, numero: int, total: int) -> str:
+        return os.path.join(self.ruta, f"fragmento_{numero:03d}_de_{total:03d}.json")
+
+    def filas(self) -> Iterator[Fila]:
+        """Recorre las filas de todos los fragmentos, leídos en paralelo si son grandes"""
+        if self._en_disco is None:
+            return iter(())
+        rutas = [self._ruta_fragmento(numero, self._en_disco) for numero in range(self._en_disco)]
+        total = sum(os.path.getsize(ruta) for ruta in rutas if os.path.exists(ruta))
+        if len(rutas) == 1 or total < TAM_MINIMO_PARALELO or self.procesos == 1:
+            return (fila for ruta in rutas for fila in _leer_fragmento(ruta))
+        return self._filas_en_paralelo(rutas)
+
+    def _filas_en_paralelo(self, rutas: List[str]) -> Iterator[Fila]:
+        with ProcessPoolExecutor(max_workers=self.procesos) as procesos:
+            # map devuelve los fragmentos en orden a medida que terminan
+            for filas in procesos.map(_leer_fragmento, rutas):
+                yield from filas
+
+    def guardar_fragmentos(self, numeros: Set[int], filas: Iterable[Fila]) -> int:
+        """Reescribe solo los fragmentos indicados con las filas que les corresponden.
+
+        filas puede contener todo el inventario: se descartan las de los demás
+        fragmentos. Si la distribución en disco es otra (ver redistribuido) no
+        basta con las filas de unos fragmentos: hay que usar reemplazar_todo
+        con el inventario completo. Devuelve cuántos fragmentos escribió.
+        """
+        if self.redistribuido():
+            raise ValueError(f"El almacén tiene {self._en_disco} fragmento(s) en disco y {self.fragmentos} "
+                             "configurado(s): hay que reemplazarlo todo")
+        if not numeros:
+            return 0
+        por_fragmento: Dict[int, List[Fila]] = {numero: [] for numero in numeros}
+        for fila in filas:
+            destino = por_fragmento.get(self.fragmento_de(fila[0]))
+            if destino is not None:
+                destino.append(fila)
+        for numero, contenido in por_fragmento.items():
+            self._escribir_fragmento(numero, contenido)
+        return len(por_fragmento)
+
+    def reemplazar_todo(self, filas: Iterable[Fila]) -> int:
+        """Escribe todos los fragmentos con las filas dadas; devuelve cuántos escribió"""
+        os.makedirs(self.ruta, exist_ok=True)
+        por_fragmento: List[List[Fila]] = [[] for _ in range(self.fragmentos)]
+        for fila in filas:
+            por_fragmento[self.fragmento_de(fila[0])].append(fila)
+        for numero, contenido in enumerate(por_fragmento):
+            self._escribir_fragmento(numero, contenido)
+
+        anterior = self._en_disco
+        self._escribir_manifiesto()
+        # Los fragmentos de otra distribución ya no se leen: se borran
+        if anterior is not None and anterior != self.fragmentos:
+            for numero in range(anterior):
+                ruta = self._ruta_fragmento(numero, anterior)
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+        return self.fragmentos
+
+    def _escribir_fragmento(self, numero: int, filas: List[Fila]) -> None:
+        escribir_arreglo_json(self._ruta_fragmento(numero, self.fragmentos),
+                              ({'id': id, 'nombre': nombre, 'cantidad': cantidad, 'precio': precio}
+                               for id, nombre, cantidad, precio in filas),
+                              compacto=True)
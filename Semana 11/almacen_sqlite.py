@@ -0,0 +1,156 @@
+import itertools
+import os
+import sqlite3
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from flujo_json import indicador_progreso, leer_arreglo_json
+
+# (id, nombre, cantidad, precio)
+Fila = Tuple[int, str, int, float]
+
+# Filas que se envían juntas en cada executemany
+TAM_LOTE = 10000
+
+# El ID es INTEGER PRIMARY KEY: SQLite lo usa como clave del propio árbol de la
+# tabla, así que la búsqueda por ID ya está indexada. nombre_min guarda el nombre
+# en minúsculas (str.lower de Python, igual que la búsqueda en memoria) para que
+# las consultas por nombre usen su índice.
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS productos (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    nombre_min TEXT NOT NULL,
+    cantidad INTEGER NOT NULL,
+    precio REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_productos_nombre_min ON productos(nombre_min);
+CREATE INDEX IF NOT EXISTS idx_productos_precio ON productos(precio);
+"""
+
+# Sentencias con parámetros: sqlite3 guarda cada una compilada en la caché de la
+# conexión, de modo que se preparan una vez y se reutilizan en cada executemany
+_INSERTAR = ("INSERT OR REPLACE INTO productos (id, nombre, nombre_min, cantidad, precio) "
+             "VALUES (?, ?, ?, ?, ?)")
+_ELIMINAR = "DELETE FROM productos WHERE id = ?"
+_COLUMNAS = "SELECT id, nombre, cantidad, precio FROM productos"
+
+
+def _con_nombre_min(filas: Iterable[Fila]) -> Iterator[Tuple]:
+    for id, nombre, cantidad, precio in filas:
+        yield id, nombre, nombre.lower(), cantidad, precio
+
+
+class AlmacenSQLite:
+    """Almacenamiento del inventario en una base SQLite (modo WAL).
+
+    Guarda filas (id, nombre, cantidad, precio); el inventario en memoria
+    decide qué filas han cambiado y este almacén solo escribe esas.
+    """
+
+    def __init__(self, ruta: str = "inventario.db"):
+        self.ruta = ruta
+        self._conexion: Optional[sqlite3.Connection] = None
+
+    def abrir(self) -> sqlite3.Connection:
+        """Abre la base (la crea si no existe) y devuelve la conexión"""
+        if self._conexion is None:
+            # La conexión puede usarse desde otro hilo (p. ej. el guardado del
+            # servidor); quien usa el almacén se encarga de no hacerlo a la vez
+            conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+            # WAL: los lectores no se bloquean mientras se escribe y cada
+            # transacción solo anexa las páginas modificadas
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.executescript(_ESQUEMA)
+            self._conexion = conexion
+        return self._conexion
+
+    def cerrar(self) -> None:
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+    def __len__(self) -> int:
+        return self.abrir().execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+
+    def filas(self) -> Iterator[Fila]:
+        """Recorre todas las filas en orden de ID sin cargarlas todas a la vez"""
+        cursor = self.abrir().execute(_COLUMNAS + " ORDER BY id")
+        while True:
+            lote = cursor.fetchmany(TAM_LOTE)
+            if not lote:
+                return
+            yield from lote
+
+    def guardar_cambios(self, modificadas: Iterable[Fila], eliminados: Iterable[int]) -> None:
+        """Escribe las filas nuevas o modificadas y borra las eliminadas en una sola transacción"""
+        conexion = self.abrir()
+        with conexion:
+            conexion.executemany(_ELIMINAR, ((id,) for id in eliminados))
+            conexion.executemany(_INSERTAR, _con_nombre_min(modificadas))
+
+    def reemplazar_todo(self, filas: Iterable[Fila]) -> int:
+        """Sustituye el contenido de la tabla por las filas dadas; devuelve cuántas escribió"""
+        conexion = self.abrir()
+        escritas = 0
+        filas = iter(filas)
+        with conexion:
+            conexion.execute("DELETE FROM productos")
+            while True:
+                lote = list(itertools.islice(filas, TAM_LOTE))
+                if not lote:
+                    break
+                conexion.executemany(_INSERTAR, _con_nombre_min(lote))
+                escritas += len(lote)
+        return escritas
+
+    def buscar_por_prefijo(self, prefijo: str, limite: int = 100) -> List[Fila]:
+        """Productos cuyo nombre empieza por prefijo (sin distinguir mayúsculas), por índice"""
+        minimo = prefijo.lower()
+        # Todas las cadenas que empiezan por minimo quedan en [minimo, minimo + U+10FFFF)
+        return self.abrir().execute(
+            _COLUMNAS + " WHERE nombre_min >= ? AND nombre_min < ? ORDER BY nombre_min LIMIT ?",
+            (minimo, minimo + "\U0010ffff", limite)).fetchall()
+
+    def buscar_por_rango_precio(self, minimo: float, maximo: float, limite: int = 100) -> List[Fila]:
+        """Productos con minimo <= precio <= maximo, ordenados por precio, por índice"""
+        return self.abrir().execute(
+            _COLUMNAS + " WHERE precio BETWEEN ? AND ? ORDER BY precio, id LIMIT ?",
+            (minimo, maximo, limite)).fetchall()
+
+
+def _borrar_base(ruta: str) -> None:
+    """Borra una base SQLite junto con sus archivos WAL y de memoria compartida"""
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+
+
+def migrar_json(ruta_json: str = "inventario.json", ruta_db: str = "inventario.db") -> int:
+    """Copia un inventario.json a una base SQLite (reemplaza su contenido); devuelve cuántos productos copió.
+
+    La migración se escribe en una base temporal que sustituye a ruta_db solo
+    si el JSON se leyó entero: con un JSON dañado la excepción llega al
+    llamador y ruta_db queda como estaba (o sin crear).
+    """
+    progreso = indicador_progreso("Migrando inventario")
+    filas = ((datos['id'], datos['nombre'], datos['cantidad'], datos['precio'])
+             for datos in leer_arreglo_json(ruta_json, progreso=progreso))
+    temporal = ruta_db + ".migrando"
+    _borrar_base(temporal)
+    almacen = AlmacenSQLite(temporal)
+    try:
+        try:
+            migrados = almacen.reemplazar_todo(filas)
+        finally:
+            # Al cerrar la última conexión SQLite vuelca el WAL en la base
+            almacen.cerrar()
+        # Un WAL de la base anterior se aplicaría sobre la nueva
+        for sufijo in ("-wal", "-shm"):
+            if os.path.exists(ruta_db + sufijo):
+                os.remove(ruta_db + sufijo)
+        os.replace(temporal, ruta_db)
+    except BaseException:
+        _borrar_base(temporal)
+        raise
+    return migrados
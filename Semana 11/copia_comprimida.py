@@ -0,0 +1,164 @@
+import collections
+import gzip
+import itertools
+import json
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+# (id, nombre, cantidad, precio)
+Fila = Tuple[int, str, int, float]
+
+# Productos por bloque: cada bloque se comprime y descomprime por separado
+TAM_BLOQUE = 20_000
+# Nivel de compresión de zlib (1 = más rápido, 9 = más pequeño)
+NIVEL = 6
+# Con menos bloques se comprime y descomprime en el propio proceso:
+# arrancar los procesos cuesta más que lo que se ahorra
+BLOQUES_MINIMOS_PARALELO = 4
+
+# Cabecera gzip con un campo extra 'IV' que guarda el tamaño total del miembro:
+# firma, método, banderas (FEXTRA), fecha, XFL, sistema, XLEN, subcampo, longitud, tamaño
+_CABECERA = struct.Struct('<2sBBIBBH2sHI')
+_FIRMA_GZIP = b'\x1f\x8b'
+_FEXTRA = 4
+_SUBCAMPO = b'IV'
+_COLA = struct.Struct('<II')
+_CODIFICADOR = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def _comprimir(filas: List[Fila], nivel: int) -> bytes:
+    """Convierte un bloque de filas en un miembro gzip (se ejecuta en un proceso del pool)"""
+    datos = ''.join(_CODIFICADOR.encode({'id': id, 'nombre': nombre, 'cantidad': cantidad, 'precio': precio}) + '\n'
+                    for id, nombre, cantidad, precio in filas).encode('utf-8')
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, -zlib.MAX_WBITS)
+    cuerpo = compresor.compress(datos) + compresor.flush()
+    tamaño = _CABECERA.size + len(cuerpo) + _COLA.size
+    return (_CABECERA.pack(_FIRMA_GZIP, zlib.DEFLATED, _FEXTRA, 0, 0, 255, 8, _SUBCAMPO, 4, tamaño)
+            + cuerpo + _COLA.pack(zlib.crc32(datos), len(datos) & 0xFFFFFFFF))
+
+
+def _descomprimir(miembro: bytes) -> List[Fila]:
+    """Convierte un miembro gzip en sus filas (se ejecuta en un proceso del pool)"""
+    # zlib comprueba la cabecera gzip, el CRC y la longitud del miembro
+    texto = zlib.decompress(miembro, 16 + zlib.MAX_WBITS).decode('utf-8')
+    if not texto:
+        return []
+    # Una línea por producto: los saltos de línea dentro de un texto JSON van escapados
+    return [(datos['id'], datos['nombre'], datos['cantidad'], datos['precio'])
+            for datos in json.loads('[' + texto.rstrip('\n').replace('\n', ',') + ']')]
+
+
+def _en_orden(funcion: Callable, tareas: Iterable[tuple], procesos: Optional[int]) -> Iterator:
+    """Ejecuta funcion(*tarea) en un pool de procesos y devuelve los resultados en orden.
+
+    Solo hay unas pocas tareas pendientes a la vez, así que la memoria no
+    depende del tamaño del inventario.
+    """
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        limite = 2 * (procesos or os.cpu_count() or 1)
+        pendientes = collections.deque()
+        for tarea in tareas:
+            pendientes.append(pool.submit(funcion, *tarea))
+            if len(pendientes) >= limite:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+
+
+def escribir_comprimido(ruta: str, filas: Iterable[Fila], nivel: int = NIVEL, tam_bloque: int = TAM_BLOQUE,
+                        procesos: Optional[int] = None) -> int:
+    """Escribe las filas como JSON Lines comprimido en bloques independientes.
+
+    Cada bloque es un miembro gzip completo, así que el archivo se puede leer
+    con cualquier herramienta gzip (zcat da un producto por línea); el
+    tamaño de cada miembro va en su cabecera para poder repartirlos entre
+    procesos al cargar. Los bloques se comprimen en paralelo y se escribe en
+    un temporal que reemplaza al destino de forma atómica. Devuelve cuántas
+    filas escribió.
+    """
+    filas = iter(filas)
+    bloques = iter(lambda: list(itertools.islice(filas, tam_bloque)), [])
+    primeros = list(itertools.islice(bloques, BLOQUES_MINIMOS_PARALELO))
+    escritas = 0
+
+    def tareas():
+        nonlocal escritas
+        for bloque in itertools.chain(primeros, bloques):
+            escritas += len(bloque)
+            yield bloque, nivel
+
+    if len(primeros) < BLOQUES_MINIMOS_PARALELO or procesos == 1:
+        miembros = (_comprimir(*tarea) for tarea in tareas())
+    else:
+        miembros = _en_orden(_comprimir, tareas(), procesos)
+
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temporal, 'wb') as archivo:
+            vacio = True
+            for miembro in miembros:
+                archivo.write(miembro)
+                vacio = False
+            # Un archivo gzip vacío no es válido: sin productos queda un miembro vacío
+            if vacio:
+                archivo.write(_comprimir([], nivel))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return escritas
+
+
+def _miembros(archivo) -> Optional[List[Tuple[int, int]]]:
+    """Posición y tamaño de cada bloque, leyendo solo las cabeceras; None si el
+    archivo no está escrito por bloques (p. ej. se recomprimió con gzip)"""
+    total = os.fstat(archivo.fileno()).st_size
+    miembros = []
+    inicio = 0
+    while inicio < total:
+        archivo.seek(inicio)
+        cabecera = archivo.read(_CABECERA.size)
+        if len(cabecera) < _CABECERA.size:
+            return None
+        firma, _, banderas, _, _, _, extra, subcampo, longitud, tamaño = _CABECERA.unpack(cabecera)
+        if (firma != _FIRMA_GZIP or not banderas & _FEXTRA or extra != 8 or subcampo != _SUBCAMPO
+                or longitud != 4 or tamaño < _CABECERA.size + _COLA.size):
+            return None
+        miembros.append((inicio, tamaño))
+        inicio += tamaño
+    return miembros if inicio == total else None
+
+
+def leer_comprimido(ruta: str, procesos: Optional[int] = None) -> Iterator[Fila]:
+    """Recorre las filas de un archivo escrito con escribir_comprimido, descomprimiendo
+    los bloques en paralelo si son suficientes"""
+    with open(ruta, 'rb') as archivo:
+        miembros = _miembros(archivo)
+        if miembros is None:
+            # Cualquier otro gzip de JSON Lines se lee en serie, línea a línea
+            archivo.seek(0)
+            with gzip.open(archivo, 'rt', encoding='utf-8') as texto:
+                for linea in texto:
+                    if linea.strip():
+                        datos = json.loads(linea)
+                        yield datos['id'], datos['nombre'], datos['cantidad'], datos['precio']
+            return
+
+        def tareas():
+            for inicio, tamaño in miembros:
+                archivo.seek(inicio)
+                yield archivo.read(tamaño),
+
+        if len(miembros) < BLOQUES_MINIMOS_PARALELO or procesos == 1:
+            bloques = (_descomprimir(*tarea) for tarea in tareas())
+        else:
+            bloques = _en_orden(_descomprimir, tareas(), procesos)
+        for filas in bloques:
+            yield from filas
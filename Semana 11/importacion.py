@@ -0,0 +1,214 @@
+import csv
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+CAMPOS = ('id', 'nombre', 'cantidad', 'precio')
+# Filas que se leen y validan juntas
+TAM_LOTE = 10000
+# Rechazos que se guardan con su motivo (el total se cuenta siempre)
+MAX_RECHAZOS_GUARDADOS = 1000
+
+FORMATOS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+Fila = Tuple[int, Optional[Dict], Optional[str]]
+
+
+def detectar_formato(ruta: str) -> str:
+    """Deduce el formato ('csv' o 'jsonl') por la extensión del archivo"""
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension not in FORMATOS:
+        raise ValueError(f"Formato no reconocido para '{ruta}' (use .csv o .jsonl)")
+    return FORMATOS[extension]
+
+
+def leer_lotes(ruta: str, formato: str, tam_lote: int = TAM_LOTE) -> Iterator[List[Fila]]:
+    """Lee el archivo por lotes de filas (número de línea, datos, error de lectura)"""
+    lote: List[Fila] = []
+    for fila in _leer_filas(ruta, formato):
+        lote.append(fila)
+        if len(lote) >= tam_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _leer_filas(ruta: str, formato: str) -> Iterator[Fila]:
+    with open(ruta, 'r', encoding='utf-8', newline='') as archivo:
+        if formato == 'csv':
+            lector = csv.DictReader(archivo)
+            faltantes = [campo for campo in CAMPOS if campo not in (lector.fieldnames or ())]
+            if faltantes:
+                raise ValueError(f"Faltan columnas en el CSV: {', '.join(faltantes)}")
+            for datos in lector:
+                yield lector.line_num, datos, None
+        else:
+            for numero, linea in enumerate(archivo, 1):
+                if not linea.strip():
+                    continue
+                try:
+                    datos = json.loads(linea)
+                except json.JSONDecodeError as e:
+                    yield numero, None, f"JSON inválido: {e.msg}"
+                    continue
+                if not isinstance(datos, dict):
+                    yield numero, None, "La línea no es un objeto JSON"
+                    continue
+                yield numero, datos, None
+
+
+def _entero(valor) -> int:
+    if isinstance(valor, bool):
+        raise ValueError
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, str):
+        return int(valor.strip())
+    raise ValueError
+
+
+def _decimal(valor) -> float:
+    if isinstance(valor, bool):
+        raise ValueError
+    numero = float(valor.strip()) if isinstance(valor, str) else float(valor)
+    if not math.isfinite(numero):
+        raise ValueError
+    return numero
+
+
+def validar_fila(datos: Dict) -> Tuple[Optional[Tuple[int, str, int, float]], Optional[str]]:
+    """Convierte y valida una fila. Devuelve ((id, nombre, cantidad, precio), None) o (None, motivo)"""
+    try:
+        id = _entero(datos.get('id'))
+    except (TypeError, ValueError):
+        return None, "ID inválido"
+
+    nombre = datos.get('nombre')
+    nombre = nombre.strip() if isinstance(nombre, str) else ''
+    if not nombre:
+        return None, "Nombre vacío"
+
+    try:
+        cantidad = _entero(datos.get('cantidad'))
+    except (TypeError, ValueError):
+        return None, "Cantidad inválida"
+    try:
+        precio = _decimal(datos.get('precio'))
+    except (TypeError, ValueError):
+        return None, "Precio inválido"
+    if cantidad < 0 or precio < 0:
+        return None, "La cantidad y el precio deben ser positivos"
+
+    return (id, nombre, cantidad, precio), None
+
+
+class ResultadoImportacion:
+    """Resumen de una importación masiva"""
+
+    def __init__(self):
+        self.leidas = 0
+        self.aceptadas = 0
+        self.total_rechazadas = 0
+        # (línea, motivo) de las primeras MAX_RECHAZOS_GUARDADOS filas rechazadas
+        self.rechazadas: List[Tuple[int, str]] = []
+        self.segundos = 0.0
+        self.guardado: Optional[bool] = None
+
+    def rechazar(self, linea: int, motivo: str) -> None:
+        self.total_rechazadas += 1
+        if len(self.rechazadas) < MAX_RECHAZOS_GUARDADOS:
+            self.rechazadas.append((linea, motivo))
+
+    @property
+    def filas_por_segundo(self) -> float:
+        return self.leidas / self.segundos if self.segundos else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.leidas} filas leídas, {self.aceptadas} aceptadas, {self.total_rechazadas} rechazadas "
+                f"en {self.segundos:.2f}s ({self.filas_por_segundo:,.0f} filas/s)")
+
+
+def importar(ruta: str, ids_existentes, añadir_lote, eliminar, formato: Optional[str] = None,
+             tam_lote: int = TAM_LOTE) -> ResultadoImportacion:
+    """Valida y deduplica las filas del archivo en una sola pasada, lote a lote.
+
+    ids_existentes indica si un ID ya está en el inventario; añadir_lote
+    recibe las filas aceptadas de cada lote como (id, nombre, cantidad,
+    precio) en cuanto se ha leído, así que en memoria solo queda un lote de
+    filas más los IDs ya añadidos. Si la lectura falla a mitad de archivo
+    (p. ej. una codificación inválida) se llama a eliminar con cada uno de
+    esos IDs antes de que la excepción llegue al llamador: el inventario
+    queda como estaba.
+    """
+    formato = formato or detectar_formato(ruta)
+    resultado = ResultadoImportacion()
+    vistos: Dict[int, int] = {}  # ID -> línea donde apareció en este archivo
+    inicio = time.perf_counter()
+
+    try:
+        for lote in leer_lotes(ruta, formato, tam_lote):
+            aceptadas = []
+            for linea, datos, error in lote:
+                resultado.leidas += 1
+                if error is not None:
+                    resultado.rechazar(linea, error)
+                    continue
+
+                fila, motivo = validar_fila(datos)
+                if motivo is not None:
+                    resultado.rechazar(linea, motivo)
+                    continue
+
+                id = fila[0]
+                if id in vistos:
+                    resultado.rechazar(linea, f"ID {id} repetido (línea {vistos[id]})")
+                    continue
+                if ids_existentes(id):
+                    resultado.rechazar(linea, f"ID {id} ya existe en el inventario")
+                    continue
+
+                vistos[id] = linea
+                aceptadas.append(fila)
+
+            if aceptadas:
+                añadir_lote(aceptadas)
+                resultado.aceptadas += len(aceptadas)
+    except BaseException:
+        # Los IDs del lote que no llegó a añadirse no están en el inventario: eliminar no hace nada
+        for id in vistos:
+            eliminar(id)
+        raise
+
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+def exportar(ruta: str, filas: Iterable[Dict], formato: Optional[str] = None) -> int:
+    """Escribe las filas (diccionarios con CAMPOS) de una en una; devuelve cuántas escribió"""
+    formato = formato or detectar_formato(ruta)
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    escritas = 0
+    try:
+        with open(temporal, 'w', encoding='utf-8', newline='', buffering=1024 * 1024) as archivo:
+            if formato == 'csv':
+                escritor = csv.DictWriter(archivo, fieldnames=CAMPOS)
+                escritor.writeheader()
+                for fila in filas:
+                    escritor.writerow(fila)
+                    escritas += 1
+            else:
+                codificador = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+                for fila in filas:
+                    archivo.write(codificador.encode(fila))
+                    archivo.write('\n')
+                    escritas += 1
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return escritas
@@ -0,0 +1,338 @@
+import unicodedata
+from collections import OrderedDict, defaultdict
+from typing import Dict, Hashable, List, Set, Tuple
+
+# El índice ordenado es común con la Semana 10 (carpeta Compartido)
+from indice_ordenado import IndiceOrdenado
+
+
+def trigramas(texto: str) -> Set[str]:
+    """Devuelve el conjunto de subcadenas de tres caracteres de un texto"""
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceTrigramas:
+    """Índice de búsqueda por subcadena basado en trigramas.
+
+    Guarda, para cada trigrama, los IDs de los productos cuyo nombre (en
+    minúsculas) lo contiene. Una consulta solo verifica los productos que
+    tienen todos los trigramas de la consulta, en lugar de todo el catálogo.
+    Los trigramas de los productos añadidos se calculan en la siguiente
+    búsqueda, todos de una vez, para que cargar el inventario no pague ese
+    coste producto a producto.
+    """
+
+    def __init__(self):
+        self._publicaciones: Dict[str, Set[Hashable]] = defaultdict(set)
+        # ID -> nombre en minúsculas, en el orden en que se añadieron
+        self._nombres: Dict[Hashable, str] = {}
+        self._posiciones: Dict[Hashable, int] = {}
+        self._contador = 0
+        # IDs cuyos trigramas aún no están en _publicaciones
+        self._pendientes: Set[Hashable] = set()
+
+    def __len__(self) -> int:
+        return len(self._nombres)
+
+    def añadir(self, id: Hashable, nombre: str) -> None:
+        """Indexa el nombre de un producto"""
+        self._posiciones[id] = self._contador
+        self._contador += 1
+        self._nombres[id] = nombre.lower()
+        self._pendientes.add(id)
+
+    def eliminar(self, id: Hashable) -> None:
+        """Quita un producto del índice"""
+        if id in self._nombres:
+            if id in self._pendientes:
+                self._pendientes.discard(id)
+            else:
+                self._desindexar(id)
+            del self._nombres[id]
+            del self._posiciones[id]
+
+    def renombrar(self, id: Hashable, nombre: str) -> None:
+        """Actualiza el nombre de un producto conservando su posición"""
+        if id in self._nombres:
+            if id in self._pendientes:
+                self._nombres[id] = nombre.lower()
+            else:
+                self._desindexar(id)
+                self._indexar(id, nombre.lower())
+
+    def buscar(self, consulta: str) -> List[Hashable]:
+        """IDs cuyo nombre contiene la consulta (sin distinguir mayúsculas),
+        en el orden en que se añadieron los productos"""
+        consulta = consulta.lower()
+
+        # Consultas de menos de tres caracteres: recorrido de los nombres ya normalizados
+        if len(consulta) < 3:
+            return [id for id, nombre in self._nombres.items() if consulta in nombre]
+
+        self._indexar_pendientes()
+        # Se intersecan las listas empezando por la más corta
+        publicaciones = sorted((self._publicaciones.get(trigrama, set())
+                                for trigrama in trigramas(consulta)), key=len)
+        candidatos = set(publicaciones[0])
+        for publicacion in publicaciones[1:]:
+            if not candidatos:
+                break
+            candidatos &= publicacion
+
+        # Todos los trigramas presentes no garantizan que estén seguidos: se verifica
+        encontrados = [id for id in candidatos if consulta in self._nombres[id]]
+        encontrados.sort(key=self._posiciones.__getitem__)
+        return encontrados
+
+    def _indexar(self, id: Hashable, nombre: str) -> None:
+        self._nombres[id] = nombre
+        for trigrama in trigramas(nombre):
+            self._publicaciones[trigrama].add(id)
+
+    def _indexar_pendientes(self) -> None:
+        """Añade a las publicaciones los IDs pendientes, agrupados por trigrama"""
+        if not self._pendientes:
+            return
+        nuevas: Dict[str, List[Hashable]] = defaultdict(list)
+        nombres = self._nombres
+        for id in self._pendientes:
+            nombre = nombres[id]
+            for posicion in range(len(nombre) - 2):
+                nuevas[nombre[posicion:posicion + 3]].append(id)
+        publicaciones = self._publicaciones
+        for trigrama, ids in nuevas.items():
+            publicaciones[trigrama].update(ids)
+        self._pendientes.clear()
+
+    def _desindexar(self, id: Hashable) -> None:
+        for trigrama in trigramas(self._nombres[id]):
+            publicacion = self._publicaciones[trigrama]
+            publicacion.discard(id)
+            if not publicacion:
+                del self._publicaciones[trigrama]
+
+
+def normalizar(texto: str) -> str:
+    """Pasa el texto a minúsculas (casefold), quita tildes y une los espacios repetidos"""
+    if texto.isascii():
+        return ' '.join(texto.lower().split())
+    descompuesto = unicodedata.normalize('NFKD', texto.casefold())
+    sin_tildes = ''.join(caracter for caracter in descompuesto if not unicodedata.combining(caracter))
+    return ' '.join(sin_tildes.split())
+
+
+def distancia_edicion(a: str, b: str) -> int:
+    """Distancia de Levenshtein entre dos textos.
+
+    Usa el algoritmo de vectores de bits de Myers (formulación de Hyyrö):
+    cada columna de la tabla de programación dinámica se calcula con unas
+    pocas operaciones sobre enteros en lugar de un bucle por celda.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    largo = len(b)
+    mascara = (1 << largo) - 1
+    ultimo = 1 << (largo - 1)
+    coincidencias: Dict[str, int] = {}
+    for posicion, caracter in enumerate(b):
+        coincidencias[caracter] = coincidencias.get(caracter, 0) | (1 << posicion)
+
+    positivos = mascara  # diferencias verticales +1
+    negativos = 0        # diferencias verticales -1
+    distancia = largo
+    for caracter in a:
+        iguales = coincidencias.get(caracter, 0)
+        xv = iguales | negativos
+        xh = (((iguales & positivos) + positivos) ^ positivos) | iguales
+        horizontales_pos = negativos | (~(xh | positivos) & mascara)
+        horizontales_neg = positivos & xh
+        if horizontales_pos & ultimo:
+            distancia += 1
+        elif horizontales_neg & ultimo:
+            distancia -= 1
+        horizontales_pos = ((horizontales_pos << 1) | 1) & mascara
+        horizontales_neg = (horizontales_neg << 1) & mascara
+        positivos = horizontales_neg | (~(xv | horizontales_pos) & mascara)
+        negativos = horizontales_pos & xv
+    return distancia
+
+
+class ArbolBK:
+    """Árbol BK: índice métrico para buscar claves a una distancia de edición máxima.
+
+    Por la desigualdad triangular, de cada nodo solo hace falta visitar los
+    hijos cuya distancia al nodo está en [d - máximo, d + máximo].
+    """
+
+    def __init__(self):
+        # Cada nodo es (clave, {distancia: nodo hijo})
+        self._raiz = None
+        self._claves: Set[str] = set()
+
+    def __contains__(self, clave: str) -> bool:
+        return clave in self._claves
+
+    def añadir(self, clave: str) -> None:
+        if clave in self._claves:
+            return
+        self._claves.add(clave)
+        if self._raiz is None:
+            self._raiz = (clave, {})
+            return
+
+        nodo = self._raiz
+        while True:
+            distancia = distancia_edicion(clave, nodo[0])
+            hijo = nodo[1].get(distancia)
+            if hijo is None:
+                nodo[1][distancia] = (clave, {})
+                return
+            nodo = hijo
+
+    def buscar(self, clave: str, distancia_maxima: int) -> List[Tuple[int, str]]:
+        """Devuelve (distancia, clave) de todas las claves a distancia <= distancia_maxima"""
+        resultados = []
+        pendientes = [self._raiz] if self._raiz is not None else []
+        while pendientes:
+            nodo = pendientes.pop()
+            distancia = distancia_edicion(clave, nodo[0])
+            if distancia <= distancia_maxima:
+                resultados.append((distancia, nodo[0]))
+            for distancia_hijo, hijo in nodo[1].items():
+                if distancia - distancia_maxima <= distancia_hijo <= distancia + distancia_maxima:
+                    pendientes.append(hijo)
+        return resultados
+
+
+class IndiceAproximado:
+    """Búsqueda tolerante a errores de escritura y a tildes.
+
+    Cada producto se indexa una sola vez por su nombre normalizado y por cada
+    palabra del nombre; las claves van a un árbol BK compartido. Los nombres
+    se normalizan y las claves nuevas se insertan en el árbol en la siguiente
+    búsqueda, para que añadir productos (por ejemplo al cargar el inventario
+    o en una importación masiva) no pague ese coste.
+    """
+
+    def __init__(self):
+        self._arbol = ArbolBK()
+        self._pendientes: Set[str] = set()
+        # ID -> nombre de los productos añadidos o renombrados que aún no se han indexado
+        self._sin_indexar: Dict[Hashable, str] = {}
+        self._ids_por_clave: Dict[str, Set[Hashable]] = defaultdict(set)
+        self._claves_por_id: Dict[Hashable, Set[str]] = {}
+        self._posiciones: Dict[Hashable, int] = {}
+        self._contador = 0
+
+    def añadir(self, id: Hashable, nombre: str) -> None:
+        self._posiciones[id] = self._contador
+        self._contador += 1
+        self._sin_indexar[id] = nombre
+
+    def eliminar(self, id: Hashable) -> None:
+        if id in self._posiciones:
+            if self._sin_indexar.pop(id, None) is None:
+                self._desindexar(id)
+            del self._posiciones[id]
+
+    def renombrar(self, id: Hashable, nombre: str) -> None:
+        if id in self._posiciones:
+            if id not in self._sin_indexar:
+                self._desindexar(id)
+            self._sin_indexar[id] = nombre
+
+    def buscar(self, consulta: str, distancia_maxima: int = 2) -> List[Hashable]:
+        """IDs de los productos con alguna clave cercana a la consulta,
+        ordenados por distancia y luego por orden de inserción"""
+        consulta = normalizar(consulta)
+        if not consulta:
+            return []
+
+        # Los nombres repetidos se normalizan una sola vez
+        normalizados: Dict[str, str] = {}
+        for id, nombre in self._sin_indexar.items():
+            normalizado = normalizados.get(nombre)
+            if normalizado is None:
+                normalizado = normalizados[nombre] = normalizar(nombre)
+            self._indexar(id, normalizado)
+        self._sin_indexar.clear()
+
+        for clave in self._pendientes:
+            if clave in self._ids_por_clave:
+                self._arbol.añadir(clave)
+        self._pendientes.clear()
+
+        mejores: Dict[Hashable, int] = {}
+        for distancia, clave in self._arbol.buscar(consulta, distancia_maxima):
+            # Las claves que ya no tiene ningún producto siguen en el árbol, pero vacías
+            for id in self._ids_por_clave.get(clave, ()):
+                if distancia < mejores.get(id, distancia_maxima + 1):
+                    mejores[id] = distancia
+        return sorted(mejores, key=lambda id: (mejores[id], self._posiciones[id]))
+
+    def _indexar(self, id: Hashable, normalizado: str) -> None:
+        claves = set(normalizado.split())
+        if normalizado:
+            claves.add(normalizado)
+        self._claves_por_id[id] = claves
+        for clave in claves:
+            self._ids_por_clave[clave].add(id)
+            if clave not in self._arbol:
+                self._pendientes.add(clave)
+
+    def _desindexar(self, id: Hashable) -> None:
+        for clave in self._claves_por_id.pop(id):
+            ids = self._ids_por_clave[clave]
+            ids.discard(id)
+            if not ids:
+                del self._ids_por_clave[clave]
+
+
+class CacheLRU:
+    """Caché de resultados acotada que desaloja primero lo usado hace más tiempo.
+
+    Cada entrada guarda la generación del inventario con la que se calculó;
+    si el inventario cambió desde entonces la entrada no se sirve.
+    """
+
+    def __init__(self, capacidad: int = 256):
+        self.capacidad = capacidad
+        self._entradas: 'OrderedDict[Hashable, Tuple[int, object]]' = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def obtener(self, clave: Hashable, generacion: int):
+        """Devuelve el valor guardado para la clave, o None si no está o está obsoleto"""
+        entrada = self._entradas.get(clave)
+        if entrada is None or entrada[0] != generacion:
+            self.fallos += 1
+            return None
+        self._entradas.move_to_end(clave)
+        self.aciertos += 1
+        return entrada[1]
+
+    def guardar(self, clave: Hashable, generacion: int, valor) -> None:
+        self._entradas[clave] = (generacion, valor)
+        self._entradas.move_to_end(clave)
+        if len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+            self.desalojos += 1
+
+    def vaciar(self) -> None:
+        self._entradas.clear()
+
+    def estadisticas(self) -> Dict[str, int]:
+        return {
+            'entradas': len(self._entradas),
+            'capacidad': self.capacidad,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'desalojos': self.desalojos,
+        }
@@ -0,0 +1,175 @@
+import weakref
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# Con menos entradas que esta, la lista de posiciones no se compacta aunque
+# la mayoría sean de productos ya eliminados
+_MINIMO_COMPACTAR = 1024
+
+
+class EstadoProducto(NamedTuple):
+    """Valores de un producto tal como estaban al abrir una instantánea"""
+    id: int
+    nombre: str
+    cantidad: int
+    precio: float
+
+    def to_dict(self) -> Dict:
+        return {'id': self.id, 'nombre': self.nombre, 'cantidad': self.cantidad, 'precio': self.precio}
+
+
+# Sin pasar por el __new__ generado por NamedTuple, que tarda el doble
+_nueva_tupla = tuple.__new__
+
+
+def _estado(producto) -> EstadoProducto:
+    return _nueva_tupla(EstadoProducto, (producto._id, producto._nombre, producto._cantidad, producto._precio))
+
+
+class Instantanea:
+    """Vista inmutable del inventario en el momento en que se abrió.
+
+    No copia los productos: lee los del inventario y, para los que se
+    modificaron o eliminaron después, el estado anterior que el inventario
+    le entregó justo antes de cambiarlos. Ocupa memoria solo por los
+    productos que cambian mientras está abierta, y se puede recorrer desde
+    otro hilo durante tanto tiempo como haga falta sin frenar las escrituras.
+    """
+
+    def __init__(self, productos: Dict, orden: List, resumen: Dict[str, Union[int, float]], generacion: int):
+        self._productos = productos
+        # Lista de IDs por posición de alta: solo crece mientras haya instantáneas
+        # abiertas, así que las primeras _limite posiciones no cambian
+        self._orden = orden
+        self._limite = len(orden)
+        self._resumen = resumen
+        self.generacion = generacion
+        # ID -> (estado al abrir la instantánea, posición que tenía entonces)
+        self._anteriores: Dict[int, Tuple[EstadoProducto, int]] = {}
+        self._abierta = True
+
+    def _conservar(self, producto) -> None:
+        """Anota el estado del producto si es la primera vez que cambia desde la apertura"""
+        if self._abierta and producto._id not in self._anteriores and producto._posicion < self._limite:
+            self._anteriores[producto._id] = (_estado(producto), producto._posicion)
+
+    def _leer(self, id: int, posicion: Optional[int]) -> Optional[EstadoProducto]:
+        """Estado del ID al abrir la instantánea (None si no estaba); con posicion,
+        solo si ocupaba esa posición"""
+        # Primero el producto vivo y después lo conservado: el inventario conserva
+        # antes de modificar, así que si la lectura vio un cambio, ya está anotado
+        producto = self._productos.get(id)
+        actual = None
+        if producto is not None and (producto._posicion == posicion if posicion is not None
+                                     else producto._posicion < self._limite):
+            actual = _estado(producto)
+        anterior = self._anteriores.get(id)
+        if anterior is not None:
+            estado, posicion_anterior = anterior
+            return estado if posicion is None or posicion_anterior == posicion else None
+        return actual
+
+    def _comprobar_abierta(self) -> None:
+        if not self._abierta:
+            raise ValueError("La instantánea está cerrada")
+
+    def __len__(self) -> int:
+        return self._resumen['productos']
+
+    def __iter__(self) -> Iterator[EstadoProducto]:
+        """Recorre los productos en el orden en que se añadieron al inventario"""
+        self._comprobar_abierta()
+        # Lo mismo que _leer(), desplegado: es el bucle de todos los informes
+        productos = self._productos
+        anteriores = self._anteriores
+        orden = self._orden
+        for posicion in range(self._limite):
+            id = orden[posicion]
+            producto = productos.get(id)
+            if producto is not None and producto._posicion == posicion:
+                estado = _nueva_tupla(EstadoProducto, (id, producto._nombre, producto._cantidad, producto._precio))
+            else:
+                estado = None
+            anterior = anteriores.get(id)
+            if anterior is not None:
+                estado = anterior[0] if anterior[1] == posicion else None
+            # Se comprueba después de leer: cerrar() marca la instantánea antes
+            # de soltar los estados conservados
+            if not self._abierta:
+                self._comprobar_abierta()
+            if estado is not None:
+                yield estado
+
+    def obtener(self, id: int) -> Optional[EstadoProducto]:
+        """Estado del producto al abrir la instantánea, o None si no existía"""
+        estado = self._leer(id, None)
+        self._comprobar_abierta()
+        return estado
+
+    def resumen(self) -> Dict[str, Union[int, float]]:
+        """Totales del inventario al abrir la instantánea"""
+        return dict(self._resumen)
+
+    def conservados(self) -> int:
+        """Cuántos productos cambiaron desde la apertura (estados guardados aparte)"""
+        return len(self._anteriores)
+
+    def cerrar(self) -> None:
+        """Libera los estados conservados; el inventario deja de anotar cambios para ella"""
+        self._abierta = False
+        self._anteriores = {}
+
+    def __enter__(self) -> 'Instantanea':
+        return self
+
+    def __exit__(self, *excepcion) -> None:
+        self.cerrar()
+
+
+class RegistroVersiones:
+    """Lo que el inventario necesita para abrir instantáneas en O(1).
+
+    Cada producto recibe al entrar la siguiente posición de una lista de IDs
+    que solo crece; una instantánea recuerda hasta qué posición llegaba. Las
+    instantáneas abiertas se guardan por referencia débil: una que nadie
+    usa deja de recibir estados sin tener que cerrarla.
+    """
+
+    def __init__(self):
+        self._orden: List[int] = []
+        self._abiertas = weakref.WeakSet()
+
+    def _instantaneas(self) -> List[Instantanea]:
+        """Instantáneas abiertas; descarta las cerradas"""
+        abiertas = list(self._abiertas)
+        for instantanea in abiertas:
+            if not instantanea._abierta:
+                self._abiertas.discard(instantanea)
+        return [instantanea for instantanea in abiertas if instantanea._abierta]
+
+    def abrir(self, productos: Dict, resumen: Dict[str, Union[int, float]], generacion: int) -> Instantanea:
+        instantanea = Instantanea(productos, self._orden, resumen, generacion)
+        self._abiertas.add(instantanea)
+        return instantanea
+
+    def alta(self, producto) -> None:
+        """Asigna posición a un producto que entra en el inventario"""
+        producto._posicion = len(self._orden)
+        self._orden.append(producto._id)
+
+    def conservar(self, producto) -> None:
+        """Se llama justo antes de modificar o eliminar un producto del inventario"""
+        if self._abiertas:
+            for instantanea in self._instantaneas():
+                instantanea._conservar(producto)
+
+    def compactar(self, productos: Dict) -> None:
+        """Quita de la lista las posiciones de productos eliminados si son mayoría.
+
+        Renumerar cambiaría lo que ven las instantáneas abiertas, así que
+        solo se hace cuando no hay ninguna.
+        """
+        if len(self._orden) <= 2 * len(productos) + _MINIMO_COMPACTAR or (self._abiertas and self._instantaneas()):
+            return
+        self._orden = list(productos)
+        for posicion, producto in enumerate(productos.values()):
+            producto._posicion = posicion
@@ -0,0 +1,317 @@
+import asyncio
+import collections
+import itertools
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Socket Unix por el que el inventario principal publica sus cambios
+RUTA_SOCKET = "inventario.sock"
+# Cambios que se conservan en memoria para que una réplica que se reconecta
+# continúe donde lo dejó; si se quedó más atrás recibe una copia completa
+TAM_HISTORIAL = 100_000
+# Segundos sin cambios tras los que se envía un latido con la última secuencia
+INTERVALO_LATIDO = 1.0
+# Segundos que espera una réplica antes de volver a conectarse
+ESPERA_RECONEXION = 0.5
+# Filas por escritura al enviar una copia completa
+TAM_LOTE_COPIA = 1000
+# Una línea más larga que esto se considera un error del otro extremo
+TAM_MAXIMO_LINEA = 1024 * 1024
+# Los sockets Unix no existen en todos los sistemas (p. ej. en algunas versiones de Windows)
+SOCKETS_UNIX = hasattr(socket, "AF_UNIX")
+
+
+def _comprobar_sockets_unix() -> None:
+    if not SOCKETS_UNIX:
+        raise OSError("La replicación necesita sockets Unix y este sistema no los tiene")
+
+
+def _codificar(mensaje: Dict) -> bytes:
+    return (json.dumps(mensaje, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class FlujoCambios:
+    """Cambios de un inventario numerados de forma consecutiva.
+
+    El inventario publica cada alta, modificación, baja o vaciado ya
+    codificado como una línea JSON; los últimos TAM_HISTORIAL se conservan
+    para las réplicas. origen distingue este flujo del de otra ejecución del
+    programa, cuyas secuencias vuelven a empezar en 1.
+    """
+
+    def __init__(self, tam_historial: int = TAM_HISTORIAL):
+        self.origen = os.urandom(8).hex()
+        self.ultima = 0
+        # Solo las líneas: la secuencia de cada una se deduce de su posición
+        self._historial = collections.deque(maxlen=tam_historial)
+        self._condicion = threading.Condition()
+
+    def publicar(self, cambio: Dict) -> None:
+        """Numera el cambio, lo guarda en el historial y avisa a quien espera"""
+        with self._condicion:
+            self.ultima += 1
+            cambio['secuencia'] = self.ultima
+            cambio['hora'] = time.time()
+            self._historial.append(_codificar(cambio))
+            self._condicion.notify_all()
+
+    def siguientes(self, secuencia: int, espera: float) -> Optional[List[bytes]]:
+        """Líneas de los cambios posteriores a secuencia, esperando hasta espera
+        segundos si aún no hay ninguno; None si ya no están en el historial"""
+        with self._condicion:
+            self._condicion.wait_for(lambda: self.ultima != secuencia, espera)
+            faltan = self.ultima - secuencia
+            if faltan < 0 or faltan > len(self._historial):
+                return None
+            # Se toman desde el final: una réplica al día solo pide los últimos
+            return list(itertools.islice(reversed(self._historial), faltan))[::-1]
+
+
+class _Manejador(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        self.server.publicador._atender(self.request, self.rfile, self.wfile)
+
+
+if SOCKETS_UNIX:
+    class _ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+        block_on_close = False
+
+
+class PublicadorCambios:
+    """Envía el flujo de cambios de un inventario a las réplicas conectadas a un socket Unix.
+
+    Cada réplica abre la conexión con {"desde": secuencia, "origen": ...}
+    y recibe, una por línea, los cambios posteriores. Si esos cambios ya no
+    están en el historial (o es otro origen) recibe antes una copia completa:
+    {"op": "copia", "secuencia": S, "productos": N} seguida de N filas
+    [id, nombre, cantidad, precio]. Sin cambios, cada INTERVALO_LATIDO llega
+    {"op": "latido", "secuencia": ...} para que la réplica sepa cuánto le falta.
+    Cada conexión se atiende en un hilo; el inventario no espera a ninguna.
+    """
+
+    def __init__(self, inventario, flujo: FlujoCambios, ruta: str = RUTA_SOCKET):
+        self.inventario = inventario
+        self.flujo = flujo
+        self.ruta = ruta
+        self._servidor: Optional[socketserver.BaseServer] = None
+        self._conexiones = set()
+        self._detenido = threading.Event()
+
+    def iniciar(self) -> None:
+        """Empieza a aceptar réplicas en un hilo aparte; OSError si no hay sockets Unix"""
+        _comprobar_sockets_unix()
+        self._quitar_socket_abandonado()
+        self._detenido.clear()
+        self._servidor = _ServidorUnix(self.ruta, _Manejador)
+        self._servidor.publicador = self
+        threading.Thread(target=self._servidor.serve_forever, name="publicador-cambios", daemon=True).start()
+
+    def _quitar_socket_abandonado(self) -> None:
+        """Borra el socket que quedó de una ejecución anterior, que impediría escuchar.
+
+        Solo se borra si es un socket y nadie responde en él; si es otro tipo de
+        archivo o hay un inventario principal publicando, OSError.
+        """
+        try:
+            modo = os.stat(self.ruta).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(modo):
+            raise OSError(f"{self.ruta} ya existe y no es un socket")
+        prueba = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            prueba.connect(self.ruta)
+        except (ConnectionRefusedError, FileNotFoundError):
+            try:
+                os.remove(self.ruta)
+            except FileNotFoundError:
+                pass
+            return
+        finally:
+            prueba.close()
+        raise OSError(f"Ya hay un inventario principal publicando en {self.ruta}")
+
+    def detener(self) -> None:
+        """Deja de aceptar réplicas y corta las conexiones abiertas"""
+        if self._servidor is None:
+            return
+        self._detenido.set()
+        self._servidor.shutdown()
+        self._servidor.server_close()
+        self._servidor = None
+        for conexion in list(self._conexiones):
+            try:
+                conexion.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
+
+    def _atender(self, conexion: socket.socket, lectura, escritura) -> None:
+        self._conexiones.add(conexion)
+        try:
+            linea = lectura.readline(TAM_MAXIMO_LINEA)
+            if not linea:
+                return  # se cerró sin saludar (p. ej. otro principal comprobando si este sigue activo)
+            saludo = json.loads(linea)
+            secuencia = saludo.get('desde') if saludo.get('origen') == self.flujo.origen else None
+            while not self._detenido.is_set():
+                lineas = self.flujo.siguientes(secuencia, INTERVALO_LATIDO) if secuencia is not None else None
+                if lineas is None:
+                    secuencia = self._enviar_copia(escritura)
+                elif lineas:
+                    escritura.writelines(lineas)
+                    secuencia += len(lineas)
+                else:
+                    escritura.write(_codificar({'op': 'latido', 'secuencia': secuencia, 'hora': time.time()}))
+                escritura.flush()
+        except (OSError, ValueError, AttributeError):
+            # La réplica se desconectó o envió un saludo que no es JSON
+            pass
+        finally:
+            self._conexiones.discard(conexion)
+
+    def _enviar_copia(self, escritura) -> int:
+        """Envía todos los productos y devuelve la secuencia desde la que continuar.
+
+        No se detiene al inventario: la secuencia se lee antes de tomar los
+        productos, así que la copia refleja ese punto o uno posterior, y los
+        cambios que siguen son valores absolutos que la réplica puede volver
+        a aplicar sin que el resultado cambie.
+        """
+        secuencia = self.flujo.ultima
+        # list() sobre los valores de un diccionario no cede el GIL: es una copia coherente de las referencias
+        productos = list(self.inventario._productos.values())
+        escritura.write(_codificar({'op': 'copia', 'origen': self.flujo.origen, 'secuencia': secuencia,
+                                    'productos': len(productos), 'hora': time.time()}))
+        for inicio in range(0, len(productos), TAM_LOTE_COPIA):
+            escritura.write(b''.join(
+                _codificar([p.get_id(), p.get_nombre(), p.get_cantidad(), p.get_precio()])
+                for p in productos[inicio:inicio + TAM_LOTE_COPIA]))
+        return secuencia
+
+
+class Seguidor:
+    """Réplica de solo lectura: aplica a su propio inventario los cambios de un PublicadorCambios.
+
+    Se ejecuta como tarea de asyncio en el mismo bucle que atiende las
+    consultas, así que cada cambio se aplica entero entre dos consultas.
+    Si la conexión se corta vuelve a conectarse y continúa desde la última
+    secuencia aplicada.
+    """
+
+    def __init__(self, inventario, fabrica_producto: Callable, ruta: str = RUTA_SOCKET):
+        _comprobar_sockets_unix()
+        self.inventario = inventario
+        self.fabrica_producto = fabrica_producto
+        self.ruta = ruta
+        self.origen: Optional[str] = None
+        self.secuencia = 0
+        # Última secuencia que se sabe publicada por el principal
+        self.secuencia_principal = 0
+        # Segundos entre que el principal publicó el último cambio aplicado y su aplicación
+        self.retraso: Optional[float] = None
+        self.conectado = False
+        self.conexiones = 0
+        self.copias = 0
+        self.aplicados = 0
+
+    def estado(self) -> Dict:
+        """Cuánto va por detrás la réplica: en cambios y en segundos"""
+        return {
+            'conectado': self.conectado,
+            'secuencia': self.secuencia,
+            'pendientes': max(0, self.secuencia_principal - self.secuencia),
+            'retraso_segundos': self.retraso,
+            'aplicados': self.aplicados,
+            'copias': self.copias,
+            'reconexiones': max(0, self.conexiones - 1),
+        }
+
+    async def ejecutar(self) -> None:
+        """Sigue al principal hasta que se cancela la tarea"""
+        while True:
+            try:
+                lector, escritor = await asyncio.open_unix_connection(self.ruta, limit=TAM_MAXIMO_LINEA)
+            except OSError:
+                await asyncio.sleep(ESPERA_RECONEXION)
+                continue
+            self.conectado = True
+            self.conexiones += 1
+            try:
+                escritor.write(_codificar({'desde': self.secuencia, 'origen': self.origen}))
+                await self._seguir(lector)
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                self.conectado = False
+                escritor.close()
+            await asyncio.sleep(ESPERA_RECONEXION)
+
+    async def _seguir(self, lector: asyncio.StreamReader) -> None:
+        while True:
+            linea = await lector.readline()
+            if not linea:
+                return
+            mensaje = json.loads(linea)
+            if mensaje['op'] == 'copia':
+                await self._recibir_copia(lector, mensaje)
+            elif mensaje['op'] == 'latido':
+                self.secuencia_principal = max(self.secuencia_principal, mensaje['secuencia'])
+            else:
+                self.aplicar(mensaje)
+
+    async def _recibir_copia(self, lector: asyncio.StreamReader, cabecera: Dict) -> None:
+        # Se reúne la copia entera antes de tocar el inventario: las consultas
+        # siguen viendo el estado anterior mientras llega
+        filas = []
+        for _ in range(cabecera['productos']):
+            linea = await lector.readline()
+            if not linea:
+                raise ValueError("Copia incompleta")
+            filas.append(json.loads(linea))
+        self.inventario._vaciar()
+        self.inventario._añadir_lote([self.fabrica_producto(*fila) for fila in filas])
+        self.origen = cabecera['origen']
+        self.secuencia = cabecera['secuencia']
+        self.secuencia_principal = max(self.secuencia_principal, self.secuencia)
+        self.retraso = time.time() - cabecera['hora']
+        self.copias += 1
+
+    def aplicar(self, cambio: Dict) -> None:
+        """Aplica un cambio del flujo; los ya aplicados (secuencia menor o igual) se ignoran.
+
+        Los cambios llevan valores absolutos, así que aplicar de nuevo uno que
+        la copia ya reflejaba deja el mismo resultado.
+        """
+        if cambio['secuencia'] <= self.secuencia:
+            return
+        inventario = self.inventario
+        operacion = cambio['op']
+        if operacion == 'añadir':
+            inventario.añadir_producto(self.fabrica_producto(cambio['id'], cambio['nombre'],
+                                                             cambio['cantidad'], cambio['precio']))
+        elif operacion == 'eliminar':
+            inventario.eliminar_producto(cambio['id'])
+        elif operacion == 'actualizar':
+            producto = inventario.obtener_producto_por_id(cambio['id'])
+            if producto is not None:
+                if 'nombre' in cambio:
+                    producto.set_nombre(cambio['nombre'])
+                if 'cantidad' in cambio:
+                    producto.set_cantidad(cambio['cantidad'])
+                if 'precio' in cambio:
+                    producto.set_precio(cambio['precio'])
+        elif operacion == 'vaciar':
+            inventario._vaciar()
+        self.secuencia = cambio['secuencia']
+        self.secuencia_principal = max(self.secuencia_principal, self.secuencia)
+        self.retraso = time.time() - cambio['hora']
+        self.aplicados += 1
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import math
+import signal
+from typing import Callable, Dict, Optional
+
+from importacion import validar_fila
+
+PUERTO = 8765
+# Segundos entre guardados automáticos (solo si hubo cambios)
+INTERVALO_GUARDADO = 5.0
+# Una petición más larga que esto se considera un error del cliente
+TAM_MAXIMO_LINEA = 1024 * 1024
+# Resultados que devuelve como máximo una búsqueda si no se indica 'limite'
+LIMITE_RESULTADOS = 100
+
+LECTURAS = {'obtener', 'buscar', 'buscar_aproximado', 'rango_precio', 'rango_cantidad', 'resumen', 'replicacion'}
+ESCRITURAS = {'añadir', 'actualizar', 'eliminar'}
+
+
+class PeticionInvalida(ValueError):
+    """La petición no tiene los campos o valores esperados"""
+
+
+def _entero_no_negativo(valor, campo: str) -> int:
+    if isinstance(valor, bool) or not isinstance(valor, int) or valor < 0:
+        raise PeticionInvalida(f"'{campo}' debe ser un entero no negativo")
+    return valor
+
+
+def _numero_no_negativo(valor, campo: str) -> float:
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not math.isfinite(valor) or valor < 0:
+        raise PeticionInvalida(f"'{campo}' debe ser un número no negativo")
+    return valor
+
+
+class ServidorInventario:
+    """Servicio de red sobre un Inventario: JSON por líneas sobre TCP.
+
+    Cada línea es una petición {"op": ..., ...} y recibe una línea de
+    respuesta {"ok": true, "resultado": ...} o {"ok": false, "error": ...},
+    en el mismo orden, así que un cliente puede enviar varias seguidas sin
+    esperar (pipelining). Las lecturas se atienden directamente en el bucle
+    de eventos y se intercalan entre conexiones; las escrituras pasan de una
+    en una por un cerrojo, que también toma el guardado en segundo plano para
+    escribir un estado coherente sin bloquear las lecturas.
+
+    Con un seguidor (replicacion.Seguidor) el servidor es una réplica de
+    solo lectura: el inventario cambia solo por el flujo del principal, que
+    se aplica en el mismo bucle de eventos, y las escrituras se rechazan.
+    """
+
+    def __init__(self, inventario, fabrica_producto: Callable, guardar: Optional[Callable[[], bool]] = None,
+                 intervalo_guardado: float = INTERVALO_GUARDADO, seguidor=None):
+        self.inventario = inventario
+        self.fabrica_producto = fabrica_producto
+        # Función que persiste el inventario (se ejecuta en un hilo aparte)
+        self.guardar_inventario = guardar
+        self.seguidor = seguidor
+        self.intervalo_guardado = intervalo_guardado
+        self._cerrojo_escritura = asyncio.Lock()
+        self._sucio = False
+        self.conexiones = 0
+        self.peticiones = 0
+
+    async def iniciar(self, host: str = "0.0.0.0", puerto: int = PUERTO) -> asyncio.AbstractServer:
+        """Empieza a aceptar conexiones y devuelve el servidor de asyncio"""
+        return await asyncio.start_server(self._atender, host, puerto, limit=TAM_MAXIMO_LINEA,
+                                          backlog=1024)
+
+    async def ejecutar(self, host: str = "0.0.0.0", puerto: int = PUERTO) -> None:
+        """Atiende peticiones hasta que se cancela; guarda periódicamente y al terminar"""
+        servidor = await self.iniciar(host, puerto)
+        guardado = asyncio.create_task(self._bucle_guardado())
+        siguiendo = asyncio.create_task(self.seguidor.ejecutar()) if self.seguidor is not None else None
+        # SIGTERM termina igual que Ctrl+C: cancelando el servidor tras guardar
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, RuntimeError):  # Windows
+            pass
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            guardado.cancel()
+            if siguiendo is not None:
+                siguiendo.cancel()
+            await self.guardar()
+
+    async def _atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        self.conexiones += 1
+        try:
+            while True:
+                try:
+                    linea = await lector.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    escritor.write(self._codificar({'ok': False, 'error': "Petición demasiado larga"}))
+                    break
+                if not linea:
+                    break
+                if not linea.strip():
+                    continue
+                escritor.write(self._codificar(await self._responder(linea)))
+                # Solo se espera a vaciar el búfer cuando el cliente no lee las respuestas
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.conexiones -= 1
+            escritor.close()
+
+    @staticmethod
+    def _codificar(respuesta: Dict) -> bytes:
+        return (json.dumps(respuesta, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+    async def _responder(self, linea: bytes) -> Dict:
+        self.peticiones += 1
+        try:
+            peticion = json.loads(linea)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return {'ok': False, 'error': "JSON inválido"}
+        if not isinstance(peticion, dict):
+            return {'ok': False, 'error': "La petición debe ser un objeto JSON"}
+
+        respuesta = await self.procesar(peticion)
+        # 'ref' permite al cliente emparejar respuestas y peticiones
+        if 'ref' in peticion:
+            respuesta['ref'] = peticion['ref']
+        return respuesta
+
+    async def procesar(self, peticion: Dict) -> Dict:
+        """Ejecuta una petición ya decodificada y devuelve la respuesta"""
+        operacion = peticion.get('op')
+        try:
+            if operacion in LECTURAS:
+                resultado = self._leer(operacion, peticion)
+            elif operacion in ESCRITURAS:
+                if self.seguidor is not None:
+                    raise PeticionInvalida("Réplica de solo lectura: las escrituras van al inventario principal")
+                async with self._cerrojo_escritura:
+                    resultado = self._escribir(operacion, peticion)
+            elif operacion == 'guardar':
+                resultado = await self.guardar()
+            else:
+                raise PeticionInvalida(f"Operación desconocida: {operacion}")
+        except PeticionInvalida as e:
+            return {'ok': False, 'error': str(e)}
+        except (KeyError, TypeError) as e:
+            return {'ok': False, 'error': f"Petición incompleta o con tipos incorrectos: {e}"}
+        return {'ok': True, 'resultado': resultado}
+
+    def _leer(self, operacion: str, peticion: Dict):
+        inventario = self.inventario
+        if operacion == 'obtener':
+            producto = inventario.obtener_producto_por_id(peticion['id'])
+            return producto.to_dict() if producto is not None else None
+        if operacion == 'resumen':
+            return inventario.resumen()
+        if operacion == 'replicacion':
+            return self.seguidor.estado() if self.seguidor is not None else None
+
+        limite = _entero_no_negativo(peticion.get('limite', LIMITE_RESULTADOS), 'limite')
+        if operacion == 'buscar':
+            productos = inventario.buscar_por_nombre(str(peticion['nombre']))[:limite]
+        elif operacion == 'buscar_aproximado':
+            productos = inventario.buscar_aproximado(str(peticion['nombre']),
+                                                     _entero_no_negativo(peticion.get('distancia_maxima', 2),
+                                                                         'distancia_maxima'))[:limite]
+        else:
+            buscar = (inventario.buscar_por_rango_precio if operacion == 'rango_precio'
+                      else inventario.buscar_por_rango_cantidad)
+            productos = buscar(peticion.get('minimo'), peticion.get('maximo'), limite,
+                               _entero_no_negativo(peticion.get('desplazamiento', 0), 'desplazamiento'),
+                               bool(peticion.get('descendente', False)))
+        return [producto.to_dict() for producto in productos]
+
+    def _escribir(self, operacion: str, peticion: Dict) -> bool:
+        inventario = self.inventario
+        if operacion == 'añadir':
+            fila, motivo = validar_fila(peticion)
+            if motivo is not None:
+                raise PeticionInvalida(motivo)
+            hecho = inventario.añadir_producto(self.fabrica_producto(*fila))
+        elif operacion == 'actualizar':
+            cantidad = peticion.get('cantidad')
+            precio = peticion.get('precio')
+            if cantidad is not None:
+                _entero_no_negativo(cantidad, 'cantidad')
+            if precio is not None:
+                _numero_no_negativo(precio, 'precio')
+            hecho = inventario.actualizar_producto(peticion['id'], cantidad, precio)
+        else:
+            hecho = inventario.eliminar_producto(peticion['id'])
+        if hecho:
+            self._sucio = True
+        return hecho
+
+    async def guardar(self) -> bool:
+        """Guarda el inventario en un hilo aparte; mientras tanto solo esperan las escrituras"""
+        if self.guardar_inventario is None:
+            return False
+        async with self._cerrojo_escritura:
+            self._sucio = False
+            guardado = await asyncio.get_running_loop().run_in_executor(None, self.guardar_inventario)
+            if not guardado:
+                self._sucio = True
+            return guardado
+
+    async def _bucle_guardado(self) -> None:
+        while True:
+            await asyncio.sleep(self.intervalo_guardado)
+            if self._sucio:
+                await self.guardar()
+
+
+def servir(inventario, fabrica_producto: Callable, guardar: Optional[Callable[[], bool]] = None,
+           host: str = "0.0.0.0", puerto: int = PUERTO, intervalo_guardado: float = INTERVALO_GUARDADO,
+           seguidor=None) -> None:
+    """Ejecuta el servidor hasta Ctrl+C (o SIGTERM) y guarda los cambios al terminar"""
+    servidor = ServidorInventario(inventario, fabrica_producto, guardar, intervalo_guardado, seguidor)
+    if seguidor is not None:
+        print(f"Réplica de solo lectura de {seguidor.ruta}")
+    print(f"Servidor de inventario escuchando en {host}:{puerto} (Ctrl+C para terminar)")
+    try:
+        asyncio.run(servidor.ejecutar(host, puerto))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    print("Servidor detenido.")
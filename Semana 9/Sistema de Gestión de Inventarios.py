@@ -1,5 +1,21 @@
+import array
+
+# NumPy es opcional: si está instalado, las operaciones sobre columnas completas
+# se hacen vectorizadas sobre los mismos arreglos, sin copiarlos
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Si es True, el programa usa el almacén por columnas en lugar de la lista de productos
+USAR_ALMACEN_COLUMNAR = False
+
+
 # Clase Producto
 class Producto:
+    # Sin __dict__ por instancia: los atributos se guardan en huecos fijos
+    __slots__ = ('_id', '_nombre', '_cantidad', '_precio')
+
     def __init__(self, id, nombre, cantidad, precio):
         self._id = id  # Atributo ID (único)
         self._nombre = nombre
@@ -72,9 +88,132 @@ class Inventario:
             print("El inventario está vacío.")
 
 
+# Vista de un producto guardado en el almacén por columnas (se crea solo cuando se pide)
+class VistaProducto:
+    __slots__ = ('_almacen', '_fila')
+
+    def __init__(self, almacen, fila):
+        self._almacen = almacen
+        self._fila = fila
+
+    # Getters
+    def get_id(self):
+        return self._almacen._ids[self._fila]
+
+    def get_nombre(self):
+        return self._almacen._nombres[self._fila]
+
+    def get_cantidad(self):
+        return self._almacen._cantidades[self._fila]
+
+    def get_precio(self):
+        return self._almacen._precios[self._fila]
+
+    # Setters (escriben directamente en las columnas)
+    def set_cantidad(self, cantidad):
+        self._almacen._cantidades[self._fila] = cantidad
+
+    def set_precio(self, precio):
+        self._almacen._precios[self._fila] = precio
+
+
+# Clase InventarioColumnar: misma interfaz que Inventario, pero guarda cada atributo
+# en un arreglo contiguo y busca las filas por ID con un diccionario
+class InventarioColumnar:
+    def __init__(self):
+        self._ids = array.array('q')
+        self._nombres = []
+        self._cantidades = array.array('q')
+        self._precios = array.array('d')
+        self._filas = {}  # ID -> fila en las columnas
+
+    def __len__(self):
+        return len(self._ids)
+
+    # Añadir nuevo producto (el ID se comprueba en el índice, sin recorrer la lista)
+    def añadir_producto(self, producto):
+        if producto.get_id() not in self._filas:
+            self._filas[producto.get_id()] = len(self._ids)
+            self._ids.append(producto.get_id())
+            self._nombres.append(producto.get_nombre())
+            self._cantidades.append(producto.get_cantidad())
+            self._precios.append(producto.get_precio())
+            print(f"Producto {producto.get_nombre()} añadido con ID {producto.get_id()}.")
+        else:
+            print("Error: El ID ya existe.")
+
+    # Actualizar cantidad o precio de un producto por ID
+    def actualizar_producto(self, id, cantidad=None, precio=None):
+        fila = self._filas.get(id)
+        if fila is None:
+            print(f"Error: No se encontró producto con ID {id}.")
+            return
+        if cantidad is not None:
+            self._cantidades[fila] = cantidad
+        if precio is not None:
+            self._precios[fila] = precio
+        print(f"Producto con ID {id} actualizado.")
+
+    # Obtener un producto por ID (la vista se crea en este momento)
+    def obtener_producto(self, id):
+        fila = self._filas.get(id)
+        return VistaProducto(self, fila) if fila is not None else None
+
+    # Buscar producto(s) por nombre; solo se recorre la columna de nombres
+    def buscar_productos(self, nombre):
+        consulta = nombre.lower()
+        filas = [fila for fila, nombre_producto in enumerate(self._nombres) if consulta in nombre_producto.lower()]
+        if filas:
+            for fila in filas:
+                self._imprimir_fila(fila)
+        else:
+            print(f"No se encontraron productos con el nombre '{nombre}'.")
+
+    # Mostrar todos los productos en el inventario
+    def mostrar_todos(self):
+        if self._ids:
+            for fila in range(len(self._ids)):
+                self._imprimir_fila(fila)
+        else:
+            print("El inventario está vacío.")
+
+    def _imprimir_fila(self, fila):
+        print(
+            f"ID: {self._ids[fila]}, Nombre: {self._nombres[fila]}, Cantidad: {self._cantidades[fila]}, Precio: {self._precios[fila]}")
+
+    # Reabastecer: suma la cantidad a todos los productos (o solo a los que tienen menos de 'por_debajo_de')
+    def reabastecer(self, cantidad, por_debajo_de=None):
+        if np is not None:
+            columna = np.frombuffer(self._cantidades, dtype=np.int64)
+            if por_debajo_de is None:
+                columna += cantidad
+            else:
+                columna[columna < por_debajo_de] += cantidad
+        elif por_debajo_de is None:
+            self._cantidades = array.array('q', (valor + cantidad for valor in self._cantidades))
+        else:
+            self._cantidades = array.array('q', (valor + cantidad if valor < por_debajo_de else valor
+                                                 for valor in self._cantidades))
+
+    # Cambiar todos los precios multiplicándolos por un factor (1.10 = subir un 10%)
+    def ajustar_precios(self, factor):
+        if np is not None:
+            columna = np.frombuffer(self._precios, dtype=np.float64)
+            columna *= factor
+        else:
+            self._precios = array.array('d', (precio * factor for precio in self._precios))
+
+    # Valor total del inventario (suma de cantidad x precio)
+    def valor_total(self):
+        if np is not None:
+            return float(np.dot(np.frombuffer(self._cantidades, dtype=np.int64),
+                                np.frombuffer(self._precios, dtype=np.float64)))
+        return sum(cantidad * precio for cantidad, precio in zip(self._cantidades, self._precios))
+
+
 # Interfaz de consola
 def main():
-    inventario = Inventario()
+    inventario = InventarioColumnar() if USAR_ALMACEN_COLUMNAR else Inventario()
     while True:
         print("\nOpciones:")
         print("1. Añadir producto")